@@ -9,6 +9,7 @@ from flask_login import LoginManager
 from flask_caching import Cache
 from flask_bcrypt import Bcrypt
 from loguru import logger
+import click
 import sys
 import os
 from datetime import timedelta
@@ -227,6 +228,10 @@ def register_blueprints(app):
     from app.routes.sales import sales_bp
     app.register_blueprint(sales_bp)
 
+    # Blueprint de webhooks (WooCommerce)
+    from app.routes.webhooks import webhooks_bp
+    app.register_blueprint(webhooks_bp)
+
     # Blueprint de health check
     from app.routes.health import health_bp
     app.register_blueprint(health_bp)
@@ -269,11 +274,19 @@ def register_commands(app):
         print(f"✅ Usuario admin '{username}' creado exitosamente")
 
     @app.cli.command('sync-products')
-    def sync_products():
+    @click.option('--incremental', is_flag=True, help='Solo cambios desde la última sincronización')
+    @click.option('--reconcile', is_flag=True, help='Desactivar despublicados y revisar variaciones')
+    def sync_products(incremental, reconcile):
         """Sincronizar productos desde WooCommerce"""
         from app.services.woocommerce_service import WooCommerceService
 
         service = WooCommerceService()
+
+        if incremental or reconcile:
+            result = service.reconcile_products() if reconcile else service.sync_products_incremental()
+            print(f"{'✅' if result['success'] else '❌'} {result['message']}")
+            return
+
         count = service.sync_products_to_local()
 
         logger.info(f"Productos sincronizados: {count}")
@@ -297,6 +310,194 @@ def register_commands(app):
         logger.info("Correlativos inicializados")
         print("✅ Correlativos inicializados (B001-00000001)")
 
+    @app.cli.command('correlative-gaps')
+    @click.argument('series', default='B001')
+    def correlative_gaps(series):
+        """Listar números de la serie sin venta registrada (saltos)"""
+        from app.models.correlative import Correlative
+
+        gaps = Correlative.find_gaps(series)
+
+        if not gaps:
+            print(f"✅ Serie {series} sin saltos de numeración")
+            return
+
+        logger.warning(f"Saltos de numeración en {series}: {len(gaps)}")
+        print(f"⚠️  {len(gaps)} números sin venta en la serie {series}:")
+        for number in gaps:
+            print(f"   {series}-{str(number).zfill(8)}")
+
+
+    @app.cli.command('send-daily-summary')
+    @click.option('--date', 'reference_date', default=None, help='Fecha de las boletas (YYYY-MM-DD, default: hoy)')
+    def send_daily_summary(reference_date):
+        """Enviar boletas pendientes del día en Resúmenes Diarios (RC)"""
+        from datetime import datetime
+        from app.services.pse_service import PSEService
+
+        day = datetime.strptime(reference_date, '%Y-%m-%d').date() if reference_date else None
+        result = PSEService().send_daily_summary(day)
+
+        print(f"{'✅' if result['success'] else '❌'} {result['message']}")
+        for summary in result['summaries']:
+            print(f"   {summary['summary_id']}: {summary['line_count']} boletas - {summary['status']}")
+
+
+    @app.cli.command('validate-xml')
+    @click.option('--date', 'reference_date', default=None, help='Fecha de las boletas (YYYY-MM-DD, default: hoy)')
+    def validate_xml(reference_date):
+        """Validar contra XSD el XML de todas las boletas de un día"""
+        from datetime import datetime
+        from app.services.pse_service import PSEService
+
+        day = datetime.strptime(reference_date, '%Y-%m-%d').date() if reference_date else None
+        result = PSEService().validate_day_documents(day)
+
+        print(
+            f"{'✅' if not result['invalid'] else '❌'} {result['valid']}/{result['checked']} boletas "
+            f"del {result['reference_date']} válidas ({result['elapsed_ms']} ms)"
+        )
+        for correlative, errors in result['errors'].items():
+            print(f"   {correlative}:")
+            for error in errors[:5]:
+                print(f"      {error}")
+
+
+    @app.cli.command('reconcile-cdr')
+    @click.option('--month', default=None, help='Mes a conciliar (YYYY-MM, default: mes actual)')
+    def reconcile_cdr(month):
+        """Conciliar estado SUNAT de las ventas del mes con sus CDR"""
+        import calendar
+        from datetime import datetime
+        from app.services.pse_service import PSEService
+        from app.utils.helpers import lima_today
+
+        first = datetime.strptime(month, '%Y-%m').date() if month else lima_today().replace(day=1)
+        last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        result = PSEService().reconcile_cdrs(first, last)
+
+        print(
+            f"{'✅' if not result['mismatches'] else '⚠️ '} {result['checked']} ventas con CDR "
+            f"({result['cdr_files']} archivos) conciliadas en {result['elapsed_ms']} ms: "
+            f"{result['updated']} actualizadas, {result['missing']} sin archivo, "
+            f"{result['unreadable']} ilegibles"
+        )
+        for mismatch in result['mismatches']:
+            print(
+                f"   {mismatch['correlative']}: {mismatch['status']} -> {mismatch['cdr_status']} "
+                f"(código {mismatch['response_code']})"
+            )
+
+
+    @app.cli.command('sales-report')
+    @click.option('--month', default=None, help='Mes (YYYY-MM, default: mes actual)')
+    @click.option('--from', 'date_from', default=None, help='Primer día (YYYY-MM-DD)')
+    @click.option('--to', 'date_to', default=None, help='Último día, inclusive (YYYY-MM-DD, default: --from)')
+    def sales_report(month, date_from, date_to):
+        """Reporte de ventas por estado, día, vendedor y hora de Lima"""
+        import calendar
+        from datetime import datetime
+        from app.services.sales_report import SalesReportService
+        from app.utils.helpers import lima_today
+
+        if date_from:
+            first = datetime.strptime(date_from, '%Y-%m-%d').date()
+            last = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else first
+        else:
+            first = datetime.strptime(month, '%Y-%m').date() if month else lima_today().replace(day=1)
+            last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+        report = SalesReportService(first, last)
+        totals = report.status_totals()
+        print(
+            f"✅ {first.isoformat()} a {last.isoformat()}: {totals['total']} ventas, "
+            f"{totals['accepted']} aceptadas ({totals['success_rate']}%), "
+            f"S/ {totals['total_facturado']:.2f} facturado"
+        )
+
+        def line(label, row):
+            print(
+                f"   {label:<24} {row['total']:>6} ventas  {row['accepted']:>6} aceptadas  "
+                f"S/ {row['total_facturado']:>12,.2f}"
+            )
+
+        print("Por día:")
+        for row in report.iter_by_day():
+            line(row['day'], row)
+        print("Por vendedor:")
+        for row in report.iter_by_seller():
+            line(row['seller'], row)
+        print("Por hora:")
+        for row in report.iter_by_hour():
+            line(f"{row['hour']:02d}:00", row)
+
+
+    @app.cli.command('rebuild-sales-summary')
+    @click.option('--from', 'date_from', default=None, help='Primer día (YYYY-MM-DD, default: primera venta)')
+    @click.option('--to', 'date_to', default=None, help='Último día, inclusive (YYYY-MM-DD, default: hoy)')
+    def rebuild_sales_summary(date_from, date_to):
+        """Recalcular los acumulados diarios de ventas y de productos"""
+        from datetime import datetime
+        from app.models.sale import Sale
+        from app.models.daily_sales_summary import DailySalesSummary
+        from app.models.daily_product_sales import DailyProductSales
+        from app.utils.helpers import lima_today, lima_date
+
+        if date_from:
+            first = datetime.strptime(date_from, '%Y-%m-%d').date()
+        else:
+            first_sale = db.session.query(db.func.min(Sale.created_at)).scalar()
+            if first_sale is None:
+                print("✅ Sin ventas registradas")
+                return
+            first = lima_date(first_sale)
+        last = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else lima_today()
+
+        if first > last:
+            print("❌ --from debe ser anterior o igual a --to")
+            return
+
+        result = DailySalesSummary.rebuild(first, last)
+        products = DailyProductSales.rebuild(first, last)
+        print(
+            f"✅ Acumulado {first.isoformat()} a {last.isoformat()}: {result['sales']} ventas "
+            f"en {result['rows']} filas, {products['lines']} líneas en {products['rows']} filas "
+            f"de productos ({result['days']} días)"
+        )
+
+
+    @app.cli.command('generate-pdfs')
+    @click.option('--from', 'date_from', default=None, help='Primer día (YYYY-MM-DD)')
+    @click.option('--to', 'date_to', default=None, help='Último día, inclusive (YYYY-MM-DD, default: --from)')
+    @click.option('--ids', default=None, help='IDs de venta separados por comas')
+    @click.option('--workers', type=int, default=None, help='Procesos (default: PDF_BATCH_WORKERS o núcleos)')
+    def generate_pdfs(date_from, date_to, ids, workers):
+        """Generar en paralelo los PDF de las boletas aceptadas de un rango o lista"""
+        from datetime import datetime
+        from app.services.pdf_batch import PDFBatchService
+
+        if not date_from and not ids:
+            print("❌ Indicar --from (y opcionalmente --to) o --ids")
+            return
+
+        def parse(value):
+            return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+        service = PDFBatchService()
+        sale_ids = service.select_sale_ids(
+            parse(date_from), parse(date_to),
+            [int(sale_id) for sale_id in ids.split(',')] if ids else None
+        )
+        result = service.generate(sale_ids, workers)
+
+        print(
+            f"{'✅' if not result['errors'] else '⚠️ '} {result['rendered']}/{result['total']} PDF en "
+            f"{result['elapsed_ms'] / 1000:.1f}s con {result['workers']} procesos: "
+            f"{result['pdfs_per_second']} PDF/s ({result['pdfs_per_second_per_core']} PDF/s por núcleo)"
+        )
+        for sale_id, error in result['errors'].items():
+            print(f"   Venta {sale_id}: {error}")
+
 
 def register_error_handlers(app):
     """Registrar manejadores de errores personalizados"""
@@ -47,6 +47,9 @@ class Config:
     CACHE_TYPE = 'redis'
     CACHE_REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
     CACHE_DEFAULT_TIMEOUT = 300
+    REPORTS_CACHE_TIMEOUT = int(os.getenv('REPORTS_CACHE_TIMEOUT', 3600))  # Reportes de periodos cerrados
+    REPORTS_CACHE_TIMEOUT_OPEN = int(os.getenv('REPORTS_CACHE_TIMEOUT_OPEN', 60))  # Periodos que incluyen hoy
+    SALES_COUNT_CACHE_TIMEOUT = int(os.getenv('SALES_COUNT_CACHE_TIMEOUT', 60))  # Total aproximado del listado de ventas
 
     # ==============================================
     # SESSION
@@ -79,6 +82,14 @@ class Config:
     WOO_CONSUMER_SECRET = os.getenv('WOO_CONSUMER_SECRET')
     WOO_VERSION = 'wc/v3'
     WOO_TIMEOUT = 30
+    WOO_SYNC_WORKERS = int(os.getenv('WOO_SYNC_WORKERS', 4))  # Descargas paralelas en la sincronización
+    WOO_DELTA_SYNC_OVERLAP = int(os.getenv('WOO_DELTA_SYNC_OVERLAP', 120))  # Margen (s) sobre la marca de agua
+    WOO_WEBHOOK_SECRET = os.getenv('WOO_WEBHOOK_SECRET')  # Secreto configurado en WooCommerce > Webhooks
+    WOO_WEBHOOK_COALESCE_SECONDS = int(os.getenv('WOO_WEBHOOK_COALESCE_SECONDS', 5))  # Ventana de coalescencia
+
+    # Índice de búsqueda de productos en memoria (por proceso)
+    PRODUCT_SEARCH_INDEX_ENABLED = os.getenv('PRODUCT_SEARCH_INDEX_ENABLED', 'True').lower() == 'true'
+    PRODUCT_SEARCH_INDEX_REFRESH = int(os.getenv('PRODUCT_SEARCH_INDEX_REFRESH', 60))  # segundos
 
     # ==============================================
     # PSE/SUNAT
@@ -86,7 +97,24 @@ class Config:
     PSE_API_URL = os.getenv('PSE_API_URL')
     PSE_TOKEN = os.getenv('PSE_TOKEN')
     PSE_SANDBOX_MODE = os.getenv('PSE_SANDBOX_MODE', 'True').lower() == 'true'
-    PSE_TIMEOUT = 30
+    PSE_TIMEOUT = 30  # Timeout de lectura (s)
+    PSE_CONNECT_TIMEOUT = int(os.getenv('PSE_CONNECT_TIMEOUT', 5))
+    PSE_POOL_SIZE = int(os.getenv('PSE_POOL_SIZE', 10))  # Conexiones keep-alive por proceso
+    PSE_MAX_RETRIES = int(os.getenv('PSE_MAX_RETRIES', 2))
+    PSE_RETRY_BUDGET_RATIO = float(os.getenv('PSE_RETRY_BUDGET_RATIO', 0.2))  # Reintentos / requests
+    PSE_BACKOFF_BASE = 0.5  # Backoff aleatorio: uniform(0, min(BACKOFF_MAX, BASE * 2^intento))
+    PSE_BACKOFF_MAX = 8
+    PSE_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('PSE_CIRCUIT_FAILURE_THRESHOLD', 5))  # Fallos consecutivos para abrir
+    PSE_CIRCUIT_FAILURE_WINDOW = 60  # Ventana de fallos consecutivos (s)
+    PSE_CIRCUIT_OPEN_SECONDS = int(os.getenv('PSE_CIRCUIT_OPEN_SECONDS', 30))  # Tiempo abierto antes de probar
+    PSE_CONTINGENCY_DRAIN_BATCH = int(os.getenv('PSE_CONTINGENCY_DRAIN_BATCH', 30))  # Ventas por drenado (cada minuto)
+    PSE_CONTINGENCY_DRAIN_RATE = float(os.getenv('PSE_CONTINGENCY_DRAIN_RATE', 1))  # Envíos por segundo al drenar
+    # Cada conexión SSE ocupa un worker (gunicorn sync, timeout 30 s): se corta
+    # antes del timeout y el navegador reconecta hasta SUNAT_EVENTS_MAX_WAIT
+    SUNAT_EVENTS_STREAM_TIMEOUT = int(os.getenv('SUNAT_EVENTS_STREAM_TIMEOUT', 20))  # Duración de cada conexión SSE (s)
+    SUNAT_EVENTS_MAX_WAIT = int(os.getenv('SUNAT_EVENTS_MAX_WAIT', 120))  # Espera total del POS antes de consultar el estado (s)
+    SUNAT_EVENTS_RECONNECT_MS = 1000  # retry: del stream SSE (ms)
+    SUNAT_EVENTS_HEARTBEAT = 10  # Comentario keep-alive del stream SSE (s)
 
     # ==============================================
     # RENIEC/SUNAT APIs
@@ -108,6 +136,13 @@ class Config:
     # ==============================================
     RUS_LIMIT_CATEGORY_1 = float(os.getenv('RUS_LIMIT_CATEGORY_1', 5000.00))
     RUS_LIMIT_CATEGORY_2 = float(os.getenv('RUS_LIMIT_CATEGORY_2', 8000.00))
+    RUS_SNAPSHOT_TTL = int(os.getenv('RUS_SNAPSHOT_TTL', 5))  # segundos de caché del control mensual
+
+    # ==============================================
+    # CORRELATIVOS
+    # ==============================================
+    # 1 = bloqueo de fila por venta; >1 = bloque de números reservado por proceso
+    CORRELATIVE_BLOCK_SIZE = int(os.getenv('CORRELATIVE_BLOCK_SIZE', 1))
 
     # ==============================================
     # STORAGE PATHS
@@ -118,6 +153,21 @@ class Config:
     CDR_PATH = os.path.join(STORAGE_PATH, 'cdr')
     BACKUP_PATH = os.path.join(STORAGE_PATH, 'backup')
 
+    # Generación masiva de PDF (flask generate-pdfs / tarea generate_pdfs_bulk)
+    PDF_BATCH_WORKERS = int(os.getenv('PDF_BATCH_WORKERS', 0))  # Procesos del pool (0 = núcleos de la CPU)
+    PDF_BATCH_CHUNK_SIZE = int(os.getenv('PDF_BATCH_CHUNK_SIZE', 50))  # Ventas por lote
+
+    # Esquemas XSD de UBL 2.1 y SUNAT (distribución OASIS + UBLPE-SummaryDocuments)
+    UBL_XSD_DIR = os.getenv('UBL_XSD_DIR', os.path.join(STORAGE_PATH, 'xsd'))
+    UBL_SCHEMA_VALIDATION = os.getenv('UBL_SCHEMA_VALIDATION', 'True').lower() == 'true'
+
+    # Firma XML-DSig local con el certificado PKCS#12 de la empresa
+    # (desactivada: el PSE firma cada comprobante)
+    XML_SIGNING_ENABLED = os.getenv('XML_SIGNING_ENABLED', 'False').lower() == 'true'
+    SIGNING_CERT_PATH = os.getenv('SIGNING_CERT_PATH', os.path.join(STORAGE_PATH, 'certs', 'certificado.pfx'))
+    SIGNING_CERT_PASSWORD = os.getenv('SIGNING_CERT_PASSWORD')
+    XML_SIGNATURE_ALGORITHM = os.getenv('XML_SIGNATURE_ALGORITHM', 'sha256')  # sha256 | sha1
+
     # ==============================================
     # FILE UPLOADS
     # ==============================================
@@ -5,18 +5,29 @@ Importación centralizada de todos los modelos
 from app.models.user import User
 from app.models.customer import Customer
 from app.models.product import Product
-from app.models.correlative import Correlative
+from app.models.correlative import Correlative, CorrelativeLease
 from app.models.sale import Sale, SaleItem
 from app.models.rus_control import RUSControl
 from app.models.audit_log import AuditLog
+from app.models.sync_state import SyncState
+from app.models.product_webhook_event import ProductWebhookEvent
+from app.models.daily_summary import DailySummary
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.daily_product_sales import DailyProductSales
 
 __all__ = [
     'User',
     'Customer',
     'Product',
     'Correlative',
+    'CorrelativeLease',
     'Sale',
     'SaleItem',
     'RUSControl',
-    'AuditLog'
+    'AuditLog',
+    'SyncState',
+    'ProductWebhookEvent',
+    'DailySummary',
+    'DailySalesSummary',
+    'DailyProductSales'
 ]
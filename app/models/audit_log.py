@@ -40,7 +40,7 @@ class AuditLog(db.Model):
 
     @staticmethod
     def log_action(action, user_id=None, entity_type=None, entity_id=None,
-                   details=None, ip_address=None, user_agent=None):
+                   details=None, ip_address=None, user_agent=None, commit=True):
         """
         Registrar una acción en el log de auditoría
 
@@ -52,6 +52,7 @@ class AuditLog(db.Model):
             details: Diccionario con detalles adicionales
             ip_address: Dirección IP del usuario
             user_agent: User agent del navegador
+            commit: Si es False, solo agrega el registro a la sesión (el llamador hace commit)
         """
         log = AuditLog(
             user_id=user_id,
@@ -63,7 +64,8 @@ class AuditLog(db.Model):
             user_agent=user_agent
         )
         db.session.add(log)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return log
 
     @staticmethod
@@ -34,14 +34,146 @@ class Correlative(db.Model):
         next_number = self.current_number + 1
         return f"{self.series}-{str(next_number).zfill(8)}"
 
-    def advance_correlative(self):
+    def advance_correlative(self, commit=True):
         """
         Avanza el correlativo (solo después de éxito en SUNAT)
         CRÍTICO: Solo llamar cuando SUNAT confirme la aceptación
+
+        Args:
+            commit: Si es False, solo modifica la sesión (el llamador hace commit)
         """
         self.current_number += 1
         self.last_issued = datetime.utcnow()
-        db.session.commit()
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def allocate_next(document_type='BOLETA'):
+        """
+        Asignar el siguiente correlativo de forma atómica
+
+        Ejecuta UPDATE ... SET current_number = current_number + 1 dentro de la
+        transacción del llamador: la fila queda bloqueada hasta su commit y, si
+        la venta hace rollback, el número no se consume (no se generan saltos).
+
+        Args:
+            document_type: Tipo de documento (BOLETA, FACTURA, ...)
+
+        Returns:
+            str: Correlativo asignado (B001-00000002) o None si no hay serie activa
+        """
+        updated = Correlative.query.filter_by(
+            document_type=document_type,
+            is_active=True
+        ).update({
+            Correlative.current_number: Correlative.current_number + 1,
+            Correlative.last_issued: datetime.utcnow()
+        }, synchronize_session=False)
+
+        if not updated:
+            return None
+
+        # La fila ya está bloqueada por el UPDATE: la lectura devuelve nuestro valor
+        correlative = Correlative.query.filter_by(
+            document_type=document_type,
+            is_active=True
+        ).populate_existing().first()
+
+        return correlative.format_number(correlative.current_number)
+
+    @staticmethod
+    def lease_block(document_type='BOLETA', size=50, worker=None):
+        """
+        Reservar un bloque de números para un proceso (transacción propia)
+
+        Usa un UPDATE atómico (current_number = current_number + size) y registra
+        el bloque en correlative_leases para conservar la trazabilidad de saltos.
+
+        Args:
+            document_type: Tipo de documento
+            size: Cantidad de números a reservar
+            worker: Identificador del proceso (host:pid)
+
+        Returns:
+            CorrelativeLease: Bloque reservado o None si no hay serie activa
+        """
+        session = db.session.session_factory()
+        try:
+            correlative = session.query(Correlative).filter_by(
+                document_type=document_type,
+                is_active=True
+            ).first()
+
+            if not correlative:
+                return None
+
+            session.query(Correlative).filter_by(id=correlative.id).update({
+                Correlative.current_number: Correlative.current_number + size,
+                Correlative.last_issued: datetime.utcnow()
+            }, synchronize_session=False)
+
+            # El UPDATE mantiene el bloqueo: la lectura devuelve nuestro valor
+            end_number = session.query(Correlative.current_number).filter_by(
+                id=correlative.id
+            ).scalar()
+
+            lease = CorrelativeLease(
+                correlative_id=correlative.id,
+                series=correlative.series,
+                start_number=end_number - size + 1,
+                end_number=end_number,
+                worker=worker
+            )
+            session.add(lease)
+            session.commit()
+            session.refresh(lease)
+            session.expunge(lease)
+            return lease
+
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def find_gaps(series='B001'):
+        """
+        Detectar números de la serie sin venta registrada
+
+        Args:
+            series: Serie a revisar (B001)
+
+        Returns:
+            list: Números emitidos (<= current_number) sin venta asociada
+        """
+        from app.models.sale import Sale
+
+        correlative = Correlative.query.filter_by(series=series).first()
+        if not correlative:
+            return []
+
+        used = {
+            int(row.correlative.split('-')[1])
+            for row in db.session.query(Sale.correlative).filter(
+                Sale.correlative.like(f"{series}-%")
+            )
+        }
+
+        # Números aún reservados por bloques abiertos no son saltos
+        reserved = set()
+        for lease in CorrelativeLease.query.filter_by(series=series, released_at=None):
+            reserved.update(range(lease.start_number, lease.end_number + 1))
+
+        first = min(used) if used else correlative.current_number + 1
+        return [
+            number for number in range(first, correlative.current_number + 1)
+            if number not in used and number not in reserved
+        ]
+
+    def format_number(self, number):
+        """Formatear un número de la serie: B001-00000002"""
+        return f"{self.series}-{str(number).zfill(8)}"
 
     def peek_next_number(self):
         """Ver el siguiente número sin avanzar"""
@@ -90,3 +222,40 @@ class Correlative(db.Model):
             return boleta
 
         return existing
+
+
+class CorrelativeLease(db.Model):
+    """Bloque de correlativos reservado por un proceso (trazabilidad de saltos)"""
+    __tablename__ = 'correlative_leases'
+
+    id = db.Column(db.Integer, primary_key=True)
+    correlative_id = db.Column(db.Integer, db.ForeignKey('correlatives.id'), nullable=False)
+    series = db.Column(db.String(4), nullable=False, index=True)
+    start_number = db.Column(db.Integer, nullable=False)
+    end_number = db.Column(db.Integer, nullable=False)
+    worker = db.Column(db.String(100))  # host:pid
+    last_used_number = db.Column(db.Integer)  # Último número entregado al liberar
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    released_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<CorrelativeLease {self.series} {self.start_number}-{self.end_number}>'
+
+    @staticmethod
+    def release(lease_id, last_used_number):
+        """
+        Marcar un bloque como liberado (los números no usados quedan como saltos)
+
+        Args:
+            lease_id: ID del bloque
+            last_used_number: Último número entregado (None si no se usó)
+        """
+        session = db.session.session_factory()
+        try:
+            session.query(CorrelativeLease).filter_by(id=lease_id).update({
+                CorrelativeLease.last_used_number: last_used_number,
+                CorrelativeLease.released_at: datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
@@ -0,0 +1,167 @@
+"""
+Modelo DailyProductSales - Acumulado diario de ventas por producto
+Unidades y monto vendidos por día de Lima y producto (ventas no anuladas)
+"""
+from app import db
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.utils.helpers import lima_date, lima_day_bounds
+
+
+class DailyProductSales(db.Model):
+    """
+    Acumulado de sale_items por (día de Lima, producto)
+
+    Igual que DailySalesSummary: UPSERT incremental en la transacción que
+    registra la venta y resta al anularla, así los reportes de productos
+    leen días × productos filas en vez de todas las líneas vendidas.
+    Recalcular con `flask rebuild-sales-summary`.
+    """
+    __tablename__ = 'daily_product_sales'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # Fecha en Lima (no UTC)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, default=0, nullable=False)
+    line_count = db.Column(db.Integer, default=0, nullable=False)  # Líneas (ventas) con el producto
+    amount = db.Column(db.Numeric(12, 2), default=0.00, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'product_id', name='unique_daily_product_sales'),
+    )
+
+    def __repr__(self):
+        return f'<DailyProductSales {self.day} product={self.product_id}: {self.quantity}>'
+
+    @staticmethod
+    def record(created_at, items, sign=1):
+        """
+        Sumar (o restar, sign=-1) las líneas de una venta. No hace commit.
+
+        Args:
+            created_at: Fecha UTC de la venta
+            items: Iterable de (product_id, quantity, subtotal)
+            sign: 1 al registrar, -1 al anular
+        """
+        day = lima_date(created_at)
+        deltas = {}
+        for product_id, quantity, subtotal in items:
+            current = deltas.get(product_id, (0, 0, Decimal('0.00')))
+            deltas[product_id] = (current[0] + sign * quantity, current[1] + sign, current[2] + sign * subtotal)
+
+        now = datetime.utcnow()
+        # Orden fijo de claves: dos transacciones nunca bloquean filas en orden inverso
+        rows = [
+            {
+                'day': day,
+                'product_id': product_id,
+                'quantity': quantity,
+                'line_count': line_count,
+                'amount': amount,
+                'updated_at': now
+            }
+            for product_id, (quantity, line_count, amount) in sorted(deltas.items())
+        ]
+        if rows:
+            db.session.execute(DailyProductSales._upsert_statement(rows))
+
+    @staticmethod
+    def record_cancellation(sale):
+        """Restar las líneas de una venta que se anula (una consulta de items). No hace commit."""
+        DailyProductSales.record(
+            sale.created_at,
+            [(item.product_id, item.quantity, item.subtotal) for item in sale.items],
+            sign=-1
+        )
+
+    @staticmethod
+    def rebuild(start_date, end_date) -> dict:
+        """
+        Recalcular el acumulado desde sale_items para un rango de días
+
+        Un GROUP BY product_id por día sobre el rango UTC del día en Lima.
+
+        Args:
+            start_date: Primer día (Lima)
+            end_date: Último día, inclusive
+
+        Returns:
+            dict: {'days': int, 'rows': int, 'lines': int}
+        """
+        from app.models.sale import Sale, SaleItem
+
+        DailyProductSales.query.filter(
+            DailyProductSales.day >= start_date,
+            DailyProductSales.day <= end_date
+        ).delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        days = rows = lines = 0
+        day = start_date
+        while day <= end_date:
+            start, end = lima_day_bounds(day)
+            groups = db.session.query(
+                SaleItem.product_id,
+                db.func.sum(SaleItem.quantity),
+                db.func.count(SaleItem.id),
+                db.func.sum(SaleItem.subtotal)
+            ).join(Sale, Sale.id == SaleItem.sale_id).filter(
+                Sale.created_at >= start,
+                Sale.created_at < end,
+                Sale.is_cancelled == False
+            ).group_by(SaleItem.product_id).all()
+
+            if groups:
+                db.session.execute(db.insert(DailyProductSales), [
+                    {
+                        'day': day,
+                        'product_id': product_id,
+                        'quantity': int(quantity or 0),
+                        'line_count': line_count,
+                        'amount': amount or Decimal('0.00'),
+                        'updated_at': now
+                    }
+                    for product_id, quantity, line_count, amount in groups
+                ])
+                rows += len(groups)
+                lines += sum(group[2] for group in groups)
+
+            days += 1
+            day += timedelta(days=1)
+
+        db.session.commit()
+        return {'days': days, 'rows': rows, 'lines': lines}
+
+    @staticmethod
+    def _upsert_statement(rows):
+        """
+        INSERT ... ON DUPLICATE KEY UPDATE (MySQL) u
+        INSERT ... ON CONFLICT (day, product_id) DO UPDATE (SQLite/PostgreSQL) sumando los incrementos
+        """
+        table = DailyProductSales.__table__
+        dialect = db.engine.dialect.name
+
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.inserted
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+
+        values = {
+            'quantity': table.c.quantity + incoming.quantity,
+            'line_count': table.c.line_count + incoming.line_count,
+            'amount': table.c.amount + incoming.amount,
+            'updated_at': incoming.updated_at
+        }
+
+        if dialect == 'mysql':
+            return stmt.on_duplicate_key_update(values)
+        return stmt.on_conflict_do_update(index_elements=['day', 'product_id'], set_=values)
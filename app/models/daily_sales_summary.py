@@ -0,0 +1,255 @@
+"""
+Modelo DailySalesSummary - Acumulado diario de ventas
+Conteo y monto por día y hora de Lima, vendedor y estado SUNAT, mantenido en cada commit de ventas
+"""
+from app import db
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.utils.helpers import lima_day_bounds, LIMA_UTC_OFFSET
+
+
+class DailySalesSummary(db.Model):
+    """
+    Acumulado de ventas por (día y hora de Lima, vendedor, estado SUNAT, anulada)
+
+    Se actualiza con UPSERT incremental (+1 / -1) en la misma transacción
+    que registra la venta o cambia su estado, así que dashboard y reportes
+    leen unas pocas filas en vez de recorrer sales. Las actualizaciones
+    masivas (UPDATE sin ORM) deben pasar sus ventas por move_rows.
+
+    Tras crear la tabla, o si se sospecha una desviación, recalcular con
+    `flask rebuild-sales-summary`.
+    """
+    __tablename__ = 'daily_sales_summary'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)  # Fecha en Lima (no UTC)
+    hour = db.Column(db.SmallInteger, nullable=False)  # Hora en Lima (0-23)
+    seller_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    sunat_status = db.Column(db.String(10), nullable=False)  # Mismos valores que Sale.sunat_status
+    is_cancelled = db.Column(db.Boolean, default=False, nullable=False)
+    sale_count = db.Column(db.Integer, default=0, nullable=False)
+    total = db.Column(db.Numeric(12, 2), default=0.00, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'hour', 'seller_id', 'sunat_status', 'is_cancelled',
+                            name='unique_daily_sales_bucket'),
+    )
+
+    KEY_COLUMNS = ('day', 'hour', 'seller_id', 'sunat_status', 'is_cancelled')
+
+    # Hora de Lima a partir de la hora UTC (+24 evita módulos negativos en MySQL)
+    _LIMA_HOUR_SHIFT = 24 + int(LIMA_UTC_OFFSET.total_seconds() // 3600)
+
+    def __repr__(self):
+        return (
+            f'<DailySalesSummary {self.day} {self.hour:02d}h seller={self.seller_id} '
+            f'{self.sunat_status}: {self.sale_count}>'
+        )
+
+    @staticmethod
+    def bucket(created_at, seller_id, sunat_status, is_cancelled):
+        """Clave del acumulado para una venta"""
+        lima_time = created_at + LIMA_UTC_OFFSET
+        return (lima_time.date(), lima_time.hour, seller_id, sunat_status, bool(is_cancelled))
+
+    @staticmethod
+    def lima_hour(column):
+        """Expresión SQL: hora de Lima (0-23) de una columna datetime UTC"""
+        return (db.extract('hour', column) + DailySalesSummary._LIMA_HOUR_SHIFT) % 24
+
+    @staticmethod
+    def record(sale):
+        """Sumar una venta nueva (después del flush). No hace commit."""
+        DailySalesSummary.apply({
+            DailySalesSummary.bucket(sale.created_at, sale.seller_id, sale.sunat_status, sale.is_cancelled):
+                (1, sale.total)
+        })
+
+    @staticmethod
+    def move(sale, sunat_status=None, is_cancelled=None):
+        """
+        Pasar una venta de su acumulado actual al del nuevo estado
+
+        Llamar antes de asignar el nuevo valor en la venta. No hace commit.
+
+        Args:
+            sale: Venta (con sus valores actuales)
+            sunat_status: Nuevo estado SUNAT (default: el actual)
+            is_cancelled: Nuevo estado de anulación (default: el actual)
+        """
+        DailySalesSummary.move_rows(
+            [(sale.created_at, sale.seller_id, sale.sunat_status, sale.is_cancelled, sale.total)],
+            sunat_status, is_cancelled
+        )
+
+    @staticmethod
+    def move_rows(rows, sunat_status=None, is_cancelled=None):
+        """
+        Igual que move para ventas actualizadas con un UPDATE masivo
+
+        Args:
+            rows: Iterable de (created_at, seller_id, sunat_status, is_cancelled, total)
+                  con los valores previos al UPDATE
+            sunat_status: Nuevo estado SUNAT (default: el de cada fila)
+            is_cancelled: Nuevo estado de anulación (default: el de cada fila)
+        """
+        deltas = {}
+        for created_at, seller_id, old_status, old_cancelled, total in rows:
+            new_status = old_status if sunat_status is None else sunat_status
+            new_cancelled = old_cancelled if is_cancelled is None else is_cancelled
+            if new_status == old_status and bool(new_cancelled) == bool(old_cancelled):
+                continue
+
+            old = DailySalesSummary.bucket(created_at, seller_id, old_status, old_cancelled)
+            new = DailySalesSummary.bucket(created_at, seller_id, new_status, new_cancelled)
+            for key, sign in ((old, -1), (new, 1)):
+                count, amount = deltas.get(key, (0, Decimal('0.00')))
+                deltas[key] = (count + sign, amount + sign * total)
+
+        DailySalesSummary.apply(deltas)
+
+    @staticmethod
+    def apply(deltas):
+        """
+        Aplicar incrementos con un único INSERT ... ON DUPLICATE KEY UPDATE
+
+        Args:
+            deltas: {(day, hour, seller_id, sunat_status, is_cancelled): (count, amount)}
+        """
+        now = datetime.utcnow()
+        # Orden fijo de claves: dos transacciones nunca bloquean filas en orden inverso
+        rows = [
+            dict(zip(DailySalesSummary.KEY_COLUMNS, key), sale_count=count, total=amount, updated_at=now)
+            for key, (count, amount) in sorted(deltas.items())
+            if count or amount
+        ]
+        if rows:
+            db.session.execute(DailySalesSummary._upsert_statement(rows))
+
+    @staticmethod
+    def status_totals(start_date, end_date=None, seller_id=None) -> dict:
+        """
+        Conteo y monto por estado SUNAT (ventas no anuladas)
+
+        Args:
+            start_date: Primer día (Lima)
+            end_date: Último día, inclusive (default: start_date)
+            seller_id: Filtrar por vendedor
+
+        Returns:
+            dict: {sunat_status: {'count': int, 'total': Decimal}}
+        """
+        query = db.session.query(
+            DailySalesSummary.sunat_status,
+            db.func.sum(DailySalesSummary.sale_count),
+            db.func.sum(DailySalesSummary.total)
+        ).filter(
+            DailySalesSummary.day >= start_date,
+            DailySalesSummary.day <= (end_date or start_date),
+            DailySalesSummary.is_cancelled == False
+        )
+        if seller_id:
+            query = query.filter(DailySalesSummary.seller_id == seller_id)
+
+        return {
+            status: {'count': int(count or 0), 'total': Decimal(total or 0).quantize(Decimal('0.01'))}
+            for status, count, total in query.group_by(DailySalesSummary.sunat_status)
+        }
+
+    @staticmethod
+    def rebuild(start_date, end_date) -> dict:
+        """
+        Recalcular el acumulado desde sales para un rango de días
+
+        Un GROUP BY por día sobre el rango UTC del día en Lima (usa el
+        índice de created_at). Borrado e inserción van en una sola
+        transacción.
+
+        Args:
+            start_date: Primer día (Lima)
+            end_date: Último día, inclusive
+
+        Returns:
+            dict: {'days': int, 'rows': int, 'sales': int}
+        """
+        from app.models.sale import Sale
+
+        DailySalesSummary.query.filter(
+            DailySalesSummary.day >= start_date,
+            DailySalesSummary.day <= end_date
+        ).delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        hour = DailySalesSummary.lima_hour(Sale.created_at).label('hour')
+        days = rows = sales = 0
+        day = start_date
+        while day <= end_date:
+            start, end = lima_day_bounds(day)
+            groups = db.session.query(
+                hour,
+                Sale.seller_id,
+                Sale.sunat_status,
+                Sale.is_cancelled,
+                db.func.count(Sale.id),
+                db.func.sum(Sale.total)
+            ).filter(
+                Sale.created_at >= start,
+                Sale.created_at < end
+            ).group_by(hour, Sale.seller_id, Sale.sunat_status, Sale.is_cancelled).all()
+
+            if groups:
+                db.session.execute(db.insert(DailySalesSummary), [
+                    {
+                        'day': day,
+                        'hour': int(lima_hour),
+                        'seller_id': seller_id,
+                        'sunat_status': status,
+                        'is_cancelled': bool(cancelled),
+                        'sale_count': count,
+                        'total': total or Decimal('0.00'),
+                        'updated_at': now
+                    }
+                    for lima_hour, seller_id, status, cancelled, count, total in groups
+                ])
+                rows += len(groups)
+                sales += sum(group[4] for group in groups)
+
+            days += 1
+            day += timedelta(days=1)
+
+        db.session.commit()
+        return {'days': days, 'rows': rows, 'sales': sales}
+
+    @staticmethod
+    def _upsert_statement(rows):
+        """
+        INSERT ... ON DUPLICATE KEY UPDATE (MySQL) u
+        INSERT ... ON CONFLICT (clave) DO UPDATE (SQLite/PostgreSQL) sumando los incrementos
+        """
+        table = DailySalesSummary.__table__
+        dialect = db.engine.dialect.name
+
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.inserted
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+
+        values = {
+            'sale_count': table.c.sale_count + incoming.sale_count,
+            'total': table.c.total + incoming.total,
+            'updated_at': incoming.updated_at
+        }
+
+        if dialect == 'mysql':
+            return stmt.on_duplicate_key_update(values)
+        return stmt.on_conflict_do_update(index_elements=list(DailySalesSummary.KEY_COLUMNS), set_=values)
@@ -0,0 +1,70 @@
+"""
+Modelo DailySummary - Resumen Diario de Boletas (RC)
+Envío agrupado de boletas a SUNAT (hasta 500 líneas por resumen)
+"""
+from app import db
+from datetime import datetime
+
+
+class DailySummary(db.Model):
+    """Resumen diario de boletas enviado a SUNAT vía PSE"""
+    __tablename__ = 'daily_summaries'
+
+    id = db.Column(db.Integer, primary_key=True)
+    summary_id = db.Column(db.String(20), unique=True, nullable=False, index=True)  # RC-20261017-1
+    reference_date = db.Column(db.Date, nullable=False, index=True)  # Fecha de emisión de las boletas
+    issue_date = db.Column(db.Date, nullable=False)  # Fecha de generación del resumen
+    line_count = db.Column(db.Integer, default=0, nullable=False)
+    total = db.Column(db.Numeric(12, 2), default=0.00, nullable=False)
+
+    # Control SUNAT
+    status = db.Column(
+        db.Enum('PENDING', 'SENT', 'ACCEPTED', 'REJECTED', 'ERROR', name='daily_summary_statuses'),
+        default='PENDING',
+        nullable=False,
+        index=True
+    )
+    ticket = db.Column(db.String(50))  # Ticket de SUNAT para consultar el resultado
+    xml_path = db.Column(db.String(255))
+    cdr_path = db.Column(db.String(255))
+    sunat_response = db.Column(db.Text)
+    sent_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Relaciones
+    sales = db.relationship('Sale', backref='daily_summary', lazy='dynamic')
+
+    def __repr__(self):
+        return f'<DailySummary {self.summary_id} ({self.line_count} boletas)>'
+
+    @staticmethod
+    def next_summary_id(issue_date):
+        """
+        Siguiente identificador RC-YYYYMMDD-N para la fecha de generación
+
+        Args:
+            issue_date: Fecha de generación del resumen
+
+        Returns:
+            str: Identificador del resumen
+        """
+        prefix = f"RC-{issue_date.strftime('%Y%m%d')}-"
+        count = DailySummary.query.filter(DailySummary.summary_id.like(f'{prefix}%')).count()
+        return f"{prefix}{count + 1}"
+
+    def to_dict(self):
+        """Convertir a diccionario"""
+        return {
+            'id': self.id,
+            'summary_id': self.summary_id,
+            'reference_date': self.reference_date.isoformat(),
+            'issue_date': self.issue_date.isoformat(),
+            'line_count': self.line_count,
+            'total': float(self.total),
+            'status': self.status,
+            'ticket': self.ticket,
+            'sunat_response': self.sunat_response,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
@@ -19,6 +19,7 @@ class Product(db.Model):
     stock_quantity = db.Column(db.Integer, default=0)
     image_url = db.Column(db.String(500))  # URL de la imagen del producto
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    sync_hash = db.Column(db.String(40))  # Hash del contenido sincronizado (omite filas sin cambios)
     last_sync = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
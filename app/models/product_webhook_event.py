@@ -0,0 +1,76 @@
+"""
+Modelo ProductWebhookEvent - Cola de Webhooks de Productos
+Último evento pendiente por producto recibido desde WooCommerce
+"""
+from app import db
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+
+
+class ProductWebhookEvent(db.Model):
+    """
+    Evento de producto pendiente de aplicar
+
+    Una fila por woo_id: los eventos repetidos del mismo producto se
+    sobrescriben (coalescencia) y solo se aplica el último.
+    """
+    __tablename__ = 'product_webhook_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    woo_id = db.Column(db.Integer, unique=True, nullable=False, index=True)
+    topic = db.Column(db.String(50), nullable=False)  # 'product.updated', 'product.deleted', etc.
+    payload = db.Column(db.Text, nullable=False)  # JSON recibido de WooCommerce
+    event_count = db.Column(db.Integer, default=1, nullable=False)  # Eventos combinados en esta fila
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ProductWebhookEvent {self.topic} {self.woo_id}>'
+
+    @staticmethod
+    def enqueue(woo_id, topic, payload):
+        """
+        Encolar un evento reemplazando el pendiente del mismo producto
+
+        Args:
+            woo_id: ID del producto/variación en WooCommerce
+            topic: Tópico del webhook
+            payload: Cuerpo JSON del webhook (str)
+        """
+        values = {
+            ProductWebhookEvent.topic: topic,
+            ProductWebhookEvent.payload: payload,
+            ProductWebhookEvent.event_count: ProductWebhookEvent.event_count + 1,
+            ProductWebhookEvent.received_at: datetime.utcnow()
+        }
+
+        updated = ProductWebhookEvent.query.filter_by(woo_id=woo_id).update(values, synchronize_session=False)
+
+        if not updated:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(ProductWebhookEvent(woo_id=woo_id, topic=topic, payload=payload))
+            except IntegrityError:
+                # Otro request insertó el mismo producto en paralelo
+                ProductWebhookEvent.query.filter_by(woo_id=woo_id).update(values, synchronize_session=False)
+
+        db.session.commit()
+
+    @staticmethod
+    def acknowledge(events):
+        """
+        Eliminar eventos aplicados
+
+        Solo se eliminan si no llegó un evento más reciente del mismo producto
+        mientras se aplicaban: cada evento nuevo incrementa event_count, que
+        (a diferencia de received_at, con precisión de segundos en MySQL)
+        distingue dos eventos del mismo segundo.
+
+        Args:
+            events: Lista de (id, event_count) leídos al tomar los eventos
+        """
+        for event_id, event_count in events:
+            ProductWebhookEvent.query.filter_by(
+                id=event_id,
+                event_count=event_count
+            ).delete(synchronize_session=False)
+        db.session.commit()
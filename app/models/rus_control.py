@@ -4,6 +4,14 @@ Control mensual de límites del Régimen Único Simplificado
 """
 from app import db
 from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.exc import IntegrityError
+import threading
+import time
+
+# Copia en caché del control del mes actual (por proceso)
+_snapshot_cache = {}
+_snapshot_lock = threading.Lock()
 
 
 class RUSControl(db.Model):
@@ -28,38 +36,77 @@ class RUSControl(db.Model):
         db.UniqueConstraint('year', 'month', name='unique_year_month'),
     )
 
-    def update_total(self, amount, limit_cat1=5000.00, limit_cat2=8000.00):
+    def update_total(self, amount, limit_cat1=5000.00, limit_cat2=8000.00, commit=True):
         """
         Actualiza el total y el nivel de alerta
 
+        La actualización se hace en SQL (ver add_amount) para no perder
+        incrementos concurrentes; los atributos se recargan al accederlos.
+
         Args:
             amount: Monto a agregar
             limit_cat1: Límite categoría 1 (S/ 5,000)
             limit_cat2: Límite categoría 2 (S/ 8,000)
+            commit: Si es False, solo modifica la sesión (el llamador hace commit)
         """
-        from decimal import Decimal
-        # Asegurar que amount sea Decimal
-        if not isinstance(amount, Decimal):
-            amount = Decimal(str(amount))
+        RUSControl.add_amount(self.year, self.month, amount, limit_cat1, limit_cat2)
+        db.session.expire(self, ['total_invoiced', 'transaction_count', 'alert_level', 'is_blocked', 'updated_at'])
 
-        self.total_invoiced += amount
-        self.transaction_count += 1
+        if commit:
+            db.session.commit()
+        RUSControl.invalidate_snapshot()
 
-        # Convertir límites a Decimal para comparación segura
+    @staticmethod
+    def add_amount(year, month, amount, limit_cat1=5000.00, limit_cat2=8000.00, enforce_limit=False):
+        """
+        Sumar un monto al mes con una sola sentencia UPDATE atómica
+
+        total_invoiced, transaction_count, alert_level e is_blocked se calculan
+        en la misma sentencia a partir del valor actual de la fila, sin
+        lectura previa en Python. No hace commit.
+
+        Args:
+            year: Año del control
+            month: Mes del control
+            amount: Monto a agregar
+            limit_cat1: Límite categoría 1 (S/ 5,000)
+            limit_cat2: Límite categoría 2 (S/ 8,000)
+            enforce_limit: Si es True, no actualiza cuando se superaría limit_cat2
+
+        Returns:
+            bool: True si se actualizó la fila (False: no existe o supera el límite)
+        """
+        d_amount = Decimal(str(amount))
         d_limit_cat1 = Decimal(str(limit_cat1))
         d_limit_cat2 = Decimal(str(limit_cat2))
+        new_total = RUSControl.total_invoiced + d_amount
 
-        # Actualizar nivel de alerta
-        if self.total_invoiced >= d_limit_cat2:
-            self.alert_level = 'RED'
-            self.is_blocked = True
-        elif self.total_invoiced >= d_limit_cat1:
-            self.alert_level = 'YELLOW'
-        else:
-            self.alert_level = 'GREEN'
+        statement = db.update(RUSControl).where(
+            RUSControl.year == year,
+            RUSControl.month == month
+        )
+        if enforce_limit:
+            statement = statement.where(new_total <= d_limit_cat2)
 
-        self.updated_at = datetime.utcnow()
-        db.session.commit()
+        # alert_level e is_blocked van primero: MySQL evalúa el SET de izquierda
+        # a derecha, así todas las expresiones usan el total previo en cualquier motor
+        statement = statement.ordered_values(
+            (RUSControl.alert_level, db.case(
+                (new_total >= d_limit_cat2, 'RED'),
+                (new_total >= d_limit_cat1, 'YELLOW'),
+                else_='GREEN'
+            )),
+            (RUSControl.is_blocked, db.case(
+                (new_total >= d_limit_cat2, True),
+                else_=RUSControl.is_blocked
+            )),
+            (RUSControl.total_invoiced, new_total),
+            (RUSControl.transaction_count, RUSControl.transaction_count + 1),
+            (RUSControl.updated_at, datetime.utcnow())
+        ).execution_options(synchronize_session=False)
+
+        result = db.session.execute(statement)
+        return result.rowcount > 0
 
     def can_add_amount(self, amount, limit=8000.00):
         """Verificar si se puede agregar un monto sin superar el límite"""
@@ -101,8 +148,13 @@ class RUSControl(db.Model):
         }
 
     @staticmethod
-    def get_or_create_current():
-        """Obtener o crear el control del mes actual"""
+    def get_or_create_current(commit=True):
+        """
+        Obtener o crear el control del mes actual
+
+        Args:
+            commit: Si es False, el registro nuevo solo se agrega a la sesión
+        """
         now = datetime.utcnow()
         control = RUSControl.query.filter_by(
             year=now.year,
@@ -112,13 +164,81 @@ class RUSControl(db.Model):
         if not control:
             control = RUSControl(
                 year=now.year,
-                month=now.month
+                month=now.month,
+                total_invoiced=Decimal('0.00'),
+                transaction_count=0
             )
-            db.session.add(control)
-            db.session.commit()
+            try:
+                # Savepoint: otro proceso puede crear el mes al mismo tiempo
+                with db.session.begin_nested():
+                    db.session.add(control)
+            except IntegrityError:
+                control = RUSControl.query.filter_by(
+                    year=now.year,
+                    month=now.month
+                ).first()
+
+            if commit:
+                db.session.commit()
 
         return control
 
+    @staticmethod
+    def get_current_snapshot():
+        """
+        Obtener una copia en caché (TTL corto) del control del mes actual
+
+        La copia no está asociada a la sesión: sirve para lectura (POS,
+        dashboard, validaciones previas) sin consultar la fila en cada request.
+        El registro de ventas invalida la caché del proceso tras cada commit.
+
+        No inserta ni hace commit: si el mes aún no tiene fila devuelve una
+        copia en cero sin id, y la primera venta crea la fila dentro de su
+        propia transacción (ver get_or_create_current(commit=False)).
+
+        Returns:
+            RUSControl: Copia de solo lectura del control del mes
+        """
+        from flask import current_app
+
+        now = datetime.utcnow()
+        key = (now.year, now.month)
+        ttl = current_app.config.get('RUS_SNAPSHOT_TTL', 5)
+
+        with _snapshot_lock:
+            cached = _snapshot_cache.get('snapshot')
+            if cached and cached[0] == key and cached[1] > time.monotonic():
+                return cached[2]
+
+        control = RUSControl.query.filter_by(year=now.year, month=now.month).first()
+        if control:
+            snapshot = RUSControl(**{
+                column.name: getattr(control, column.name)
+                for column in RUSControl.__table__.columns
+            })
+        else:
+            snapshot = RUSControl(
+                year=now.year,
+                month=now.month,
+                total_invoiced=Decimal('0.00'),
+                transaction_count=0,
+                alert_level='GREEN',
+                is_blocked=False,
+                created_at=now,
+                updated_at=now
+            )
+
+        with _snapshot_lock:
+            _snapshot_cache['snapshot'] = (key, time.monotonic() + ttl, snapshot)
+
+        return snapshot
+
+    @staticmethod
+    def invalidate_snapshot():
+        """Descartar la copia en caché del control del mes"""
+        with _snapshot_lock:
+            _snapshot_cache.pop('snapshot', None)
+
     @staticmethod
     def get_month_status(year=None, month=None):
         """Obtener estado de un mes específico"""
@@ -2,7 +2,10 @@
 Modelo Sale y SaleItem - Ventas y Detalles
 Gestiona las ventas y sus items
 """
+import json
 from app import db
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.daily_product_sales import DailyProductSales
 from datetime import datetime
 
 
@@ -33,6 +36,7 @@ class Sale(db.Model):
     cdr_path = db.Column(db.String(255))
     qr_code = db.Column(db.Text)
     hash = db.Column(db.String(255))
+    daily_summary_id = db.Column(db.Integer, db.ForeignKey('daily_summaries.id'), index=True)  # Resumen diario (RC)
 
     # Estados
     sunat_status = db.Column(
@@ -41,7 +45,10 @@ class Sale(db.Model):
         nullable=False
     )
     sunat_response = db.Column(db.Text)
+    sunat_response_code = db.Column(db.String(4), index=True)  # ResponseCode del CDR (0 = aceptado)
+    sunat_notes = db.Column(db.Text)  # Observaciones del CDR (JSON: [{'code', 'message'}])
     sunat_sent_at = db.Column(db.DateTime)
+    sunat_contingency_at = db.Column(db.DateTime, index=True)  # En cola de contingencia (PSE no disponible)
 
     # Cancelación
     is_cancelled = db.Column(db.Boolean, default=False, nullable=False)
@@ -58,11 +65,21 @@ class Sale(db.Model):
     # Relaciones
     items = db.relationship('SaleItem', backref='sale', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Listado filtrado por estado, paginado por (created_at, id)
+        db.Index('ix_sales_sunat_status_created_at', 'sunat_status', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Sale {self.correlative}>'
 
-    def to_dict(self):
-        """Convertir a diccionario"""
+    def to_dict(self, items=None):
+        """
+        Convertir a diccionario
+
+        Args:
+            items: Items ya cargados (SaleBundle); por defecto se consultan
+        """
         return {
             'id': self.id,
             'correlative': self.correlative,
@@ -75,9 +92,14 @@ class Sale(db.Model):
             'sunat_status': self.sunat_status,
             'is_cancelled': self.is_cancelled,
             'created_at': self.created_at.isoformat(),
-            'items': [item.to_dict() for item in self.items]
+            'items': [item.to_dict() for item in (self.items if items is None else items)]
         }
 
+    @property
+    def sunat_notes_list(self):
+        """Observaciones del CDR como lista"""
+        return json.loads(self.sunat_notes) if self.sunat_notes else []
+
     @property
     def status_display(self):
         """Estado legible"""
@@ -89,6 +111,11 @@ class Sale(db.Model):
         }
         return status_map.get(self.sunat_status, self.sunat_status)
 
+    @property
+    def is_sendable(self):
+        """Admite envío individual: PENDING o ERROR y fuera de un resumen diario (RC)"""
+        return self.sunat_status in ('PENDING', 'ERROR') and not self.daily_summary_id
+
     def calculate_totals(self):
         """Calcular totales basado en items"""
         total = sum(item.subtotal for item in self.items)
@@ -97,8 +124,17 @@ class Sale(db.Model):
         self.subtotal = total / 1.18
         self.tax = total - self.subtotal
 
+    def set_sunat_status(self, status):
+        """Cambiar estado SUNAT moviendo la venta en el acumulado diario (sin commit)"""
+        if status != self.sunat_status:
+            DailySalesSummary.move(self, sunat_status=status)
+            self.sunat_status = status
+
     def cancel(self, reason=None):
         """Cancelar venta"""
+        if not self.is_cancelled:
+            DailySalesSummary.move(self, is_cancelled=True)
+            DailyProductSales.record_cancellation(self)
         self.is_cancelled = True
         self.cancelled_at = datetime.utcnow()
         self.cancellation_reason = reason
@@ -0,0 +1,60 @@
+"""
+Modelo SyncState - Estado de Sincronizaciones
+Marca de agua (high-water mark) de las sincronizaciones incrementales
+"""
+from app import db
+from datetime import datetime
+
+
+class SyncState(db.Model):
+    """Estado de una sincronización con un sistema externo"""
+    __tablename__ = 'sync_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)  # 'woo_products'
+    high_water_mark = db.Column(db.DateTime)  # Cambios anteriores a esta fecha (UTC) ya están aplicados
+    last_run_at = db.Column(db.DateTime)
+    last_full_sync_at = db.Column(db.DateTime)
+    details = db.Column(db.Text)  # Resumen de la última ejecución
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<SyncState {self.name} {self.high_water_mark}>'
+
+    @staticmethod
+    def get_high_water_mark(name):
+        """
+        Obtener la marca de agua de una sincronización
+
+        Args:
+            name: Nombre de la sincronización
+
+        Returns:
+            datetime: Marca de agua (UTC) o None si nunca se completó
+        """
+        state = SyncState.query.filter_by(name=name).first()
+        return state.high_water_mark if state else None
+
+    @staticmethod
+    def mark(name, high_water_mark, full=False, details=None):
+        """
+        Registrar una ejecución completada y avanzar la marca de agua
+
+        Args:
+            name: Nombre de la sincronización
+            high_water_mark: Inicio (UTC) de la ejecución completada
+            full: True si fue una sincronización completa
+            details: Resumen de la ejecución
+        """
+        state = SyncState.query.filter_by(name=name).first()
+        if not state:
+            state = SyncState(name=name)
+            db.session.add(state)
+
+        now = datetime.utcnow()
+        state.high_water_mark = high_water_mark
+        state.last_run_at = now
+        if full:
+            state.last_full_sync_at = now
+        state.details = details
+        db.session.commit()
@@ -3,11 +3,10 @@ Rutas del Dashboard
 """
 from flask import Blueprint, render_template, redirect, url_for
 from flask_login import current_user
-from app import db
 from app.utils.decorators import login_required
-from app.models.sale import Sale
+from app.models.daily_sales_summary import DailySalesSummary
 from app.models.rus_control import RUSControl
-from datetime import datetime
+from app.utils.helpers import lima_today
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 
@@ -16,18 +15,16 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 @login_required
 def index():
     """Dashboard principal"""
-    # Obtener estadísticas básicas
-    today = datetime.utcnow().date()
+    # Obtener estadísticas básicas (día de Lima, desde el acumulado diario)
+    today = lima_today()
 
-    # Total de ventas del día
-    today_sales = Sale.query.filter(
-        db.func.date(Sale.created_at) == today
-    ).filter(
-        Sale.is_cancelled == False
-    ).count()
+    # Total de ventas del día (no anuladas)
+    today_sales = sum(
+        totals['count'] for totals in DailySalesSummary.status_totals(today).values()
+    )
 
     # Control RUS del mes actual
-    rus_control = RUSControl.get_or_create_current()
+    rus_control = RUSControl.get_current_snapshot()
 
     context = {
         'today_sales': today_sales,
@@ -19,3 +19,13 @@ def health_check():
 def ping():
     """Simple ping endpoint"""
     return jsonify({'message': 'pong'})
+
+
+@health_bp.route('/health/pse', methods=['GET'])
+def pse_http_stats():
+    """Estadísticas de la sesión HTTP del PSE (proceso que atiende el request) y estado del circuito"""
+    from flask import current_app
+    from app.services.pse_http import pse_http_client
+
+    pse_http_client.configure(current_app.config)
+    return jsonify(pse_http_client.stats())
@@ -1,9 +1,9 @@
 """
 Rutas del Punto de Venta (POS)
 """
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, send_file
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, send_file, Response, stream_with_context, current_app
 from flask_login import current_user
-from app import db
+from app import db, cache
 from app.utils.decorators import login_required, role_required
 from app.models.sale import Sale, SaleItem
 from app.models.customer import Customer
@@ -12,11 +12,15 @@ from app.models.correlative import Correlative
 from app.models.rus_control import RUSControl
 from app.models.audit_log import AuditLog
 from app.services.woocommerce_service import WooCommerceService
-# from app.services.pse_service import PSEService  # Comentado temporalmente
-# from app.services.pdf_service import PDFService  # Comentado temporalmente
+from app.services.sale_service import SaleService
+from app.services.pse_service import PSEService
+from app.services.sale_events import SaleEventService
+from app.services.pdf_service import PDFService
+from app.services.sale_bundle import SaleBundle
 from app.utils.validators import is_business_ruc, validate_ruc, validate_dni
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
+import io
 import os
 
 pos_bp = Blueprint('pos', __name__, url_prefix='/pos')
@@ -28,7 +32,7 @@ pos_bp = Blueprint('pos', __name__, url_prefix='/pos')
 def index():
     """Vista principal del punto de venta"""
     # Verificar estado RUS
-    rus_control = RUSControl.get_or_create_current()
+    rus_control = RUSControl.get_current_snapshot()
 
     context = {
         'rus_control': rus_control,
@@ -111,111 +115,94 @@ def create_sale():
                     'error': 'No se puede emitir boleta a empresas (RUC 20). El RUS solo permite emitir a consumidores finales.'
                 }), 400
 
-        # Calcular totales (precio ya incluye IGV)
-        total = sum(Decimal(str(item['price'])) * Decimal(str(item['quantity'])) for item in items_data)
-        
-        # Calcular IGV (usando el total que ya lo incluye)
-        # total = subtotal + subtotal * 0.18 => total = subtotal * 1.18 => subtotal = total / 1.18
-        subtotal = (total / Decimal('1.18')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        tax = total - subtotal
+        # Resolver productos en una sola consulta y validar precio/nombre
+        sale_lines, error = _resolve_sale_lines(items_data)
+        if error:
+            return jsonify({'error': error}), 400
 
-        # Verificar límite RUS
-        rus_control = RUSControl.get_or_create_current()
+        # Registrar venta en una sola transacción
+        sale_service = SaleService()
+        result = sale_service.create_sale(
+            customer_data=customer_data,
+            sale_lines=sale_lines,
+            seller_id=current_user.id,
+            ip_address=request.remote_addr,
+            user_agent=request.user_agent.string
+        )
 
-        if not rus_control.can_add_amount(total):
-            return jsonify({
-                'error': f'Límite RUS excedido. Disponible: S/ {rus_control.remaining_amount():.2f}'
-            }), 400
+        if not result['success']:
+            return jsonify({'error': result['message']}), 400
 
-        # Buscar o crear cliente
-        customer = Customer.query.filter_by(
-            document_number=document_number
-        ).first()
-
-        if not customer:
-            customer = Customer(
-                document_type=document_type,
-                document_number=document_number,
-                name=customer_data.get('full_name'),
-                email=customer_data.get('email'),
-                phone=customer_data.get('phone'),
-                address=customer_data.get('address')
-            )
-            db.session.add(customer)
-            db.session.flush()  # Para obtener el ID
+        return jsonify({
+            'success': True,
+            'sale_id': result['sale_id'],
+            'correlative': result['correlative'],
+            'total': float(result['total']),
+            'message': result['message']
+        })
 
-        # Obtener correlativo
-        correlative_obj = Correlative.query.filter_by(
-            document_type='BOLETA',
-            is_active=True
-        ).first()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error al crear venta: {str(e)}'}), 500
 
-        if not correlative_obj:
-            return jsonify({'error': 'No hay correlativo activo para boletas'}), 400
 
-        correlative = correlative_obj.get_next_correlative()
+def _resolve_sale_lines(items_data):
+    """
+    Resolver el snapshot de productos de una venta con una sola consulta IN
 
-        # Crear venta
-        sale = Sale(
-            correlative=correlative,
-            document_type='BOLETA',
-            customer_id=customer.id,
-            seller_id=current_user.id,
-            subtotal=subtotal,
-            tax=tax,
-            total=total,
-            sunat_status='PENDING'
-        )
-        db.session.add(sale)
-        db.session.flush()
-
-        # Crear items de venta
-        for item_data in items_data:
-            # Obtener producto para guardar snapshot
-            product = Product.query.get(item_data.get('product_id'))
-
-            sale_item = SaleItem(
-                sale_id=sale.id,
-                product_id=item_data.get('product_id'),
-                product_name=item_data.get('name'),
-                product_sku=product.sku if product else 'N/A',
-                quantity=int(item_data['quantity']),
-                unit_price=float(item_data['price']),
-                subtotal=float(item_data['price']) * int(item_data['quantity'])
-            )
-            db.session.add(sale_item)
+    Valida en la misma pasada que cada producto exista y esté activo, que la
+    cantidad sea válida y que el precio enviado por el cliente coincida con el
+    precio local. El nombre y SKU se toman siempre del producto local.
 
-        # Avanzar correlativo
-        correlative_obj.advance_correlative()
+    Args:
+        items_data: Lista de items enviados por el POS
 
-        # Actualizar control RUS
-        rus_control.update_total(total)
+    Returns:
+        tuple: (lines, error) - lista de líneas resueltas o mensaje de error
+    """
+    try:
+        product_ids = {int(item['product_id']) for item in items_data}
+    except (KeyError, TypeError, ValueError):
+        return None, 'Producto inválido en el carrito'
 
-        # Commit de todas las operaciones
-        db.session.commit()
+    products = {
+        product.id: product
+        for product in Product.query.filter(Product.id.in_(product_ids)).all()
+    }
 
-        # Registrar en audit log
-        AuditLog.log_action(
-            user_id=current_user.id,
-            action='sale_created',
-            entity_type='sale',
-            entity_id=sale.id,
-            details=f'Venta {correlative} - Total: S/ {total:.2f}',
-            ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
-        )
+    lines = []
+    for item_data in items_data:
+        product = products.get(int(item_data['product_id']))
 
-        return jsonify({
-            'success': True,
-            'sale_id': sale.id,
-            'correlative': correlative,
-            'total': float(total),
-            'message': f'Venta {correlative} registrada exitosamente'
+        if not product or not product.is_active:
+            return None, f"Producto no disponible: {item_data.get('name', item_data['product_id'])}"
+
+        try:
+            quantity = int(item_data['quantity'])
+            client_price = Decimal(str(item_data['price'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            return None, f'Cantidad o precio inválido para {product.name}'
+
+        if quantity <= 0:
+            return None, f'Cantidad inválida para {product.name}'
+
+        unit_price = Decimal(str(product.price))
+        if client_price != unit_price:
+            return None, (
+                f'El precio de {product.name} cambió (S/ {unit_price:.2f}). '
+                f'Actualice el carrito e intente nuevamente.'
+            )
+
+        lines.append({
+            'product_id': product.id,
+            'name': product.name,
+            'sku': product.sku,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'subtotal': unit_price * quantity
         })
 
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': f'Error al crear venta: {str(e)}'}), 500
+    return lines, None
 
 
 # ==========================================
@@ -227,10 +214,13 @@ def create_sale():
 @role_required('admin', 'seller')
 def send_to_sunat(sale_id):
     """
-    Enviar boleta a SUNAT vía PSE
+    Encolar el envío de la boleta a SUNAT vía PSE
+
+    Responde de inmediato (202); el resultado llega por el stream SSE
+    /pos/sunat-events/<id>. Sin Celery disponible se envía en el request.
 
     Returns:
-        JSON con resultado del envío
+        JSON con la venta encolada (o resultado del envío síncrono)
     """
     try:
         sale = Sale.query.get_or_404(sale_id)
@@ -242,39 +232,31 @@ def send_to_sunat(sale_id):
                 'message': 'No tiene permisos para enviar esta boleta'
             }), 403
 
-        # Enviar a SUNAT vía PSE
-        # pse_service = PSEService()
-        # result = pse_service.send_sale_to_sunat(sale_id)
-        result = {'success': True, 'sunat_status': 'ACCEPTED', 'message': 'Simulado (Pruebas)'} # Simulado para pruebas
+        if sale.sunat_status == 'ACCEPTED':
+            return jsonify({
+                'success': True,
+                'sale_id': sale_id,
+                'sunat_status': 'ACCEPTED',
+                'message': 'La boleta ya fue aceptada por SUNAT'
+            })
 
-        if result['success']:
-            # Si fue aceptado, generar PDF automáticamente
-            if result.get('sunat_status') == 'ACCEPTED':
-                try:
-                    # pdf_service = PDFService()
-                    # pdf_path = pdf_service.generate_invoice_pdf(sale)
-                    result['pdf_url'] = '#' # url_for('pos.download_pdf', sale_id=sale_id)
-                    
-                    # Actualizar path en DB para pruebas
-                    # sale.pdf_path = pdf_path
-                    # db.session.commit()
-                except Exception as pdf_error:
-                    # No fallar si el PDF falla, solo loguear
-                    from loguru import logger
-                    logger.error(f"Error generando PDF para venta {sale_id}: {pdf_error}")
+        result = _enqueue_sunat_send(sale)
+        if result.get('in_progress'):
+            return jsonify(result), _send_status_code(result)
 
-            # Registrar en audit log
-            AuditLog.log_action(
-                user_id=current_user.id,
-                action='sunat_send',
-                entity_type='sale',
-                entity_id=sale_id,
-                details=f"Boleta {sale.correlative} enviada a SUNAT: {result.get('sunat_status')}",
-                ip_address=request.remote_addr,
-                user_agent=request.user_agent.string
-            )
+        # Registrar en audit log
+        AuditLog.log_action(
+            user_id=current_user.id,
+            action='sunat_send',
+            entity_type='sale',
+            entity_id=sale_id,
+            details=f"Boleta {sale.correlative} enviada a SUNAT: "
+                    f"{'encolada' if result.get('queued') else result.get('sunat_status')}",
+            ip_address=request.remote_addr,
+            user_agent=request.user_agent.string
+        )
 
-        return jsonify(result)
+        return jsonify(result), _send_status_code(result)
 
     except Exception as e:
         from loguru import logger
@@ -285,19 +267,61 @@ def send_to_sunat(sale_id):
         }), 500
 
 
+@pos_bp.route('/sunat-events/<int:sale_id>', methods=['GET'])
+@login_required
+def sunat_events(sale_id):
+    """
+    Stream SSE con las transiciones SUNAT de la venta
+
+    Eventos: status (PENDING→ACCEPTED/REJECTED/ERROR) y pdf (PDF listo).
+    Se cierra tras el evento final o a los SUNAT_EVENTS_STREAM_TIMEOUT
+    segundos (menos que el timeout del worker); el navegador reconecta.
+    """
+    sale = Sale.query.get_or_404(sale_id)
+
+    if sale.seller_id != current_user.id and not current_user.has_role('admin'):
+        return jsonify({
+            'success': False,
+            'message': 'No tiene permisos para ver esta boleta'
+        }), 403
+
+    def snapshot():
+        """Estado actual leído después de suscribirse"""
+        db.session.expire_all()
+        current = Sale.query.get(sale_id)
+        has_pdf = bool(current.pdf_path and os.path.exists(current.pdf_path))
+        final = current.sunat_status == 'REJECTED' or (current.sunat_status == 'ACCEPTED' and has_pdf)
+        db.session.close()  # No retener una conexión del pool mientras dure el stream
+        return 'status', {
+            'sale_id': sale_id,
+            'sunat_status': current.sunat_status,
+            'message': current.status_display,
+            'has_pdf': has_pdf,
+            'final': final
+        }
+
+    return Response(
+        stream_with_context(SaleEventService().stream(sale_id, snapshot)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Sin buffer en nginx
+        }
+    )
+
+
 @pos_bp.route('/check-sunat-status/<int:sale_id>', methods=['GET'])
 @login_required
 def check_sunat_status(sale_id):
     """
-    Verificar estado de envío a SUNAT
+    Verificar estado de envío a SUNAT (respaldo del stream SSE)
 
     Returns:
         JSON con estado actual
     """
     try:
-        # pse_service = PSEService()
-        # result = pse_service.check_sunat_status(sale_id)
-        result = {'success': True, 'sunat_status': 'ACCEPTED'} # Simulado
+        pse_service = PSEService()
+        result = pse_service.check_sunat_status(sale_id)
 
         if result.get('success'):
             return jsonify(result)
@@ -313,13 +337,80 @@ def check_sunat_status(sale_id):
         }), 500
 
 
+def _enqueue_sunat_send(sale):
+    """
+    Encolar send_sale_to_sunat_async para la venta
+
+    Mientras haya un envío en curso (bloqueo de PSEService, liberado por la
+    tarea al terminar) se rechaza un segundo envío: un doble clic sobre una
+    boleta PENDING no encola un envío duplicado. Si Celery no está
+    disponible, envía en el request como antes.
+
+    Returns:
+        dict: {'success', 'queued', 'in_progress', 'sale_id', 'sunat_status', 'events_url', 'events_max_wait', 'message'}
+    """
+    from loguru import logger
+
+    events_url = url_for('pos.sunat_events', sale_id=sale.id)
+    events_max_wait = current_app.config.get('SUNAT_EVENTS_MAX_WAIT', 120)
+    pse_service = PSEService()
+
+    try:
+        # El margen cubre la espera en la cola de Celery
+        locked = pse_service.acquire_send_lock(sale.id, margin=events_max_wait)
+    except Exception as e:
+        logger.warning(f"Caché no disponible para venta {sale.id}, enviando en el request: {e}")
+        return pse_service.send_sale_to_sunat(sale.id)
+
+    if not locked:
+        return {
+            'success': False,
+            'queued': False,
+            'in_progress': True,
+            'sale_id': sale.id,
+            'sunat_status': sale.sunat_status,
+            'events_url': events_url,
+            'events_max_wait': events_max_wait,
+            'message': 'La boleta ya se está enviando a SUNAT'
+        }
+
+    try:
+        from app.tasks.sunat_tasks import send_sale_to_sunat_async
+        task = send_sale_to_sunat_async.delay(sale.id)
+    except Exception as e:
+        logger.warning(f"No se pudo encolar venta {sale.id}, enviando en el request: {e}")
+        try:
+            return pse_service.send_sale_to_sunat(sale.id)
+        finally:
+            pse_service.release_send_lock(sale.id)
+
+    return {
+        'success': True,
+        'queued': True,
+        'sale_id': sale.id,
+        'task_id': task.id,
+        'sunat_status': sale.sunat_status,
+        'events_url': events_url,
+        'events_max_wait': events_max_wait,
+        'message': 'Boleta en cola de envío a SUNAT'
+    }
+
+
+def _send_status_code(result):
+    """202 si se encoló, 409 si ya hay un envío en curso, 200 si se envió en el request"""
+    if result.get('in_progress'):
+        return 409
+    return 202 if result.get('queued') else 200
+
+
 @pos_bp.route('/download-pdf/<int:sale_id>', methods=['GET'])
 @login_required
 def download_pdf(sale_id):
     """
     Descargar PDF de boleta
 
-    Si no existe, lo genera automáticamente (solo si está aceptado por SUNAT)
+    Si no existe, lo genera en memoria (solo si está aceptado por SUNAT),
+    lo guarda una vez y envía el mismo buffer sin releerlo del disco
     """
     try:
         sale = Sale.query.get_or_404(sale_id)
@@ -330,29 +421,29 @@ def download_pdf(sale_id):
                 'error': 'La boleta debe estar aceptada por SUNAT para descargar el PDF'
             }), 400
 
-        # Generar PDF si no existe
-        if not sale.pdf_path or not os.path.exists(sale.pdf_path):
-            from loguru import logger
-            logger.info(f"Generando PDF para venta {sale_id} (Simulado)")
+        download_name = f"Boleta_{sale.correlative}.pdf"
 
-            # pdf_service = PDFService()
-            # pdf_path = pdf_service.generate_invoice_pdf(sale)
-            # sale.pdf_path = pdf_path
-            # db.session.commit()
-            return jsonify({'error': 'PDF no disponible en modo prueba'}), 404
+        # Enviar archivo ya generado
+        if sale.pdf_path and os.path.exists(sale.pdf_path):
+            return send_file(
+                sale.pdf_path,
+                mimetype='application/pdf',
+                as_attachment=True,
+                download_name=download_name
+            )
 
-        # Verificar que el archivo existe
-        if not os.path.exists(sale.pdf_path):
-            return jsonify({
-                'error': 'PDF no encontrado'
-            }), 404
+        # Generar PDF en memoria, guardarlo y enviar el mismo buffer
+        bundle = SaleBundle.load(sale.id)
+        pdf_service = PDFService()
+        content = pdf_service.render_invoice_pdf(bundle)
+        pdf_service.save_pdf(bundle, content)
+        db.session.commit()
 
-        # Enviar archivo
         return send_file(
-            sale.pdf_path,
+            io.BytesIO(content),
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f"Boleta_{sale.correlative}.pdf"
+            download_name=download_name
         )
 
     except Exception as e:
@@ -389,9 +480,13 @@ def resend_to_sunat(sale_id):
                 'message': f'No se puede reenviar boletas con estado {sale.sunat_status}'
             }), 400
 
-        # Reenviar
-        pse_service = PSEService()
-        result = pse_service.resend_to_sunat(sale_id)
+        # Resetear estado a PENDING y reenviar en segundo plano
+        sale.set_sunat_status('PENDING')
+        sale.sunat_response = None
+        sale.sunat_sent_at = None
+        db.session.commit()
+
+        result = _enqueue_sunat_send(sale)
 
         if result['success']:
             # Registrar en audit log
@@ -400,12 +495,13 @@ def resend_to_sunat(sale_id):
                 action='sunat_resend',
                 entity_type='sale',
                 entity_id=sale_id,
-                details=f"Boleta {sale.correlative} reenviada a SUNAT: {result.get('sunat_status')}",
+                details=f"Boleta {sale.correlative} reenviada a SUNAT: "
+                        f"{'encolada' if result.get('queued') else result.get('sunat_status')}",
                 ip_address=request.remote_addr,
                 user_agent=request.user_agent.string
             )
 
-        return jsonify(result)
+        return jsonify(result), _send_status_code(result)
 
     except Exception as e:
         from loguru import logger
@@ -1 +1,88 @@
-from flask import Blueprint; reports_bp = Blueprint('reports', __name__)
+"""
+Rutas de Reportes
+"""
+from datetime import date, datetime
+from flask import Blueprint, render_template, request, jsonify, flash
+from app.utils.decorators import role_required
+from app.services.report_engine import ReportService
+from app.utils.helpers import lima_today
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+# Rango máximo de un reporte (más el periodo anterior que se compara)
+MAX_REPORT_DAYS = 731
+
+
+def _period_from_request():
+    """
+    Periodo pedido: ?period=month&month=YYYY-MM, ?period=year&year=YYYY
+    o ?period=custom&from=YYYY-MM-DD&to=YYYY-MM-DD (default: mes actual)
+
+    Returns:
+        tuple: (start_date, end_date)
+
+    Raises:
+        ValueError: Si las fechas no son válidas o el rango es muy largo
+    """
+    period = request.args.get('period', 'month')
+    today = lima_today()
+
+    if period == 'year':
+        year = request.args.get('year', today.year, type=int)
+        start, end = date(year, 1, 1), date(year, 12, 31)
+    elif period == 'custom':
+        start = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    else:
+        month = request.args.get('month')
+        first = datetime.strptime(month, '%Y-%m').date() if month else today.replace(day=1)
+        start, end = ReportService.month_period(first.year, first.month)
+
+    if end < start:
+        raise ValueError('La fecha final debe ser igual o posterior a la inicial')
+    if (end - start).days + 1 > MAX_REPORT_DAYS:
+        raise ValueError(f'El periodo no puede superar {MAX_REPORT_DAYS} días')
+    return start, end
+
+
+@reports_bp.route('/')
+@role_required('admin', 'viewer')
+def index():
+    """Reportes del periodo comparados con el periodo anterior"""
+    try:
+        start, end = _period_from_request()
+    except ValueError as e:
+        flash(f'Periodo inválido: {e}', 'warning')
+        start, end = ReportService.month_period(lima_today().year, lima_today().month)
+
+    service = ReportService(start, end)
+    top_limit = min(request.args.get('limit', 20, type=int), 100)
+
+    return render_template(
+        'reports/index.html',
+        reports=service.run_all(top_limit=top_limit),
+        start=start,
+        end=end,
+        period=request.args.get('period', 'month')
+    )
+
+
+@reports_bp.route('/api/<name>')
+@role_required('admin', 'viewer')
+def api_report(name):
+    """Un reporte en JSON (mismos parámetros de periodo que index)"""
+    try:
+        start, end = _period_from_request()
+        service = ReportService(start, end)
+
+        options = {}
+        if name == 'top_products':
+            options['limit'] = min(request.args.get('limit', 20, type=int), 100)
+
+        return jsonify({'success': True, **service.run(name, **options)})
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
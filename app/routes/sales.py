@@ -1,54 +1,110 @@
 """
 Rutas para la gestión y consulta de Ventas
 """
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, abort, current_app
 from flask_login import current_user
-from app import db
+from app import db, cache
 from app.utils.decorators import login_required, role_required
+from app.utils.helpers import keyset_paginate
 from app.models.sale import Sale
 from app.models.customer import Customer
+from app.models.daily_sales_summary import DailySalesSummary
+from app.services.sale_bundle import SaleBundle
 from datetime import datetime
+import re
 
 sales_bp = Blueprint('sales', __name__, url_prefix='/sales')
 
+SALES_PER_PAGE = 15
+
+# Serie + número, con o sin ceros a la izquierda: B001-1234, b001-00001234
+CORRELATIVE_SEARCH = re.compile(r'^([A-Za-z]\w{3})-(\d{1,8})$')
+
 
 @sales_bp.route('/')
 @login_required
 def index():
-    """Listado de ventas"""
-    page = request.args.get('page', 1, type=int)
+    """Listado de ventas (paginación por cursor sobre created_at, id)"""
     search = request.args.get('search', '').strip()
     status = request.args.get('status', '')
-    
-    query = Sale.query
+
+    query = Sale.query.options(db.joinedload(Sale.customer))
 
     # Búsqueda por correlativo o cliente
     if search:
-        query = query.join(Customer).filter(
-            db.or_(
-                Sale.correlative.ilike(f"%{search}%"),
-                Customer.name.ilike(f"%{search}%"),
-                Customer.document_number.like(f"%{search}%")
-            )
-        )
+        query = _search_filter(query, search)
 
     # Filtro por estado SUNAT
     if status:
         query = query.filter(Sale.sunat_status == status)
 
-    # Ordenar por fecha descendente
-    query = query.order_by(Sale.created_at.desc())
+    page = keyset_paginate(
+        query, Sale.created_at, Sale.id,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=SALES_PER_PAGE
+    )
+
+    return render_template(
+        'sales/index.html',
+        sales=page['items'],
+        next_cursor=page['next_cursor'],
+        prev_cursor=page['prev_cursor'],
+        # Con búsqueda de texto no hay total barato: se omite
+        approximate_total=None if search else _approximate_total(status)
+    )
+
+
+def _search_filter(query, search):
+    """
+    Filtro de búsqueda del listado
+
+    Un correlativo completo (B001-1234 o B001-00001234) o un DNI/RUC
+    completo se buscan por igualdad sobre sus índices únicos; cualquier
+    otro texto cae en la búsqueda parcial (LIKE sobre ventas y clientes).
+    """
+    match = CORRELATIVE_SEARCH.match(search)
+    if match:
+        series, number = match.groups()
+        return query.filter(Sale.correlative == f"{series.upper()}-{number.zfill(8)}")
+
+    if search.isdigit() and len(search) in (8, 11):
+        customer = Customer.query.filter_by(document_number=search).first()
+        if customer:
+            return query.filter(Sale.customer_id == customer.id)
+
+    return query.join(Customer).filter(
+        db.or_(
+            Sale.correlative.ilike(f"%{search}%"),
+            Customer.name.ilike(f"%{search}%"),
+            Customer.document_number.like(f"%{search}%")
+        )
+    )
+
 
-    # Paginación
-    pagination = query.paginate(page=page, per_page=15, error_out=False)
-    sales = pagination.items
+def _approximate_total(status=''):
+    """
+    Total aproximado de ventas desde el acumulado diario (cacheado)
 
-    return render_template('sales/index.html', sales=sales, pagination=pagination)
+    Evita el COUNT(*) sobre sales en cada página; puede diferir unos
+    segundos del listado (SALES_COUNT_CACHE_TIMEOUT).
+    """
+    cache_key = f'sales:approximate_total:{status}'
+    total = cache.get(cache_key)
+    if total is None:
+        query = db.session.query(db.func.sum(DailySalesSummary.sale_count))
+        if status:
+            query = query.filter(DailySalesSummary.sunat_status == status)
+        total = int(query.scalar() or 0)
+        cache.set(cache_key, total, timeout=current_app.config.get('SALES_COUNT_CACHE_TIMEOUT', 60))
+    return total
 
 
 @sales_bp.route('/<int:sale_id>')
 @login_required
 def detail(sale_id):
     """Ver detalle de una venta"""
-    sale = Sale.query.get_or_404(sale_id)
-    return render_template('sales/detail.html', sale=sale)
+    bundle = SaleBundle.load(sale_id)
+    if bundle is None:
+        abort(404)
+    return render_template('sales/detail.html', sale=bundle)
@@ -0,0 +1,43 @@
+"""
+Rutas de Webhooks
+Eventos entrantes de WooCommerce (sin sesión, autenticados por firma)
+"""
+from flask import Blueprint, request, jsonify
+from loguru import logger
+from app.services.product_webhook_service import ProductWebhookService
+
+webhooks_bp = Blueprint('webhooks', __name__, url_prefix='/webhooks')
+
+
+@webhooks_bp.route('/woocommerce/products', methods=['POST'])
+def woocommerce_products():
+    """
+    Recibir webhooks product.created/updated/deleted/restored
+
+    Solo verifica la firma y encola el evento; responde de inmediato para
+    no exceder el timeout de entrega de WooCommerce.
+    """
+    topic = request.headers.get('X-WC-Webhook-Topic')
+
+    # Ping de WooCommerce al crear el webhook (webhook_id=N, sin tópico)
+    if not topic:
+        return jsonify({'success': True, 'message': 'pong'}), 200
+
+    service = ProductWebhookService()
+
+    if not service.verify_signature(request.get_data(), request.headers.get('X-WC-Webhook-Signature')):
+        logger.warning(f"Webhook WooCommerce con firma inválida desde {request.remote_addr} ({topic})")
+        return jsonify({'success': False, 'message': 'Firma inválida'}), 401
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'success': False, 'message': 'Cuerpo JSON inválido'}), 400
+
+    try:
+        result = service.enqueue(topic, payload)
+    except Exception as e:
+        logger.error(f"Error encolando webhook {topic}: {str(e)}")
+        return jsonify({'success': False, 'message': 'Error interno'}), 500
+
+    # Tópicos no soportados se aceptan para que WooCommerce no desactive el webhook
+    return jsonify(result), 200 if result['success'] or topic not in service.TOPICS else 400
@@ -0,0 +1,131 @@
+"""
+Procesamiento de CDR (Constancia de Recepción) de SUNAT
+Lectura del ZIP y del ApplicationResponse en memoria, sin archivos temporales
+"""
+import io
+import zipfile
+from lxml import etree
+
+
+class CDRProcessor:
+    """
+    Lector de CDR en memoria
+
+    El CDR es un ZIP con un único R-*.xml (ApplicationResponse UBL 2.0):
+    - cac:DocumentResponse/cac:Response/cbc:ResponseCode: 0 = aceptado,
+      2000-3999 = rechazado, 4000+ = aceptado con observaciones,
+      0100-1999 = excepción (el comprobante debe reenviarse)
+    - cac:DocumentResponse/cac:Response/cbc:Description
+    - cbc:Note: observaciones ("4252 - texto")
+
+    Los códigos del CDR son los oficiales de SUNAT, distintos de los
+    códigos resumidos que retorna el PSE en el JSON (PSEService.SUNAT_CODES).
+    """
+
+    CAC = 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2'
+    CBC = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+
+    # Sin entidades externas ni red: el CDR llega de un tercero
+    _PARSER = etree.XMLParser(resolve_entities=False, no_network=True, remove_blank_text=True)
+
+    def parse(self, content: bytes) -> dict:
+        """
+        Leer un CDR (ZIP o XML) desde memoria
+
+        Args:
+            content: Bytes del ZIP del CDR (o del XML ya descomprimido)
+
+        Returns:
+            dict: {
+                'response_code': str,
+                'description': str,
+                'reference_id': str,
+                'notes': list[{'code': str, 'message': str}],
+                'status': str,
+                'response_date': str
+            }
+
+        Raises:
+            ValueError: Si el contenido no es un CDR legible
+        """
+        xml_content = self._extract_xml(content)
+
+        try:
+            root = etree.fromstring(xml_content, self._PARSER)
+        except etree.XMLSyntaxError as e:
+            raise ValueError(f"CDR con XML inválido: {e}")
+
+        response = root.find(f'{{{self.CAC}}}DocumentResponse/{{{self.CAC}}}Response')
+        if response is None:
+            raise ValueError("CDR sin cac:DocumentResponse/cac:Response")
+
+        response_code = (response.findtext(f'{{{self.CBC}}}ResponseCode') or '').strip()
+        if not response_code.isdigit():
+            raise ValueError(f"CDR con ResponseCode inválido: {response_code!r}")
+
+        notes = [self._parse_note(note.text) for note in root.iterfind(f'{{{self.CBC}}}Note') if note.text]
+
+        return {
+            'response_code': response_code,
+            'description': (response.findtext(f'{{{self.CBC}}}Description') or '').strip(),
+            'reference_id': (response.findtext(f'{{{self.CBC}}}ReferenceID') or '').strip(),
+            'notes': notes,
+            'status': self.status_for(response_code),
+            'response_date': root.findtext(f'{{{self.CBC}}}ResponseDate')
+        }
+
+    @staticmethod
+    def status_for(response_code: str) -> str:
+        """
+        Estado de la venta según el ResponseCode del CDR
+
+        Args:
+            response_code: Código del CDR
+
+        Returns:
+            str: ACCEPTED, REJECTED o ERROR
+        """
+        code = int(response_code)
+        if code == 0 or code >= 4000:
+            return 'ACCEPTED'
+        if 2000 <= code < 4000:
+            return 'REJECTED'
+        return 'ERROR'
+
+    @staticmethod
+    def format_response(cdr: dict) -> str:
+        """Texto de sunat_response a partir del CDR leído"""
+        message = cdr['description'] or 'Sin descripción'
+        if cdr['notes']:
+            message += f" ({len(cdr['notes'])} observaciones)"
+        return f"{cdr['response_code']}: {message}"
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    @staticmethod
+    def _extract_xml(content):
+        """XML del ApplicationResponse (el ZIP se abre en memoria)"""
+        if not content:
+            raise ValueError("CDR vacío")
+
+        if content.lstrip()[:1] == b'<':
+            return content
+
+        try:
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                names = [name for name in archive.namelist() if name.lower().endswith('.xml')]
+                if not names:
+                    raise ValueError("CDR sin XML de respuesta")
+                return archive.read(names[0])
+        except zipfile.BadZipFile:
+            raise ValueError("El contenido no es un ZIP de CDR")
+
+    @staticmethod
+    def _parse_note(text):
+        """Observación "4252 - texto" -> {'code', 'message'}"""
+        code, separator, message = text.strip().partition(' - ')
+        if separator and code.isdigit():
+            return {'code': code, 'message': message.strip()}
+        return {'code': None, 'message': text.strip()}
@@ -0,0 +1,138 @@
+"""
+Asignación de correlativos sin contención
+Reserva opcional de bloques de números por proceso (workers de gunicorn)
+"""
+import atexit
+import os
+import socket
+import threading
+from loguru import logger
+
+from app.models.correlative import Correlative, CorrelativeLease
+
+
+class CorrelativeAllocator:
+    """
+    Asignador de correlativos por proceso
+
+    Modos:
+    - block_size <= 1: UPDATE atómico con bloqueo de fila dentro de la
+      transacción de la venta. Numeración estrictamente secuencial.
+    - block_size > 1: cada proceso reserva un bloque de números con un UPDATE
+      atómico y los entrega localmente sin tocar la fila. Los números pueden
+      no seguir el orden cronológico entre cajas y los no usados al terminar
+      el proceso quedan registrados en correlative_leases.
+    """
+
+    def __init__(self, block_size=1):
+        """
+        Args:
+            block_size: Tamaño del bloque reservado por proceso (1 = sin bloques)
+        """
+        self.block_size = block_size
+        self._pid = os.getpid()
+        self.worker = f"{socket.gethostname()}:{self._pid}"
+        self._lock = threading.Lock()
+        self._leases = {}    # document_type -> [lease, next_number]
+        self._returned = {}  # document_type -> números devueltos por ventas fallidas
+        self._atexit_registered = False
+
+    def allocate(self, document_type='BOLETA'):
+        """
+        Obtener el siguiente correlativo
+
+        Args:
+            document_type: Tipo de documento
+
+        Returns:
+            str: Correlativo (B001-00000002) o None si no hay serie activa
+        """
+        if self.block_size <= 1:
+            return Correlative.allocate_next(document_type)
+
+        with self._lock:
+            # Tras un fork (gunicorn --preload) el bloque pertenece al proceso padre
+            if os.getpid() != self._pid:
+                self._reset_after_fork()
+
+            returned = self._returned.get(document_type)
+            if returned:
+                return returned.pop(0)
+
+            current = self._leases.get(document_type)
+            if current is None or current[1] > current[0].end_number:
+                if current is not None:
+                    CorrelativeLease.release(current[0].id, current[0].end_number)
+
+                lease = Correlative.lease_block(document_type, self.block_size, self.worker)
+                if lease is None:
+                    return None
+
+                current = [lease, lease.start_number]
+                self._leases[document_type] = current
+                self._register_atexit()
+                logger.info(
+                    f"Bloque de correlativos reservado por {self.worker}: "
+                    f"{lease.series} {lease.start_number}-{lease.end_number}"
+                )
+
+            lease, number = current
+            current[1] += 1
+            return f"{lease.series}-{str(number).zfill(8)}"
+
+    def release(self, correlative, document_type='BOLETA'):
+        """
+        Devolver un correlativo no usado (la venta hizo rollback)
+
+        En modo bloque el número se reutiliza en la siguiente venta del proceso.
+        En modo bloqueo de fila el rollback ya revierte el contador.
+
+        Args:
+            correlative: Correlativo asignado y no usado
+            document_type: Tipo de documento
+        """
+        if self.block_size <= 1 or not correlative:
+            return
+
+        with self._lock:
+            returned = self._returned.setdefault(document_type, [])
+            returned.append(correlative)
+            returned.sort()
+
+    def release_all(self):
+        """Registrar en BD los bloques abiertos al terminar el proceso"""
+        with self._lock:
+            for lease, next_number in self._leases.values():
+                last_used = next_number - 1 if next_number > lease.start_number else None
+                try:
+                    CorrelativeLease.release(lease.id, last_used)
+                except Exception as e:
+                    logger.error(f"Error liberando bloque de correlativos {lease.id}: {e}")
+            self._leases = {}
+
+    def _reset_after_fork(self):
+        """Descartar el estado heredado del proceso padre (requiere lock)"""
+        self._pid = os.getpid()
+        self.worker = f"{socket.gethostname()}:{self._pid}"
+        self._leases = {}
+        self._returned = {}
+        self._atexit_registered = False
+
+    def _register_atexit(self):
+        """Registrar liberación de bloques al salir (requiere app context activo)"""
+        if self._atexit_registered:
+            return
+
+        from flask import current_app
+        app = current_app._get_current_object()
+
+        def _release():
+            with app.app_context():
+                self.release_all()
+
+        atexit.register(_release)
+        self._atexit_registered = True
+
+
+# Instancia única por proceso
+correlative_allocator = CorrelativeAllocator()
@@ -0,0 +1,171 @@
+"""
+Generación masiva de PDF de boletas
+Lotes repartidos en un pool de procesos (ReportLab es CPU-bound y no libera el GIL)
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import current_app
+from loguru import logger
+
+from app import db
+from app.models.sale import Sale
+from app.services.pdf_service import PDFService
+from app.services.sale_bundle import SaleBundle
+from app.utils.helpers import lima_day_bounds
+
+
+def _init_pool_worker():
+    """
+    Inicializar un proceso del pool
+
+    Usa la app del proceso (get_worker_app descarta las conexiones heredadas
+    del padre) y deja su contexto activo para todos los lotes del proceso.
+    """
+    from app.tasks.worker_app import get_worker_app
+    get_worker_app().app_context().push()
+
+
+def _render_chunk_in_pool(sale_ids):
+    """Renderizar un lote dentro de un proceso del pool"""
+    try:
+        return PDFBatchService().render_chunk(sale_ids)
+    finally:
+        db.session.remove()
+
+
+class PDFBatchService:
+    """
+    Generación de PDF por lotes (reimpresión mensual, regeneración masiva)
+
+    Cada lote se carga con SaleBundle.load_many (dos consultas para todo
+    el lote) y se renderiza en memoria con un mismo PDFService (estilos
+    construidos una vez por proceso). Los lotes se reparten entre
+    PDF_BATCH_WORKERS procesos; con un solo worker se renderiza en el
+    proceso actual.
+
+    Dentro de un worker de Celery (procesos daemon, sin hijos) el reparto
+    lo hace la tarea generate_pdfs_bulk: un generate_pdf_chunk por lote.
+    """
+
+    def __init__(self):
+        """Inicializar servicio con configuración de lotes"""
+        self.chunk_size = current_app.config.get('PDF_BATCH_CHUNK_SIZE', 50)
+        self.workers = current_app.config.get('PDF_BATCH_WORKERS') or os.cpu_count() or 1
+        self.pdf_service = PDFService()
+
+    def select_sale_ids(self, date_from=None, date_to=None, sale_ids=None) -> list[int]:
+        """
+        IDs de las ventas a imprimir (aceptadas por SUNAT y no anuladas)
+
+        Args:
+            date_from: Primer día (hora de Lima)
+            date_to: Último día, inclusive (default: date_from)
+            sale_ids: Lista explícita de IDs (se filtra igual por estado)
+
+        Returns:
+            list[int]: IDs ordenados
+        """
+        query = db.session.query(Sale.id).filter(
+            Sale.sunat_status == 'ACCEPTED',
+            Sale.is_cancelled == False
+        )
+
+        if sale_ids:
+            query = query.filter(Sale.id.in_(sale_ids))
+        if date_from:
+            start, _ = lima_day_bounds(date_from)
+            _, end = lima_day_bounds(date_to or date_from)
+            query = query.filter(Sale.created_at >= start, Sale.created_at < end)
+
+        return [sale_id for sale_id, in query.order_by(Sale.id)]
+
+    def chunks(self, sale_ids) -> list[list[int]]:
+        """Dividir los IDs en lotes de PDF_BATCH_CHUNK_SIZE"""
+        return [sale_ids[i:i + self.chunk_size] for i in range(0, len(sale_ids), self.chunk_size)]
+
+    def generate(self, sale_ids, workers=None) -> dict:
+        """
+        Generar y guardar los PDF de las ventas indicadas
+
+        Args:
+            sale_ids: IDs de las ventas
+            workers: Procesos del pool (default: PDF_BATCH_WORKERS o núcleos)
+
+        Returns:
+            dict: {
+                'total': int,
+                'rendered': int,
+                'errors': {sale_id: str},
+                'workers': int,
+                'elapsed_ms': float,
+                'pdfs_per_second': float,
+                'pdfs_per_second_per_core': float
+            }
+        """
+        started = time.perf_counter()
+        chunks = self.chunks(list(sale_ids))
+        workers = max(1, min(workers or self.workers, len(chunks) or 1))
+
+        results = []
+        if workers == 1:
+            results = [self.render_chunk(chunk) for chunk in chunks]
+        else:
+            # Los hijos abren sus propias conexiones: no heredar la sesión en curso
+            db.session.close()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker) as pool:
+                futures = [pool.submit(_render_chunk_in_pool, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    results.append(future.result())
+
+        elapsed = time.perf_counter() - started
+        rendered = sum(result['rendered'] for result in results)
+        errors = {}
+        for result in results:
+            errors.update(result['errors'])
+
+        per_second = rendered / elapsed if elapsed else 0.0
+        result = {
+            'total': sum(len(chunk) for chunk in chunks),
+            'rendered': rendered,
+            'errors': errors,
+            'workers': workers,
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'pdfs_per_second': round(per_second, 1),
+            'pdfs_per_second_per_core': round(per_second / workers, 1)
+        }
+
+        logger.info(
+            f"PDF masivos: {rendered}/{result['total']} en {elapsed:.1f}s con {workers} procesos "
+            f"({result['pdfs_per_second']} PDF/s, {result['pdfs_per_second_per_core']} PDF/s por núcleo)"
+        )
+        return result
+
+    def render_chunk(self, sale_ids) -> dict:
+        """
+        Renderizar y guardar los PDF de un lote (en el proceso actual)
+
+        Args:
+            sale_ids: IDs de las ventas del lote
+
+        Returns:
+            dict: {'rendered': int, 'errors': {sale_id: str}, 'elapsed_ms': float}
+        """
+        started = time.perf_counter()
+
+        rendered = 0
+        errors = {}
+        for bundle in SaleBundle.load_many(sale_ids):
+            try:
+                self.pdf_service.save_pdf(bundle, self.pdf_service.render_invoice_pdf(bundle))
+                rendered += 1
+            except Exception as e:
+                errors[bundle.id] = str(e)
+
+        db.session.commit()
+
+        return {
+            'rendered': rendered,
+            'errors': errors,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
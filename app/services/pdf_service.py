@@ -1,7 +1,8 @@
 """
 Servicio de generación de PDF para boletas electrónicas
-Genera PDFs con formato oficial SUNAT incluyendo QR code
+Genera PDFs con formato oficial SUNAT incluyendo QR code (todo en memoria)
 """
+import io
 import os
 import qrcode
 from decimal import Decimal
@@ -15,6 +16,34 @@ from reportlab.lib import colors
 from reportlab.pdfgen import canvas as pdf_canvas
 from reportlab.platypus import Table, TableStyle
 
+from app.services.sale_bundle import SaleBundle
+
+
+# Estilo de la tabla de items: igual para todas las boletas, se construye una vez por proceso
+_ITEMS_TABLE_STYLE = TableStyle([
+    # Encabezado
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+
+    # Contenido
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # Item centrado
+    ('ALIGN', (2, 1), (2, -1), 'CENTER'),  # Cantidad centrada
+    ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),  # Precios a la derecha
+
+    # Bordes
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+    # Padding
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
 
 class PDFService:
     """
@@ -43,34 +72,42 @@ class PDFService:
         self.company_ruc = current_app.config.get('COMPANY_RUC')
         self.company_name = current_app.config.get('COMPANY_NAME')
         self.company_address = current_app.config.get('COMPANY_ADDRESS')
+        self.local_signing = current_app.config.get('XML_SIGNING_ENABLED', False)
 
     def generate_invoice_pdf(self, sale) -> str:
         """
-        Generar PDF completo de boleta
+        Generar PDF completo de boleta y guardarlo en storage/pdf/
 
         Args:
-            sale: Objeto Sale con todos los datos
+            sale: Objeto Sale o SaleBundle con todos los datos
 
         Returns:
             str: Ruta del PDF generado
         """
-        try:
-            logger.info(f"Generando PDF para boleta {sale.correlative}")
+        return self.save_pdf(sale, self.render_invoice_pdf(sale))
 
-            # Crear directorio si no existe
-            pdf_dir = current_app.config.get('PDF_PATH')
-            os.makedirs(pdf_dir, exist_ok=True)
+    def render_invoice_pdf(self, sale) -> bytes:
+        """
+        Generar PDF completo de boleta en memoria
 
-            # Nombre del archivo
-            filename = f"{self.company_ruc}-03-{sale.correlative}.pdf"
-            file_path = os.path.join(pdf_dir, filename)
+        El QR se dibuja como rectángulos vectoriales sobre el canvas: no se
+        escribe ni se lee ningún PNG.
+
+        Args:
+            sale: Objeto Sale o SaleBundle (sin consultas por relación)
 
-            # Crear canvas
-            c = pdf_canvas.Canvas(file_path, pagesize=letter)
+        Returns:
+            bytes: Contenido del PDF
+        """
+        try:
+            logger.info(f"Generando PDF para boleta {sale.correlative}")
+
+            buffer = io.BytesIO()
+            c = pdf_canvas.Canvas(buffer, pagesize=letter)
             width, height = letter
 
             # Generar QR code primero
-            qr_path = self._generate_qr_code(sale)
+            qr_matrix = self._generate_qr_code(sale)
 
             # Dibujar contenido
             y_position = height - 2 * cm
@@ -79,39 +116,56 @@ class PDFService:
             y_position = self._draw_customer_info(c, y_position, sale)
             y_position = self._draw_items_table(c, y_position, sale, width)
             y_position = self._draw_totals(c, y_position, sale, width)
-            self._draw_footer(c, y_position, sale, qr_path, width)
+            self._draw_footer(c, y_position, sale, qr_matrix, width)
 
-            # Guardar PDF
             c.save()
-
-            # Actualizar ruta en sale
-            sale.pdf_path = file_path
-
-            logger.info(f"PDF generado exitosamente: {filename}")
-            return file_path
+            return buffer.getvalue()
 
         except Exception as e:
             logger.error(f"Error generando PDF para venta {sale.id}: {e}")
             raise
 
-    def _generate_qr_code(self, sale) -> str:
+    def save_pdf(self, sale, content: bytes) -> str:
+        """
+        Guardar un PDF ya generado (una sola escritura) y actualizar sale.pdf_path
+
+        Args:
+            sale: Objeto Sale o SaleBundle
+            content: PDF generado con render_invoice_pdf
+
+        Returns:
+            str: Ruta del PDF guardado
+        """
+        pdf_dir = current_app.config.get('PDF_PATH')
+        os.makedirs(pdf_dir, exist_ok=True)
+
+        filename = f"{self.company_ruc}-03-{sale.correlative}.pdf"
+        file_path = os.path.join(pdf_dir, filename)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+
+        self._record(sale).pdf_path = file_path
+
+        logger.info(f"PDF generado exitosamente: {filename}")
+        return file_path
+
+    def _generate_qr_code(self, sale) -> list:
         """
         Generar QR code con formato SUNAT
 
         Formato:
-        RUC|TIPO_DOC|SERIE|NUMERO|IGV|TOTAL|FECHA|TIPO_DOC_CLI|NUM_DOC_CLI
+        RUC|TIPO_DOC|SERIE|NUMERO|IGV|TOTAL|FECHA|TIPO_DOC_CLI|NUM_DOC_CLI[|VALOR_RESUMEN]
+
+        El valor resumen (DigestValue de la firma) se agrega cuando la boleta
+        se firma localmente y Sale.hash lo contiene.
 
         Args:
             sale: Objeto Sale
 
         Returns:
-            str: Ruta del QR generado
+            list: Matriz de módulos del QR (True = oscuro), con zona de silencio
         """
         try:
-            # Crear directorio para QR
-            qr_dir = os.path.join(current_app.config.get('PDF_PATH'), 'qr')
-            os.makedirs(qr_dir, exist_ok=True)
-
             # Extraer serie y número del correlativo
             parts = sale.correlative.split('-')
             serie = parts[0] if len(parts) > 0 else 'B001'
@@ -135,6 +189,8 @@ class PDFService:
                 f"{doc_type_code}|"
                 f"{sale.customer.document_number or '-'}"
             )
+            if self.local_signing and sale.hash:
+                qr_data += f"|{sale.hash}"
 
             # Generar QR
             qr = qrcode.QRCode(
@@ -146,24 +202,20 @@ class PDFService:
             qr.add_data(qr_data)
             qr.make(fit=True)
 
-            # Crear imagen
-            img = qr.make_image(fill_color="black", back_color="white")
-
-            # Guardar
-            qr_filename = f"QR-{sale.correlative}.png"
-            qr_path = os.path.join(qr_dir, qr_filename)
-            img.save(qr_path)
-
             # Guardar datos del QR en la venta
-            sale.qr_code = qr_data
+            self._record(sale).qr_code = qr_data
 
-            logger.info(f"QR code generado: {qr_filename}")
-            return qr_path
+            return qr.get_matrix()
 
         except Exception as e:
             logger.error(f"Error generando QR code: {e}")
             raise
 
+    @staticmethod
+    def _record(sale):
+        """Venta (modelo) donde se guardan qr_code y pdf_path"""
+        return sale.sale if isinstance(sale, SaleBundle) else sale
+
     def _draw_header(self, c, y_pos, width) -> float:
         """
         Dibujar encabezado con datos de empresa
@@ -274,39 +326,16 @@ class PDFService:
         for index, item in enumerate(sale.items, start=1):
             data.append([
                 str(index),
-                item.product.name[:40],  # Limitar longitud
+                item.product_name[:40],  # Limitar longitud
                 str(int(item.quantity)),
-                f"S/ {float(item.price):.2f}",
-                f"S/ {float(item.quantity * item.price):.2f}"
+                f"S/ {float(item.unit_price):.2f}",
+                f"S/ {float(item.subtotal):.2f}"
             ])
 
         # Crear tabla
         table = Table(data, colWidths=[1.5 * cm, 9 * cm, 2 * cm, 3 * cm, 3 * cm])
 
-        # Estilo de tabla
-        table.setStyle(TableStyle([
-            # Encabezado
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-
-            # Contenido
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # Item centrado
-            ('ALIGN', (2, 1), (2, -1), 'CENTER'),  # Cantidad centrada
-            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),  # Precios a la derecha
-
-            # Bordes
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-
-            # Padding
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        table.setStyle(_ITEMS_TABLE_STYLE)
 
         # Calcular altura de tabla
         table_width, table_height = table.wrap(width, y_pos)
@@ -354,7 +383,38 @@ class PDFService:
 
         return y_pos - 1 * cm
 
-    def _draw_footer(self, c, y_pos, sale, qr_path, width):
+    def _draw_qr(self, c, matrix, x, y, size):
+        """
+        Dibujar la matriz del QR como rectángulos vectoriales
+
+        Cada tramo horizontal de módulos oscuros es un solo rectángulo, y
+        todos van en un único path (nítido a cualquier resolución de impresión).
+
+        Args:
+            c: Canvas
+            matrix: Matriz de módulos (qrcode.QRCode.get_matrix)
+            x, y: Esquina inferior izquierda
+            size: Lado del QR (incluida la zona de silencio)
+        """
+        module = size / len(matrix)
+        path = c.beginPath()
+
+        for row_index, row in enumerate(matrix):
+            row_y = y + size - (row_index + 1) * module
+            start = None
+            for col_index, dark in enumerate(row + [False]):
+                if dark and start is None:
+                    start = col_index
+                elif not dark and start is not None:
+                    path.rect(x + start * module, row_y, (col_index - start) * module, module)
+                    start = None
+
+        c.saveState()
+        c.setFillColor(colors.black)
+        c.drawPath(path, stroke=0, fill=1)
+        c.restoreState()
+
+    def _draw_footer(self, c, y_pos, sale, qr_matrix, width):
         """
         Dibujar footer con QR y leyendas
 
@@ -362,15 +422,12 @@ class PDFService:
             c: Canvas
             y_pos: Posición Y
             sale: Objeto Sale
-            qr_path: Ruta del QR code
+            qr_matrix: Matriz del QR code
             width: Ancho de página
         """
         # QR code
-        if qr_path and os.path.exists(qr_path):
-            qr_size = 4 * cm
-            qr_x = 2 * cm
-            qr_y = 2 * cm
-            c.drawImage(qr_path, qr_x, qr_y, width=qr_size, height=qr_size)
+        if qr_matrix:
+            self._draw_qr(c, qr_matrix, 2 * cm, 2 * cm, 4 * cm)
 
         # Leyendas legales
         text_x = 7 * cm
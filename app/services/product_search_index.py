@@ -0,0 +1,262 @@
+"""
+Índice de búsqueda de productos en memoria
+Índice invertido de trigramas por proceso para /pos/search-products
+Evita escanear la tabla products (ilike '%palabra%') en cada tecla del POS
+"""
+import heapq
+import threading
+import time
+import unicodedata
+from loguru import logger
+
+from app.models.product import Product
+
+
+class ProductSearchIndex:
+    """
+    Índice invertido de trigramas de productos activos
+
+    Replica exactamente la semántica de WooCommerceService.get_local_products:
+    - Todas las palabras deben coincidir (AND)
+    - Cada palabra coincide como substring en nombre o SKU (insensible a
+      mayúsculas y acentos, como la collation _ci de MySQL: "cafe" = "Café")
+    - Números cortos (1-3 dígitos) coinciden como palabra completa en el nombre
+    - Resultados ordenados por nombre
+    """
+
+    # Caracteres comodín de LIKE: si aparecen en la búsqueda se delega a SQL
+    LIKE_SPECIAL_CHARS = ('%', '_', '\\')
+
+    def __init__(self, refresh_interval=60):
+        """
+        Args:
+            refresh_interval: Segundos entre verificaciones de cambios en la BD
+        """
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._entries = {}      # id -> (name_folded, sku_folded, sort_key, product_dict)
+        self._postings = {}     # trigrama -> set(ids)
+        self._high_water = None  # Mayor last_sync indexado
+        self._last_check = 0.0
+        self._built = False
+
+    @property
+    def is_built(self):
+        """Indica si el índice ya fue construido en este proceso"""
+        return self._built
+
+    def build(self):
+        """
+        Construir el índice completo desde la base de datos
+
+        Returns:
+            int: Cantidad de productos activos indexados
+        """
+        started = time.perf_counter()
+        products = Product.query.all()
+
+        with self._lock:
+            self._entries = {}
+            self._postings = {}
+            self._high_water = None
+            for product in products:
+                self._upsert(product)
+            self._built = True
+            self._last_check = time.monotonic()
+
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"Índice de productos construido: {len(self._entries)} activos en {elapsed:.1f} ms")
+        return len(self._entries)
+
+    def refresh(self):
+        """
+        Actualizar incrementalmente el índice con productos modificados
+
+        Usa Product.last_sync como marca de agua: solo se leen los productos
+        sincronizados después de la última actualización del índice.
+        Los productos desactivados se eliminan del índice.
+
+        Returns:
+            int: Cantidad de productos actualizados
+        """
+        if not self._built:
+            return 0
+
+        with self._lock:
+            query = Product.query
+            if self._high_water is not None:
+                query = query.filter(Product.last_sync >= self._high_water)
+            products = query.all()
+
+            for product in products:
+                self._upsert(product)
+
+            self._last_check = time.monotonic()
+
+        if products:
+            logger.debug(f"Índice de productos actualizado: {len(products)} cambios")
+        return len(products)
+
+    def invalidate(self):
+        """Descartar el índice (se reconstruye en la siguiente búsqueda)"""
+        with self._lock:
+            self._entries = {}
+            self._postings = {}
+            self._high_water = None
+            self._built = False
+
+    def search(self, search=None, limit=50):
+        """
+        Buscar productos activos en el índice
+
+        Args:
+            search: Término de búsqueda (opcional)
+            limit: Límite de resultados
+
+        Returns:
+            list: Lista de productos (to_dict) o None si la búsqueda
+                  debe resolverse en SQL (comodines LIKE)
+        """
+        words = [word.strip() for word in search.split() if word.strip()] if search else []
+
+        if any(char in word for word in words for char in self.LIKE_SPECIAL_CHARS):
+            return None
+
+        self._ensure_fresh()
+
+        with self._lock:
+            words = [self._fold(word) for word in words]
+
+            # Candidatos: intersección de trigramas de las palabras con 3+ caracteres
+            candidates = None
+            for word in words:
+                for gram in self._trigrams(word):
+                    posting = self._postings.get(gram, set())
+                    candidates = set(posting) if candidates is None else candidates & posting
+                    if not candidates:
+                        return []
+
+            if candidates is None:
+                candidates = self._entries.keys()
+
+            matches = (
+                self._entries[product_id]
+                for product_id in candidates
+                if self._matches(self._entries[product_id], words)
+            )
+            top = heapq.nsmallest(limit, matches, key=lambda entry: entry[2])
+
+        return [dict(entry[3]) for entry in top]
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _ensure_fresh(self):
+        """Construir el índice si no existe o refrescarlo si venció el intervalo"""
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self.build()
+        elif time.monotonic() - self._last_check >= self.refresh_interval:
+            self.refresh()
+
+    def _upsert(self, product):
+        """Insertar, actualizar o eliminar un producto del índice (requiere lock)"""
+        if self._high_water is None or (product.last_sync and product.last_sync > self._high_water):
+            self._high_water = product.last_sync
+
+        self._remove(product.id)
+
+        if not product.is_active:
+            return
+
+        name_folded = self._fold(product.name or '')
+        sku_folded = self._fold(product.sku or '')
+        self._entries[product.id] = (
+            name_folded,
+            sku_folded,
+            (name_folded, product.id),
+            product.to_dict()
+        )
+
+        for gram in self._trigrams(name_folded) | self._trigrams(sku_folded):
+            self._postings.setdefault(gram, set()).add(product.id)
+
+    def _remove(self, product_id):
+        """Eliminar un producto del índice (requiere lock)"""
+        entry = self._entries.pop(product_id, None)
+        if entry is None:
+            return
+
+        for gram in self._trigrams(entry[0]) | self._trigrams(entry[1]):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(product_id)
+                if not posting:
+                    del self._postings[gram]
+
+    @staticmethod
+    def _fold(text):
+        """Minúsculas sin acentos ni diacríticos (Café -> cafe, Ñandú -> nandu)"""
+        decomposed = unicodedata.normalize('NFKD', text)
+        return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+    @staticmethod
+    def _trigrams(text):
+        """Obtener el conjunto de trigramas de un texto"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def _matches(entry, words):
+        """
+        Verificar que un producto cumple TODAS las palabras
+
+        Equivalente en Python de los filtros ilike de get_local_products
+        """
+        name, sku = entry[0], entry[1]
+
+        for word in words:
+            if word in sku:
+                continue
+
+            if word.isdigit() and len(word) <= 3:
+                # Número corto: palabra completa en el nombre
+                if (
+                    f" {word} " in name
+                    or f" {word}-" in name
+                    or f" {word})" in name
+                    or name.startswith(f"{word} ")
+                    or name.endswith(f" {word}")
+                ):
+                    continue
+                return False
+
+            if word not in name:
+                return False
+
+        return True
+
+
+# Instancia única por proceso
+product_index = ProductSearchIndex()
+
+
+def init_product_index(app):
+    """
+    Construir el índice de productos al iniciar el proceso web
+
+    Args:
+        app: Instancia de Flask
+    """
+    if not app.config.get('PRODUCT_SEARCH_INDEX_ENABLED', True):
+        return
+
+    product_index.refresh_interval = app.config.get('PRODUCT_SEARCH_INDEX_REFRESH', 60)
+
+    with app.app_context():
+        try:
+            product_index.build()
+        except Exception as e:
+            # La tabla puede no existir aún (migraciones pendientes); se construye en la primera búsqueda
+            logger.warning(f"No se pudo construir el índice de productos al iniciar: {e}")
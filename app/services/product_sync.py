@@ -0,0 +1,307 @@
+"""
+Escritura masiva de productos sincronizados desde WooCommerce
+Upsert por lotes (INSERT ... ON DUPLICATE KEY UPDATE) con detección de cambios por hash
+"""
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.product import Product
+
+
+class ProductSyncWriter:
+    """
+    Escritor de productos para la sincronización con WooCommerce
+
+    Por cada página:
+    1. Convierte productos/variaciones de WooCommerce en filas de products
+    2. Precarga las filas existentes con un solo woo_id IN (...)
+    3. Omite las filas cuyo hash de contenido no cambió
+    4. Escribe el resto con upsert por bloques y hace commit de la página
+    """
+
+    # Columnas que se actualizan cuando el producto ya existe
+    UPDATE_COLUMNS = (
+        'name', 'description', 'price', 'stock_quantity', 'image_url',
+        'is_active', 'sync_hash', 'last_sync', 'updated_at'
+    )
+
+    def __init__(self, chunk_size=500):
+        """
+        Args:
+            chunk_size: Filas por sentencia de upsert
+        """
+        self.chunk_size = chunk_size
+
+    # ===================
+    # CONVERSIÓN DE DATOS
+    # ===================
+
+    def build_simple_row(self, woo_product):
+        """
+        Convertir un producto simple de WooCommerce en fila de products
+
+        Args:
+            woo_product: Datos del producto desde WooCommerce
+
+        Returns:
+            dict: Fila para products
+        """
+        images = woo_product.get('images', [])
+
+        return self._with_hash({
+            'woo_id': woo_product['id'],
+            # SKU: usar el de WooCommerce o generar uno único
+            'sku': woo_product.get('sku') or f"WOO-{woo_product['id']}",
+            'name': woo_product['name'],
+            'description': woo_product.get('short_description', ''),
+            'price': self._to_price(woo_product.get('price')),
+            'stock_quantity': woo_product.get('stock_quantity') or 0,
+            'image_url': images[0]['src'] if images else None,
+            'is_active': woo_product['status'] == 'publish',
+        })
+
+    def build_variation_row(self, parent_product, variation):
+        """
+        Convertir una variación de WooCommerce en fila de products
+
+        Args:
+            parent_product: Producto padre desde WooCommerce
+            variation: Datos de la variación desde WooCommerce
+
+        Returns:
+            dict: Fila para products
+        """
+        # Construir nombre combinando producto padre + atributos de variación
+        variation_name = parent_product['name']
+        if variation.get('attributes'):
+            attr_values = [attr.get('option', '') for attr in variation['attributes'] if attr.get('option')]
+            if attr_values:
+                variation_name = f"{parent_product['name']} - {' - '.join(attr_values)}"
+
+        # Imagen: la de la variación o la del producto padre
+        variation_image = variation.get('image')
+        if variation_image and variation_image.get('src'):
+            image_url = variation_image['src']
+        else:
+            parent_images = parent_product.get('images', [])
+            image_url = parent_images[0]['src'] if parent_images else None
+
+        return self._with_hash({
+            'woo_id': variation['id'],
+            'sku': variation.get('sku') or f"WOO-VAR-{variation['id']}",
+            'name': variation_name,
+            'description': variation.get('description') or parent_product.get('short_description', ''),
+            'price': self._to_price(variation.get('price')),
+            'stock_quantity': variation.get('stock_quantity') or 0,
+            'image_url': image_url,
+            'is_active': variation.get('status') == 'publish' and parent_product.get('status') == 'publish',
+        })
+
+    # ===================
+    # ESCRITURA
+    # ===================
+
+    def write_page(self, rows):
+        """
+        Escribir una página de filas y hacer commit
+
+        Args:
+            rows: Filas generadas con build_simple_row/build_variation_row
+
+        Returns:
+            dict: {'processed': int, 'written': int, 'unchanged': int, 'failed': int}
+        """
+        stats = {'processed': 0, 'written': 0, 'unchanged': 0, 'failed': 0}
+        if not rows:
+            return stats
+
+        # Si un woo_id aparece dos veces en la página, gana la última versión
+        rows = list({row['woo_id']: row for row in rows}.values())
+        stats['processed'] = len(rows)
+
+        existing = {
+            woo_id: (sku, sync_hash)
+            for woo_id, sku, sync_hash in db.session.query(
+                Product.woo_id, Product.sku, Product.sync_hash
+            ).filter(Product.woo_id.in_([row['woo_id'] for row in rows]))
+        }
+
+        pending = []
+        for row in rows:
+            current = existing.get(row['woo_id'])
+            if current and current[1] == row['sync_hash']:
+                stats['unchanged'] += 1
+                continue
+            if current and current[0]:
+                # El SKU de un producto existente no se modifica
+                row = dict(row, sku=current[0])
+            pending.append(row)
+
+        pending, conflicts = self._drop_sku_conflicts(pending, existing)
+        stats['failed'] += conflicts
+
+        now = datetime.utcnow()
+        for row in pending:
+            row.update(last_sync=now, updated_at=now, created_at=now)
+
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            written, failed = self._write_chunk(chunk)
+            stats['written'] += written
+            stats['failed'] += failed
+
+        db.session.commit()
+        return stats
+
+    def deactivate_missing(self, live_woo_ids):
+        """
+        Desactivar productos activos que ya no están publicados en WooCommerce
+
+        Args:
+            live_woo_ids: woo_id publicados (productos simples y variaciones)
+
+        Returns:
+            int: Cantidad de productos desactivados
+        """
+        live_woo_ids = set(live_woo_ids)
+        stale = [
+            woo_id for (woo_id,) in db.session.query(Product.woo_id).filter(Product.is_active == True)
+            if woo_id not in live_woo_ids
+        ]
+
+        return self.deactivate(stale)
+
+    def deactivate(self, woo_ids):
+        """
+        Desactivar productos por woo_id y hacer commit
+
+        Args:
+            woo_ids: woo_id a desactivar
+
+        Returns:
+            int: Cantidad de woo_id procesados
+        """
+        woo_ids = list(woo_ids)
+        now = datetime.utcnow()
+
+        for start in range(0, len(woo_ids), self.chunk_size):
+            chunk = woo_ids[start:start + self.chunk_size]
+            # sync_hash se limpia para que una nueva publicación vuelva a escribirse
+            Product.query.filter(Product.woo_id.in_(chunk)).update({
+                Product.is_active: False,
+                Product.sync_hash: None,
+                Product.last_sync: now,
+                Product.updated_at: now
+            }, synchronize_session=False)
+
+        db.session.commit()
+        return len(woo_ids)
+
+    def _write_chunk(self, chunk):
+        """
+        Escribir un bloque con una sola sentencia; si falla, fila por fila
+
+        Returns:
+            tuple: (written, failed)
+        """
+        try:
+            with db.session.begin_nested():
+                db.session.execute(self._upsert_statement(chunk))
+            return len(chunk), 0
+        except IntegrityError as e:
+            logger.warning(f"Upsert de {len(chunk)} productos falló, reintentando por fila: {e.orig}")
+
+        written = failed = 0
+        for row in chunk:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(self._upsert_statement([row]))
+                written += 1
+            except IntegrityError as e:
+                failed += 1
+                logger.error(f"Error sincronizando producto {row['woo_id']} ({row['sku']}): {e.orig}")
+        return written, failed
+
+    def _upsert_statement(self, rows):
+        """
+        Construir INSERT ... ON DUPLICATE KEY UPDATE (MySQL) u
+        INSERT ... ON CONFLICT (woo_id) DO UPDATE (SQLite/PostgreSQL)
+        """
+        table = Product.__table__
+        dialect = db.engine.dialect.name
+
+        if dialect == 'mysql':
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.inserted
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            stmt = insert(table).values(rows)
+            incoming = stmt.excluded
+
+        values = {column: incoming[column] for column in self.UPDATE_COLUMNS}
+        # Actualizar SKU solo si estaba vacío
+        values['sku'] = db.case((table.c.sku == '', incoming.sku), else_=table.c.sku)
+
+        if dialect == 'mysql':
+            return stmt.on_duplicate_key_update(values)
+        return stmt.on_conflict_do_update(index_elements=['woo_id'], set_=values)
+
+    def _drop_sku_conflicts(self, rows, existing):
+        """
+        Descartar filas cuyo SKU ya pertenece a otro producto
+
+        En MySQL ON DUPLICATE KEY UPDATE también se dispara por el índice
+        único de sku y sobrescribiría el otro producto.
+
+        Returns:
+            tuple: (rows_validas, cantidad_descartadas)
+        """
+        skus = {row['sku'] for row in rows}
+        owners = dict(
+            db.session.query(Product.sku, Product.woo_id).filter(Product.sku.in_(skus))
+        ) if skus else {}
+
+        valid, seen, conflicts = [], set(), 0
+        for row in rows:
+            owner = owners.get(row['sku'])
+            if (owner is not None and owner != row['woo_id']) or row['sku'] in seen:
+                conflicts += 1
+                logger.error(
+                    f"SKU duplicado {row['sku']} para producto WooCommerce {row['woo_id']} "
+                    f"(ya usado por {owner if owner is not None else 'otro producto de la página'})"
+                )
+                continue
+            seen.add(row['sku'])
+            valid.append(row)
+
+        return valid, conflicts
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    @staticmethod
+    def _to_price(value):
+        """Normalizar precio de WooCommerce (puede venir vacío)"""
+        return Decimal(str(value or 0)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    @staticmethod
+    def _with_hash(row):
+        """Agregar el hash del contenido de la fila (sync_hash)"""
+        payload = json.dumps(
+            {key: str(value) for key, value in row.items()},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        row['sync_hash'] = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return row
@@ -0,0 +1,171 @@
+"""
+Servicio de webhooks de productos WooCommerce
+Recepción firmada, cola con coalescencia por woo_id y aplicación vía upsert
+"""
+import base64
+import hashlib
+import hmac
+import json
+from collections import defaultdict
+from flask import current_app
+from loguru import logger
+
+from app import cache
+from app.models.product_webhook_event import ProductWebhookEvent
+from app.services.product_search_index import product_index
+from app.services.product_sync import ProductSyncWriter
+from app.services.woocommerce_service import WooCommerceService
+
+
+class ProductWebhookService:
+    """
+    Webhooks product.created/updated/deleted/restored de WooCommerce
+
+    El endpoint solo verifica la firma y encola el evento (una fila por
+    woo_id, gana el último). La aplicación se hace en segundo plano tras
+    WOO_WEBHOOK_COALESCE_SECONDS, de modo que una ráfaga de ediciones del
+    mismo producto se escribe una sola vez.
+    """
+
+    TOPICS = ('product.created', 'product.updated', 'product.deleted', 'product.restored')
+
+    # Marca en caché de aplicación ya programada
+    SCHEDULED_KEY = 'woo_webhooks_scheduled'
+
+    def __init__(self):
+        """Inicializar servicio con configuración de webhooks"""
+        self.secret = current_app.config.get('WOO_WEBHOOK_SECRET')
+        self.coalesce_seconds = current_app.config.get('WOO_WEBHOOK_COALESCE_SECONDS', 5)
+
+    def verify_signature(self, body: bytes, signature: str) -> bool:
+        """
+        Verificar firma X-WC-Webhook-Signature (base64 de HMAC-SHA256 del cuerpo)
+
+        Args:
+            body: Cuerpo crudo del request
+            signature: Valor de la cabecera
+
+        Returns:
+            bool: True si la firma es válida
+        """
+        if not self.secret or not signature:
+            return False
+
+        expected = base64.b64encode(
+            hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).digest()
+        ).decode('ascii')
+        return hmac.compare_digest(expected, signature)
+
+    def enqueue(self, topic: str, payload: dict) -> dict:
+        """
+        Encolar un evento y programar su aplicación
+
+        Args:
+            topic: Tópico del webhook
+            payload: Cuerpo JSON del webhook
+
+        Returns:
+            dict: {'success': bool, 'message': str}
+        """
+        if topic not in self.TOPICS:
+            return {'success': False, 'message': f'Tópico no soportado: {topic}'}
+
+        woo_id = payload.get('id')
+        if not woo_id:
+            return {'success': False, 'message': 'Webhook sin ID de producto'}
+
+        ProductWebhookEvent.enqueue(int(woo_id), topic, json.dumps(payload))
+        self._schedule_apply()
+
+        return {'success': True, 'message': f'Evento {topic} encolado para producto {woo_id}'}
+
+    def apply_pending(self, limit: int = 500) -> dict:
+        """
+        Aplicar los eventos pendientes con el mismo upsert de la sincronización
+
+        - deleted: desactiva el producto (las variaciones de un producto
+          variable eliminado se desactivan en la reconciliación horaria,
+          reconcile_products)
+        - created/updated/restored: simples y variables se convierten en filas
+          como en la sincronización; las variaciones se combinan con su
+          producto padre
+
+        Args:
+            limit: Máximo de eventos por ejecución
+
+        Returns:
+            dict: {'success': bool, 'applied': int, 'written': int,
+                   'deactivated': int, 'failed': int, 'message': str}
+        """
+        events = ProductWebhookEvent.query.order_by(ProductWebhookEvent.received_at).limit(limit).all()
+
+        if not events:
+            return {'success': True, 'applied': 0, 'written': 0, 'deactivated': 0,
+                    'failed': 0, 'message': 'Sin eventos pendientes'}
+
+        # (id, event_count) leídos antes de los commits del escritor
+        pending = [(event.id, event.event_count) for event in events]
+        coalesced = sum(event.event_count for event in events)
+
+        writer = ProductSyncWriter()
+        deleted, products, variations = [], [], defaultdict(list)
+
+        for event in events:
+            payload = json.loads(event.payload)
+            if event.topic == 'product.deleted':
+                deleted.append(event.woo_id)
+            elif payload.get('type') == 'variation':
+                variations[payload.get('parent_id')].append(payload)
+            else:
+                products.append(payload)
+
+        deactivated = writer.deactivate(deleted) if deleted else 0
+        rows, failed = [], 0
+
+        if products or variations:
+            woo_service = WooCommerceService()
+
+            if products:
+                rows, failed = woo_service.build_product_rows(writer, products)
+
+            if variations:
+                parents = {p['id']: p for p in woo_service.get_products_by_ids(variations.keys())}
+                for parent_id, parent_variations in variations.items():
+                    parent = parents.get(parent_id)
+                    if not parent:
+                        failed += len(parent_variations)
+                        logger.error(f"Producto padre {parent_id} no encontrado para variaciones del webhook")
+                        continue
+                    rows.extend(writer.build_variation_row(parent, v) for v in parent_variations)
+
+        stats = writer.write_page(rows)
+        ProductWebhookEvent.acknowledge(pending)
+        product_index.refresh()
+
+        failed += stats['failed']
+        message = (
+            f"Webhooks de productos: {len(events)} productos ({coalesced} eventos), "
+            f"{stats['written']} escritos, {deactivated} desactivados, {failed} con error"
+        )
+        logger.info(message)
+
+        return {
+            'success': True,
+            'applied': len(events),
+            'written': stats['written'],
+            'deactivated': deactivated,
+            'failed': failed,
+            'message': message
+        }
+
+    def _schedule_apply(self):
+        """Programar una aplicación diferida (una sola por ventana de coalescencia)"""
+        try:
+            if not cache.add(self.SCHEDULED_KEY, True, timeout=self.coalesce_seconds):
+                return
+
+            from app.tasks.product_tasks import apply_product_webhooks
+            apply_product_webhooks.apply_async(countdown=self.coalesce_seconds)
+        except Exception as e:
+            # Sin caché o sin Celery: la tarea periódica aplicará los eventos pendientes
+            logger.warning(f"No se pudo programar la aplicación de webhooks: {e}")
@@ -0,0 +1,187 @@
+"""
+Circuit breaker del PSE
+Estado compartido en Redis entre todos los procesos web y workers
+"""
+import os
+import redis
+from loguru import logger
+
+from app.utils.redis_client import get_redis_client
+
+
+class PSECircuitOpenError(Exception):
+    """El circuito está abierto: no se contacta al PSE"""
+
+
+class PSECircuitBreaker:
+    """
+    Circuit breaker compartido (Redis)
+
+    Estados:
+    - CLOSED: requests normales; N fallos consecutivos (en la ventana) lo abren
+    - OPEN: falla de inmediato durante PSE_CIRCUIT_OPEN_SECONDS
+    - HALF_OPEN: pasado ese tiempo se permite un único request de prueba;
+      si responde se cierra, si falla vuelve a abrirse
+
+    Claves:
+    - open: existe mientras el circuito está abierto (TTL = open_seconds)
+    - tripped: el circuito se abrió y aún no hubo un request exitoso
+    - probe: request de prueba en curso (TTL = timeout del request)
+    - failures: fallos consecutivos (TTL = ventana)
+
+    Si Redis no responde el circuito se considera cerrado: el envío
+    no debe depender de Redis.
+    """
+
+    PREFIX = 'izisales:pse:circuit:'
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self):
+        self.redis_url = None
+        self.failure_threshold = 5
+        self.failure_window = 60
+        self.open_seconds = 30
+        self.probe_timeout = 35
+        self._redis_warned = False
+
+    def configure(self, config):
+        """
+        Aplicar configuración de la app
+
+        Args:
+            config: current_app.config
+        """
+        self.redis_url = config.get('REDIS_URL')
+        self.failure_threshold = config.get('PSE_CIRCUIT_FAILURE_THRESHOLD', 5)
+        self.failure_window = config.get('PSE_CIRCUIT_FAILURE_WINDOW', 60)
+        self.open_seconds = config.get('PSE_CIRCUIT_OPEN_SECONDS', 30)
+        # Un request de prueba colgado no bloquea el half-open para siempre
+        self.probe_timeout = config.get('PSE_CONNECT_TIMEOUT', 5) + config.get('PSE_TIMEOUT', 30)
+
+    def allow_request(self) -> bool:
+        """
+        Verificar si se puede contactar al PSE
+
+        Returns:
+            bool: False si el circuito está abierto (o half-open con prueba en curso)
+        """
+        client = self._client()
+        if client is None:
+            return True
+
+        try:
+            is_open, tripped = client.mget(self._key('open'), self._key('tripped'))
+            if is_open:
+                return False
+            if not tripped:
+                return True
+            # HALF_OPEN: solo un request de prueba entre todos los procesos
+            return bool(client.set(self._key('probe'), os.getpid(), nx=True, ex=self.probe_timeout))
+        except redis.RedisError as e:
+            self._warn(e)
+            return True
+
+    def record_success(self):
+        """Registrar una respuesta del PSE (cierra el circuito si estaba en prueba)"""
+        client = self._client()
+        if client is None:
+            return
+
+        try:
+            pipe = client.pipeline()
+            pipe.delete(self._key('tripped'))
+            pipe.delete(self._key('failures'), self._key('probe'))
+            closed, _ = pipe.execute()
+            if closed:
+                logger.info("Circuito PSE cerrado: el PSE volvió a responder")
+        except redis.RedisError as e:
+            self._warn(e)
+
+    def record_failure(self):
+        """Registrar un fallo de transporte o 5xx del PSE"""
+        client = self._client()
+        if client is None:
+            return
+
+        try:
+            if client.exists(self._key('tripped')):
+                # Falló la prueba (o un request que ya estaba en vuelo): reabrir
+                pipe = client.pipeline()
+                pipe.set(self._key('open'), 1, ex=self.open_seconds)
+                pipe.delete(self._key('probe'))
+                pipe.execute()
+                logger.warning(f"Circuito PSE reabierto por {self.open_seconds}s")
+                return
+
+            pipe = client.pipeline()
+            pipe.incr(self._key('failures'))
+            pipe.expire(self._key('failures'), self.failure_window)
+            failures, _ = pipe.execute()
+
+            if failures >= self.failure_threshold:
+                pipe = client.pipeline()
+                pipe.set(self._key('open'), 1, ex=self.open_seconds)
+                pipe.set(self._key('tripped'), 1)
+                pipe.delete(self._key('failures'))
+                pipe.execute()
+                logger.error(
+                    f"Circuito PSE abierto tras {failures} fallos consecutivos "
+                    f"(prueba en {self.open_seconds}s)"
+                )
+        except redis.RedisError as e:
+            self._warn(e)
+
+    def state(self) -> dict:
+        """
+        Estado actual del circuito
+
+        Returns:
+            dict: {'state': CLOSED|OPEN|HALF_OPEN, 'failures': int, 'retry_in': int|None}
+        """
+        client = self._client()
+        if client is None:
+            return {'state': self.CLOSED, 'failures': 0, 'retry_in': None}
+
+        try:
+            pipe = client.pipeline()
+            pipe.ttl(self._key('open'))
+            pipe.exists(self._key('tripped'))
+            pipe.get(self._key('failures'))
+            open_ttl, tripped, failures = pipe.execute()
+        except redis.RedisError as e:
+            self._warn(e)
+            return {'state': self.CLOSED, 'failures': 0, 'retry_in': None}
+
+        if open_ttl is not None and open_ttl >= 0:
+            state = self.OPEN
+        elif tripped:
+            state = self.HALF_OPEN
+        else:
+            state = self.CLOSED
+
+        return {
+            'state': state,
+            'failures': int(failures or 0),
+            'retry_in': open_ttl if state == self.OPEN else None
+        }
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _client(self):
+        if not self.redis_url:
+            return None
+        return get_redis_client(self.redis_url)
+
+    def _key(self, name):
+        return f'{self.PREFIX}{name}'
+
+    def _warn(self, error):
+        """Advertir una sola vez por proceso que Redis no responde"""
+        if not self._redis_warned:
+            self._redis_warned = True
+            logger.warning(f"Circuit breaker PSE sin Redis, se permiten todos los requests: {error}")
@@ -0,0 +1,255 @@
+"""
+Cliente HTTP del PSE
+Sesión persistente por proceso con pool de conexiones, timeouts separados,
+presupuesto de reintentos con backoff aleatorio y circuit breaker compartido
+"""
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from loguru import logger
+
+from app.services.pse_circuit import PSECircuitBreaker, PSECircuitOpenError
+
+
+class RetryBudget:
+    """
+    Presupuesto de reintentos por proceso
+
+    Cada request deposita `ratio` fichas y cada reintento consume una. Así los
+    reintentos nunca superan ~ratio del tráfico: si el PSE está caído no se
+    multiplica la carga sobre él.
+    """
+
+    def __init__(self, ratio=0.2, min_tokens=3, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(min_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Registrar un request nuevo"""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """
+        Consumir una ficha para reintentar
+
+        Returns:
+            bool: True si hay presupuesto para el reintento
+        """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class PSEHttpClient:
+    """
+    Sesión HTTP de larga duración hacia el PSE (una por proceso)
+
+    Reintentos:
+    - Fallas al conectar (ConnectTimeout, NewConnectionError): siempre (el
+      request no llegó al PSE)
+    - 503: siempre (servicio no disponible, el request no se procesó)
+    - Otros errores de conexión, timeout de lectura, 500, 502 y 504: solo
+      métodos idempotentes (GET). Con 502/504 el gateway suele haber
+      entregado ya el request al PSE, y una conexión keep-alive cerrada por
+      el servidor (RemoteDisconnected) puede cortarse después de enviar el
+      cuerpo: un POST de envío repetido podría duplicar el comprobante en SUNAT
+
+    Circuit breaker: con el circuito abierto request() lanza
+    PSECircuitOpenError sin contactar al PSE. Cada request lógico (tras sus
+    reintentos) registra un éxito o un fallo (transporte o 5xx).
+    """
+
+    RETRY_STATUS = (503,)
+    RETRY_STATUS_IDEMPOTENT = (500, 502, 503, 504)
+
+    def __init__(self):
+        self.connect_timeout = 5
+        self.read_timeout = 30
+        self.max_retries = 2
+        self.backoff_base = 0.5
+        self.backoff_max = 8
+        self.pool_size = 10
+        self.budget = RetryBudget()
+        self.breaker = PSECircuitBreaker()
+        self._pid = os.getpid()
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'budget_exhausted': 0, 'errors': 0, 'short_circuited': 0}
+
+    def configure(self, config):
+        """
+        Aplicar configuración de la app (no recrea la sesión)
+
+        Args:
+            config: current_app.config
+        """
+        self.connect_timeout = config.get('PSE_CONNECT_TIMEOUT', 5)
+        self.read_timeout = config.get('PSE_TIMEOUT', 30)
+        self.max_retries = config.get('PSE_MAX_RETRIES', 2)
+        self.backoff_base = config.get('PSE_BACKOFF_BASE', 0.5)
+        self.backoff_max = config.get('PSE_BACKOFF_MAX', 8)
+        self.pool_size = config.get('PSE_POOL_SIZE', 10)
+        self.budget.ratio = config.get('PSE_RETRY_BUDGET_RATIO', 0.2)
+        self.breaker.configure(config)
+
+    def get(self, url, **kwargs):
+        """GET con reintentos (idempotente)"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST con reintentos solo si el request no fue procesado"""
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Ejecutar un request con la sesión compartida
+
+        Returns:
+            requests.Response: Última respuesta obtenida
+
+        Raises:
+            PSECircuitOpenError: Si el circuito está abierto
+            requests.Timeout, requests.ConnectionError: Si se agotan los reintentos
+        """
+        if not self.breaker.allow_request():
+            self._count('short_circuited')
+            raise PSECircuitOpenError('Circuito PSE abierto: PSE no disponible')
+
+        idempotent = method.upper() in ('GET', 'HEAD', 'OPTIONS')
+        retry_status = self.RETRY_STATUS_IDEMPOTENT if idempotent else self.RETRY_STATUS
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+
+        self._count('requests')
+        self.budget.deposit()
+        attempt = 0
+
+        while True:
+            try:
+                response = self._get_session().request(method, url, **kwargs)
+                if response.status_code not in retry_status or not self._can_retry(attempt):
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    return response
+                reason = f"HTTP {response.status_code}"
+                response.close()  # Devolver la conexión al pool antes de reintentar
+
+            except (requests.ConnectionError, requests.Timeout) as e:
+                retryable = idempotent or self._failed_to_connect(e)
+                if not retryable or not self._can_retry(attempt):
+                    self._count('errors')
+                    self.breaker.record_failure()
+                    raise
+                reason = type(e).__name__
+
+            attempt += 1
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            logger.warning(
+                f"PSE {method} {url}: {reason}, reintento {attempt}/{self.max_retries} en {delay:.2f}s"
+            )
+            time.sleep(delay)
+
+    def max_request_time(self):
+        """
+        Duración máxima de un request lógico con todos sus reintentos
+
+        Returns:
+            float: (connect + read) por intento más el backoff máximo entre intentos, en segundos
+        """
+        attempts = self.max_retries + 1
+        return (self.connect_timeout + self.read_timeout) * attempts + self.backoff_max * self.max_retries
+
+    def stats(self):
+        """
+        Estadísticas del proceso actual
+
+        Returns:
+            dict: requests, conexiones abiertas/reutilizadas, reintentos y errores
+        """
+        connections = requests_sent = 0
+        session = self._session
+        if session is not None:
+            # El mismo adaptador está montado para http:// y https://
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools[key]
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+
+        return {
+            'pid': os.getpid(),
+            **self._stats,
+            'http_requests': requests_sent,
+            'connections_opened': connections,
+            'connections_reused': max(requests_sent - connections, 0),
+            'reuse_ratio': round(1 - connections / requests_sent, 3) if requests_sent else 0.0,
+            'retry_tokens': round(self.budget.tokens, 2),
+            'circuit': self.breaker.state()
+        }
+
+    def close(self):
+        """Cerrar la sesión y sus conexiones"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _get_session(self):
+        """Sesión del proceso (se recrea tras un fork)"""
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Las conexiones del proceso padre no se comparten
+                self._pid = os.getpid()
+                self._session = None
+                self._stats = dict.fromkeys(self._stats, 0)
+
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+
+            return self._session
+
+    @staticmethod
+    def _failed_to_connect(error):
+        """True si el error ocurrió al abrir la conexión (no se envió nada al PSE)"""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        reason = getattr(reason, 'reason', reason)  # MaxRetryError envuelve la causa
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+    def _can_retry(self, attempt):
+        """Verificar límite por request y presupuesto del proceso"""
+        if attempt >= self.max_retries:
+            return False
+        if not self.budget.withdraw():
+            self._count('budget_exhausted')
+            return False
+        self._count('retries')
+        return True
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+
+# Instancia única por proceso
+pse_http_client = PSEHttpClient()
@@ -3,17 +3,28 @@ Servicio de integración con PSE/SUNAT
 Gestiona el envío de comprobantes electrónicos a SUNAT vía Proveedor de Servicios Electrónicos (PSE)
 """
 import os
+import json
+import time
 import base64
 import hashlib
 import requests
 from datetime import datetime
+from decimal import Decimal
 from flask import current_app
 from loguru import logger
 
-from app import db
+from app import db, cache
 from app.models.sale import Sale
+from app.models.daily_summary import DailySummary
+from app.models.daily_sales_summary import DailySalesSummary
 from app.models.rus_control import RUSControl
+from app.utils.helpers import lima_today, lima_day_bounds
+from app.services.sale_bundle import SaleBundle
 from app.services.xml_builder import XMLBuilder
+from app.services.xml_signer import XMLSigner
+from app.services.cdr_processor import CDRProcessor
+from app.services.pse_http import pse_http_client
+from app.services.pse_circuit import PSECircuitBreaker, PSECircuitOpenError
 
 
 class PSEService:
@@ -22,7 +33,8 @@ class PSEService:
 
     Gestiona el ciclo completo:
     1. Generación de XML UBL 2.1
-    2. Envío a PSE para firma y transmisión a SUNAT
+    2. Firma XML-DSig (local con XML_SIGNING_ENABLED, o en el PSE)
+       y transmisión a SUNAT
     3. Recepción y procesamiento de CDR
     4. Actualización de estados
     """
@@ -40,13 +52,23 @@ class PSEService:
         '5002': ('ERROR', 'Error interno de SUNAT'),
     }
 
+    # Errores de transporte: la venta pasa a la cola de contingencia en vez de ERROR
+    CONTINGENCY_ERROR_CODES = ('CIRCUIT_OPEN', 'TIMEOUT', 'CONNECTION_ERROR')
+
+    # Envío individual en curso: lo toma el POS al encolar y lo libera la tarea al terminar
+    SEND_LOCK_KEY = 'sunat_send:{sale_id}'
+
     def __init__(self):
         """Inicializar servicio con configuración PSE"""
         self.api_url = current_app.config.get('PSE_API_URL')
         self.token = current_app.config.get('PSE_TOKEN')
         self.sandbox_mode = current_app.config.get('PSE_SANDBOX_MODE', True)
         self.timeout = current_app.config.get('PSE_TIMEOUT', 30)
+        self.http = pse_http_client
+        self.http.configure(current_app.config)
         self.xml_builder = XMLBuilder()
+        self.signer = XMLSigner()
+        self.cdr_processor = CDRProcessor()
         self.company_ruc = current_app.config.get('COMPANY_RUC')
 
     def send_sale_to_sunat(self, sale_id: int) -> dict:
@@ -76,17 +98,18 @@ class PSEService:
             }
         """
         try:
-            # Obtener venta
-            sale = Sale.query.get(sale_id)
-            if not sale:
+            # Venta con cliente, vendedor e items (2 consultas para validar, XML y PDF)
+            bundle = SaleBundle.load(sale_id)
+            if not bundle:
                 return {
                     'success': False,
                     'sale_id': sale_id,
                     'message': 'Venta no encontrada'
                 }
+            sale = bundle.sale
 
             # Validar venta antes de enviar
-            is_valid, errors = self._validate_sale_for_sending(sale)
+            is_valid, errors = self._validate_sale_for_sending(bundle)
             if not is_valid:
                 return {
                     'success': False,
@@ -99,15 +122,45 @@ class PSEService:
             logger.info(f"Iniciando envío de boleta {sale.correlative} a SUNAT")
 
             # Generar XML UBL 2.1
-            xml_content = self._generate_xml_content(sale)
+            xml_content = self._generate_xml_content(bundle)
+
+            # Validar contra XSD: un rechazo estructural se detecta sin ir al PSE
+            xml_valid, xml_errors = self.xml_builder.validate_xml(xml_content)
+            if not xml_valid:
+                logger.error(f"XML de {sale.correlative} no válido: {'; '.join(xml_errors[:3])}")
+                return {
+                    'success': False,
+                    'sale_id': sale_id,
+                    'correlative': sale.correlative,
+                    'message': 'XML no válido según esquema UBL 2.1',
+                    'errors': xml_errors
+                }
 
-            # Calcular hash del XML
-            xml_hash = self._calculate_hash(xml_content)
+            # Firma local: el hash es el DigestValue de la firma (valor resumen del QR)
+            if self.signer.enabled:
+                xml_content, xml_hash = self.signer.sign(xml_content)
+            else:
+                xml_hash = self._calculate_hash(xml_content)
 
             # Enviar a PSE
             pse_response = self._send_to_pse_api(xml_content, sale)
 
             if not pse_response.get('success'):
+                if self._is_pse_unavailable(pse_response):
+                    # PSE caído: queda PENDING en contingencia, se drena al recuperarse
+                    self._park_in_contingency(sale, pse_response.get('message'))
+                    db.session.commit()
+
+                    return {
+                        'success': False,
+                        'sale_id': sale_id,
+                        'correlative': sale.correlative,
+                        'sunat_status': 'PENDING',
+                        'contingency': True,
+                        'message': f"{pse_response.get('message')}. Boleta en contingencia, "
+                                   f"se enviará cuando el PSE se recupere"
+                    }
+
                 # Error en envío a PSE
                 self._update_sale_status(sale, 'ERROR', {
                     'message': pse_response.get('message', 'Error desconocido'),
@@ -127,32 +180,33 @@ class PSEService:
             xml_path = self._save_xml_file(xml_content, sale)
             sale.xml_path = xml_path
             sale.hash = xml_hash
+            sale.sunat_contingency_at = None
 
-            # Procesar respuesta CDR
-            cdr_success = self._process_cdr_response(pse_response.get('cdr', {}), sale)
+            # Procesar CDR: el ZIP se decodifica una vez, se lee en memoria y se escribe una vez
+            cdr_response = pse_response.get('cdr') or {}
+            cdr_content = base64.b64decode(cdr_response['content']) if cdr_response.get('content') else None
+            self._process_cdr_response(cdr_response, sale, cdr_content)
 
-            # Guardar CDR si existe
             cdr_path = None
-            if pse_response.get('cdr') and pse_response['cdr'].get('content'):
-                cdr_path = self._save_cdr_file(
-                    base64.b64decode(pse_response['cdr']['content']),
-                    sale
-                )
+            if cdr_content:
+                cdr_path = self._save_cdr_file(cdr_content, sale)
                 sale.cdr_path = cdr_path
 
+            # Leídos antes del commit: después la venta expira y se volvería a consultar
+            correlative, sunat_status = sale.correlative, sale.sunat_status
             db.session.commit()
 
             logger.info(
-                f"Boleta {sale.correlative} procesada. "
-                f"Estado: {sale.sunat_status}"
+                f"Boleta {correlative} procesada. "
+                f"Estado: {sunat_status}"
             )
 
             return {
                 'success': True,
                 'sale_id': sale_id,
-                'correlative': sale.correlative,
-                'sunat_status': sale.sunat_status,
-                'message': f'Boleta enviada. Estado: {sale.sunat_status}',
+                'correlative': correlative,
+                'sunat_status': sunat_status,
+                'message': f'Boleta enviada. Estado: {sunat_status}',
                 'cdr_path': cdr_path
             }
 
@@ -160,10 +214,10 @@ class PSEService:
             logger.error(f"Error enviando boleta {sale_id} a SUNAT: {e}")
             db.session.rollback()
 
-            # Actualizar estado a ERROR
+            # Actualizar estado a ERROR (nunca una venta aceptada o incluida en un RC)
             try:
                 sale = Sale.query.get(sale_id)
-                if sale:
+                if sale and sale.is_sendable:
                     self._update_sale_status(sale, 'ERROR', {
                         'message': str(e)
                     })
@@ -177,6 +231,35 @@ class PSEService:
                 'message': f'Error inesperado: {str(e)}'
             }
 
+    def acquire_send_lock(self, sale_id: int, margin: int = 0) -> bool:
+        """
+        Marcar la venta con un envío en curso
+
+        El bloqueo dura al menos un request al PSE con todos sus reintentos
+        (más margin, p. ej. la espera en la cola de Celery); la tarea lo
+        libera antes si termina.
+
+        Args:
+            sale_id: ID de la venta
+            margin: Segundos adicionales
+
+        Returns:
+            bool: False si ya hay un envío en curso
+
+        Raises:
+            Exception: Si la caché no está disponible
+        """
+        timeout = int(self.http.max_request_time()) + margin
+        return cache.add(self.SEND_LOCK_KEY.format(sale_id=sale_id), True, timeout=timeout)
+
+    @classmethod
+    def release_send_lock(cls, sale_id: int):
+        """Liberar el bloqueo de envío (si la caché falla, expira solo)"""
+        try:
+            cache.delete(cls.SEND_LOCK_KEY.format(sale_id=sale_id))
+        except Exception as e:
+            logger.warning(f"No se pudo liberar el bloqueo de envío de venta {sale_id}: {e}")
+
     def check_sunat_status(self, sale_id: int) -> dict:
         """
         Verificar estado actual de envío a SUNAT
@@ -203,6 +286,7 @@ class PSEService:
                 'sunat_response': sale.sunat_response,
                 'sent_at': sale.sunat_sent_at.isoformat() if sale.sunat_sent_at else None,
                 'can_resend': sale.sunat_status in ['ERROR', 'REJECTED'],
+                'in_contingency': sale.sunat_contingency_at is not None,
                 'has_pdf': sale.pdf_path is not None and os.path.exists(sale.pdf_path) if sale.pdf_path else False,
                 'has_cdr': sale.cdr_path is not None and os.path.exists(sale.cdr_path) if sale.cdr_path else False
             }
@@ -246,7 +330,7 @@ class PSEService:
             logger.info(f"Reenviando boleta {sale.correlative} a SUNAT")
 
             # Resetear estado a PENDING
-            sale.sunat_status = 'PENDING'
+            sale.set_sunat_status('PENDING')
             sale.sunat_response = None
             sale.sunat_sent_at = None
             db.session.commit()
@@ -284,16 +368,21 @@ class PSEService:
             # Descargar desde PSE
             logger.info(f"Descargando CDR de boleta {sale.correlative} desde PSE")
 
-            response = requests.get(
+            response = self.http.get(
                 f"{self.api_url}/cdr/{sale.correlative}",
-                headers={'Authorization': f'Bearer {self.token}'},
-                timeout=self.timeout
+                headers={'Authorization': f'Bearer {self.token}'}
             )
 
             if response.status_code == 200:
                 cdr_content = response.content
                 cdr_path = self._save_cdr_file(cdr_content, sale)
                 sale.cdr_path = cdr_path
+
+                try:
+                    self._apply_cdr(sale, self.cdr_processor.parse(cdr_content))
+                except ValueError as e:
+                    logger.warning(f"CDR descargado de {sale.correlative} no legible: {e}")
+
                 db.session.commit()
                 return cdr_path
             else:
@@ -304,11 +393,576 @@ class PSEService:
             logger.error(f"Error descargando CDR de venta {sale_id}: {e}")
             return None
 
+    def drain_contingency(self) -> dict:
+        """
+        Reencolar ventas de la cola de contingencia a ritmo controlado
+
+        - Circuito OPEN: no se encola nada
+        - HALF_OPEN: se encola una sola venta (request de prueba)
+        - CLOSED: hasta PSE_CONTINGENCY_DRAIN_BATCH ventas, espaciadas a
+          PSE_CONTINGENCY_DRAIN_RATE envíos por segundo
+
+        Returns:
+            dict: {'success': bool, 'circuit': str, 'dispatched': int,
+                   'pending': int, 'message': str}
+        """
+        circuit = self.http.breaker.state()['state']
+        queued = Sale.query.filter(
+            Sale.sunat_contingency_at.isnot(None),
+            Sale.sunat_status == 'PENDING',
+            Sale.is_cancelled == False,
+            Sale.daily_summary_id.is_(None)  # Incluida en un RC: su estado llega con el ticket del resumen
+        )
+        pending = queued.count()
+
+        if circuit == PSECircuitBreaker.OPEN or not pending:
+            return {
+                'success': True,
+                'circuit': circuit,
+                'dispatched': 0,
+                'pending': pending,
+                'message': f'Contingencia: {pending} pendientes, circuito {circuit}'
+            }
+
+        batch = 1 if circuit == PSECircuitBreaker.HALF_OPEN else current_app.config.get('PSE_CONTINGENCY_DRAIN_BATCH', 30)
+        interval = 1 / current_app.config.get('PSE_CONTINGENCY_DRAIN_RATE', 1)
+        # Evita reencolar una venta que aún espera su turno del drenado anterior
+        lock_timeout = int(batch * interval + self.http.breaker.probe_timeout)
+
+        from app.tasks.sunat_tasks import send_sale_to_sunat_async
+
+        dispatched = 0
+        for (sale_id,) in queued.with_entities(Sale.id).order_by(Sale.sunat_contingency_at).limit(batch):
+            if not cache.add(f'pse_contingency:{sale_id}', True, timeout=lock_timeout):
+                continue
+            send_sale_to_sunat_async.apply_async((sale_id,), countdown=dispatched * interval)
+            dispatched += 1
+
+        message = f'Contingencia: {dispatched} reencoladas de {pending} pendientes (circuito {circuit})'
+        logger.info(message)
+
+        return {
+            'success': True,
+            'circuit': circuit,
+            'dispatched': dispatched,
+            'pending': pending,
+            'message': message
+        }
+
+    def validate_day_documents(self, reference_date=None) -> dict:
+        """
+        Validar en una pasada el XML de todas las boletas de un día
+
+        Genera el XML de cada boleta no anulada del día (hora de Lima) y lo
+        valida con el esquema compilado del proceso, sin enviar nada al PSE.
+
+        Args:
+            reference_date: Fecha de emisión (default: hoy en Lima)
+
+        Returns:
+            dict: Resultado de UBLSchemaValidator.validate_batch con
+                  'reference_date' y 'errors' indexado por correlativo
+        """
+        reference_date = reference_date or lima_today()
+        start, end = lima_day_bounds(reference_date)
+
+        bundles = SaleBundle.from_query(Sale.query.filter(
+            Sale.document_type == 'BOLETA',
+            Sale.is_cancelled == False,
+            Sale.created_at >= start,
+            Sale.created_at < end
+        ).order_by(Sale.correlative))
+
+        result = self.xml_builder.validator.validate_batch(
+            (bundle.correlative, self._generate_xml_content(bundle)) for bundle in bundles
+        )
+        result['reference_date'] = reference_date.isoformat()
+
+        logger.info(
+            f"Validación XSD del {reference_date.isoformat()}: {result['valid']}/{result['checked']} "
+            f"válidos en {result['elapsed_ms']} ms"
+        )
+        return result
+
+    def reconcile_cdrs(self, start_date, end_date) -> dict:
+        """
+        Conciliar el estado de las ventas con sus CDR (cierre de mes)
+
+        Cada archivo CDR se lee una sola vez (un CDR de resumen diario cubre
+        hasta 500 boletas) y se procesa en memoria. Las ventas cuyo estado o
+        código no coincide con el CDR se corrigen en un UPDATE por lotes.
+
+        Args:
+            start_date: Primer día (hora de Lima)
+            end_date: Último día, inclusive
+
+        Returns:
+            dict: {
+                'checked': int,
+                'cdr_files': int,
+                'updated': int,
+                'missing': int,
+                'unreadable': int,
+                'mismatches': list,
+                'elapsed_ms': float
+            }
+        """
+        started = time.perf_counter()
+        start, _ = lima_day_bounds(start_date)
+        _, end = lima_day_bounds(end_date)
+
+        # Solo columnas: sin cargar objetos Sale
+        rows = db.session.query(
+            Sale.id, Sale.correlative, Sale.cdr_path, Sale.sunat_status, Sale.sunat_response_code,
+            Sale.created_at, Sale.seller_id, Sale.is_cancelled, Sale.total
+        ).filter(
+            Sale.cdr_path.isnot(None),
+            Sale.created_at >= start,
+            Sale.created_at < end
+        ).order_by(Sale.id).all()
+
+        cdrs = {}
+        updates = []
+        mismatches = []
+        moved = {}
+        missing = unreadable = 0
+
+        for sale_id, correlative, cdr_path, status, response_code, *bucket in rows:
+            if cdr_path not in cdrs:
+                cdrs[cdr_path] = self._read_cdr_file(cdr_path)
+
+            cdr = cdrs[cdr_path]
+            if cdr == 'MISSING':
+                missing += 1
+                continue
+            if cdr is None:
+                unreadable += 1
+                continue
+
+            if status == cdr['status'] and response_code == cdr['response_code']:
+                continue
+
+            update = {
+                'id': sale_id,
+                'sunat_response_code': cdr['response_code'],
+                'sunat_notes': json.dumps(cdr['notes']) if cdr['notes'] else None
+            }
+            if status != cdr['status']:
+                update['sunat_status'] = cdr['status']
+                created_at, seller_id, is_cancelled, total = bucket
+                moved.setdefault(cdr['status'], []).append((created_at, seller_id, status, is_cancelled, total))
+                update['sunat_response'] = self.cdr_processor.format_response(cdr)
+                mismatches.append({
+                    'correlative': correlative,
+                    'status': status,
+                    'cdr_status': cdr['status'],
+                    'response_code': cdr['response_code']
+                })
+            updates.append(update)
+
+        for offset in range(0, len(updates), 500):
+            db.session.bulk_update_mappings(Sale, updates[offset:offset + 500])
+        for status, moved_rows in moved.items():
+            DailySalesSummary.move_rows(moved_rows, sunat_status=status)
+        db.session.commit()
+
+        result = {
+            'checked': len(rows),
+            'cdr_files': len(cdrs),
+            'updated': len(updates),
+            'missing': missing,
+            'unreadable': unreadable,
+            'mismatches': mismatches,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+        logger.info(
+            f"Conciliación de CDR {start_date.isoformat()} a {end_date.isoformat()}: "
+            f"{result['checked']} ventas, {result['cdr_files']} CDR, {result['updated']} actualizadas, "
+            f"{len(mismatches)} con estado distinto"
+        )
+        return result
+
+    # ===================
+    # RESUMEN DIARIO (RC)
+    # ===================
+
+    def send_daily_summary(self, reference_date=None) -> dict:
+        """
+        Enviar las boletas pendientes de un día mediante Resúmenes Diarios
+
+        Agrupa las boletas PENDING del día (hora de Lima) en resúmenes de hasta
+        XMLBuilder.SUMMARY_MAX_LINES líneas: un XML y una llamada al PSE por
+        resumen en lugar de una por boleta. El ticket y el CDR de cada resumen
+        se trasladan a todas sus ventas.
+
+        Args:
+            reference_date: Fecha de emisión de las boletas (default: hoy en Lima)
+
+        Returns:
+            dict: {
+                'success': bool,
+                'reference_date': str,
+                'total_sales': int,
+                'summaries': list,
+                'message': str
+            }
+        """
+        reference_date = reference_date or lima_today()
+        start, end = lima_day_bounds(reference_date)
+
+        sales = Sale.query.options(db.joinedload(Sale.customer)).filter(
+            Sale.document_type == 'BOLETA',
+            Sale.sunat_status == 'PENDING',
+            Sale.is_cancelled == False,
+            Sale.daily_summary_id.is_(None),
+            Sale.total > 0,
+            Sale.created_at >= start,
+            Sale.created_at < end
+        ).order_by(Sale.correlative).all()
+
+        # Boletas a empresas (RUC 20) no pueden reportarse
+        valid_sales = []
+        for sale in sales:
+            customer = sale.customer
+            if customer.document_type == 'RUC' and (customer.document_number or '').startswith('20'):
+                logger.warning(f"Boleta {sale.correlative} excluida del resumen: cliente RUC 20")
+                continue
+            valid_sales.append(sale)
+
+        if not valid_sales:
+            return {
+                'success': True,
+                'reference_date': reference_date.isoformat(),
+                'total_sales': 0,
+                'summaries': [],
+                'message': f'Sin boletas pendientes para {reference_date.isoformat()}'
+            }
+
+        max_lines = self.xml_builder.SUMMARY_MAX_LINES
+        summaries = []
+        for offset in range(0, len(valid_sales), max_lines):
+            summary = self._send_summary_chunk(reference_date, valid_sales[offset:offset + max_lines])
+            summaries.append(summary.to_dict())
+
+        failed = [s for s in summaries if s['status'] == 'ERROR']
+        message = (
+            f"{len(valid_sales)} boletas del {reference_date.isoformat()} en "
+            f"{len(summaries)} resúmenes ({len(failed)} con error)"
+        )
+        logger.info(message)
+
+        return {
+            'success': not failed,
+            'reference_date': reference_date.isoformat(),
+            'total_sales': len(valid_sales),
+            'summaries': summaries,
+            'message': message
+        }
+
+    def check_daily_summary(self, summary_id: int) -> dict:
+        """
+        Consultar el ticket de un resumen enviado y trasladar el CDR a sus ventas
+
+        Args:
+            summary_id: ID (tabla) del resumen
+
+        Returns:
+            dict: {'success': bool, 'status': str, 'message': str}
+        """
+        summary = DailySummary.query.get(summary_id)
+        if not summary:
+            return {'success': False, 'message': 'Resumen no encontrado'}
+
+        if summary.status != 'SENT':
+            return {
+                'success': True,
+                'status': summary.status,
+                'message': f'Resumen {summary.summary_id} ya procesado: {summary.status}'
+            }
+
+        pse_response = self._get_summary_status_from_pse(summary)
+
+        if not pse_response.get('success'):
+            return {
+                'success': False,
+                'status': summary.status,
+                'message': pse_response.get('message', 'Error consultando ticket')
+            }
+
+        if pse_response.get('in_process'):
+            return {
+                'success': True,
+                'status': summary.status,
+                'message': f'Resumen {summary.summary_id} en proceso (ticket {summary.ticket})'
+            }
+
+        cdr = pse_response.get('cdr', {})
+        cdr_content = base64.b64decode(cdr['content']) if cdr.get('content') else None
+        parsed = self._parse_cdr(cdr_content, summary.summary_id)
+
+        if parsed:
+            status = parsed['status']
+            summary.sunat_response = self.cdr_processor.format_response(parsed)
+        else:
+            sunat_code = cdr.get('code', '5000')
+            status, default_message = self._get_status_from_code(sunat_code)
+            summary.sunat_response = f"{sunat_code}: {cdr.get('description') or default_message}"
+
+        summary.status = status
+        if cdr_content:
+            summary.cdr_path = self._save_summary_cdr_file(cdr_content, summary)
+
+        # Resumen no aceptado: las boletas vuelven a PENDING, se liberan y pasan a
+        # la cola de contingencia para enviarse una a una (igual que cuando falla
+        # el envío al PSE); el resumen de la tarea periódica solo cubre el día anterior
+        accepted = status == 'ACCEPTED'
+        sale_status = status if accepted else 'PENDING'
+
+        # Acumulado diario: mover las boletas del resumen desde su estado actual
+        DailySalesSummary.move_rows(
+            db.session.query(
+                Sale.created_at, Sale.seller_id, Sale.sunat_status, Sale.is_cancelled, Sale.total
+            ).filter(Sale.daily_summary_id == summary.id),
+            sunat_status=sale_status
+        )
+
+        # Trasladar resultado a todas las boletas del resumen (un solo UPDATE)
+        values = {
+            Sale.sunat_status: sale_status,
+            Sale.sunat_response: f"{summary.sunat_response} (Resumen {summary.summary_id}, ticket {summary.ticket})",
+            Sale.sunat_response_code: parsed['response_code'] if parsed else None,
+            Sale.sunat_notes: json.dumps(parsed['notes']) if parsed and parsed['notes'] else None
+        }
+        if accepted:
+            values[Sale.sunat_sent_at] = summary.sent_at
+            values[Sale.cdr_path] = summary.cdr_path
+        else:
+            values.update(self._release_values())
+        Sale.query.filter(Sale.daily_summary_id == summary.id).update(values, synchronize_session=False)
+
+        db.session.commit()
+
+        logger.info(
+            f"Resumen {summary.summary_id} procesado: {status} - "
+            f"{summary.line_count} boletas actualizadas"
+            + ("" if accepted else " (liberadas a la cola de contingencia)")
+        )
+
+        return {
+            'success': True,
+            'status': status,
+            'message': f'Resumen {summary.summary_id}: {summary.sunat_response}'
+        }
+
+    def _send_summary_chunk(self, reference_date, sales) -> DailySummary:
+        """
+        Generar, registrar y enviar un resumen diario
+
+        Args:
+            reference_date: Fecha de emisión de las boletas
+            sales: Ventas del resumen (máx. SUMMARY_MAX_LINES)
+
+        Returns:
+            DailySummary: Resumen con su estado final
+        """
+        issue_date = lima_today()
+        sale_ids = [sale.id for sale in sales]
+
+        summary = DailySummary(
+            summary_id=DailySummary.next_summary_id(issue_date),
+            reference_date=reference_date,
+            issue_date=issue_date,
+            line_count=len(sales),
+            total=sum((sale.total for sale in sales), Decimal('0.00')),
+            status='PENDING'
+        )
+        db.session.add(summary)
+        db.session.flush()
+
+        try:
+            xml_content = self.xml_builder.build_daily_summary(
+                summary.summary_id, reference_date, issue_date, sales
+            )
+            if self.signer.enabled:
+                xml_content, _ = self.signer.sign(xml_content)
+            summary.xml_path = self._save_summary_file(xml_content, summary)
+
+            # Reservar las boletas para este resumen antes de enviarlo
+            Sale.query.filter(Sale.id.in_(sale_ids)).update(
+                {Sale.daily_summary_id: summary.id}, synchronize_session=False
+            )
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error generando resumen diario: {e}")
+            raise
+
+        pse_response = self._send_summary_to_pse_api(xml_content, summary)
+
+        if not pse_response.get('success'):
+            # Liberar las boletas a la cola de contingencia
+            summary.status = 'ERROR'
+            summary.sunat_response = f"{pse_response.get('error_code', 'N/A')}: {pse_response.get('message')}"
+            Sale.query.filter(Sale.daily_summary_id == summary.id).update(
+                self._release_values(), synchronize_session=False
+            )
+            db.session.commit()
+            return summary
+
+        summary.ticket = pse_response.get('ticket')
+        summary.status = 'SENT'
+        summary.sent_at = datetime.utcnow()
+        db.session.commit()
+
+        logger.info(f"Resumen {summary.summary_id} enviado: {summary.line_count} boletas, ticket {summary.ticket}")
+
+        # Primera consulta del ticket; si sigue en proceso lo consulta la tarea periódica
+        self.check_daily_summary(summary.id)
+        return summary
+
+    def _release_values(self) -> dict:
+        """
+        Valores para liberar las boletas de un resumen no aceptado
+
+        Quedan fuera del resumen y en la cola de contingencia (conservando la
+        fecha de ingreso si ya estaban): drain_pse_contingency las envía una a
+        una, sin esperar a otro resumen de su día.
+        """
+        return {
+            Sale.daily_summary_id: None,
+            Sale.sunat_contingency_at: db.func.coalesce(Sale.sunat_contingency_at, datetime.utcnow())
+        }
+
+    def _send_summary_to_pse_api(self, xml_content: str, summary: DailySummary) -> dict:
+        """
+        Enviar XML del resumen diario al PSE (respuesta asíncrona con ticket)
+
+        Args:
+            xml_content: XML como string
+            summary: Resumen a enviar
+
+        Returns:
+            dict: {'success': bool, 'ticket': str} o error
+        """
+        try:
+            payload = {
+                'xml_content': base64.b64encode(xml_content.encode('utf-8')).decode('utf-8'),
+                'document_type': 'RC',
+                'summary_id': summary.summary_id,
+                'ruc': self.company_ruc,
+                'signed': self.signer.enabled
+            }
+
+            logger.info(f"Enviando resumen {summary.summary_id} a PSE: {self.api_url}")
+
+            # MODO SANDBOX: No enviar a API real, simular ticket
+            if self.sandbox_mode:
+                logger.warning(f"MODO SANDBOX ACTIVADO: Simulando ticket para {summary.summary_id}")
+                return {'success': True, 'ticket': f'SANDBOX-{summary.summary_id}'}
+
+            response = self.http.post(
+                f"{self.api_url}/summaries/send",
+                json=payload,
+                headers={
+                    'Authorization': f'Bearer {self.token}',
+                    'Content-Type': 'application/json'
+                }
+            )
+
+            if response.status_code == 200:
+                return {'success': True, 'ticket': response.json().get('ticket')}
+
+            logger.error(f"PSE error {response.status_code} para resumen {summary.summary_id}: {response.text}")
+            return {
+                'success': False,
+                'message': f'Error PSE: {response.status_code}',
+                'error_code': response.status_code
+            }
+
+        except requests.Timeout:
+            logger.error(f"Timeout al enviar resumen {summary.summary_id} a PSE")
+            return {'success': False, 'message': 'Timeout de conexión con PSE', 'error_code': 'TIMEOUT'}
+        except requests.ConnectionError:
+            logger.error(f"Error de conexión con PSE para resumen {summary.summary_id}")
+            return {'success': False, 'message': 'No se pudo conectar con PSE', 'error_code': 'CONNECTION_ERROR'}
+        except Exception as e:
+            logger.error(f"Error inesperado enviando resumen a PSE: {e}")
+            return {'success': False, 'message': str(e), 'error_code': 'UNKNOWN'}
+
+    def _get_summary_status_from_pse(self, summary: DailySummary) -> dict:
+        """
+        Consultar el estado del ticket de un resumen
+
+        Returns:
+            dict: {'success': bool, 'in_process': bool, 'cdr': dict}
+        """
+        if self.sandbox_mode:
+            return {
+                'success': True,
+                'in_process': False,
+                'cdr': {
+                    'code': '2000',
+                    'description': 'ACEPTADO (SIMULADO - MODO PRUEBA)',
+                    'content': base64.b64encode(b'MODO PRUEBA').decode('utf-8')
+                }
+            }
+
+        try:
+            response = self.http.get(
+                f"{self.api_url}/summaries/{summary.ticket}",
+                headers={'Authorization': f'Bearer {self.token}'}
+            )
+
+            if response.status_code != 200:
+                logger.error(f"Error consultando ticket {summary.ticket}: {response.status_code}")
+                return {'success': False, 'message': f'Error PSE: {response.status_code}'}
+
+            data = response.json()
+            return {
+                'success': True,
+                'in_process': data.get('status') == 'IN_PROCESS',
+                'cdr': data.get('cdr', {})
+            }
+
+        except Exception as e:
+            logger.error(f"Error consultando ticket {summary.ticket}: {e}")
+            return {'success': False, 'message': str(e)}
+
+    def _save_summary_file(self, xml_content: str, summary: DailySummary) -> str:
+        """
+        Guardar XML del resumen en storage/xml/ (RUC-RC-YYYYMMDD-N.xml)
+        """
+        xml_dir = current_app.config.get('XML_PATH')
+        os.makedirs(xml_dir, exist_ok=True)
+
+        file_path = os.path.join(xml_dir, f"{self.company_ruc}-{summary.summary_id}.xml")
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(xml_content)
+
+        logger.info(f"XML de resumen guardado: {os.path.basename(file_path)}")
+        return file_path
+
+    def _save_summary_cdr_file(self, cdr_content: bytes, summary: DailySummary) -> str:
+        """
+        Guardar CDR del resumen en storage/cdr/ (R-RUC-RC-YYYYMMDD-N.zip)
+        """
+        cdr_dir = current_app.config.get('CDR_PATH')
+        os.makedirs(cdr_dir, exist_ok=True)
+
+        file_path = os.path.join(cdr_dir, f"R-{self.company_ruc}-{summary.summary_id}.zip")
+        with open(file_path, 'wb') as f:
+            f.write(cdr_content)
+
+        logger.info(f"CDR de resumen guardado: {os.path.basename(file_path)}")
+        return file_path
+
     # ===================
     # MÉTODOS PRIVADOS
     # ===================
 
-    def _validate_sale_for_sending(self, sale: Sale) -> tuple[bool, list[str]]:
+    def _validate_sale_for_sending(self, sale: SaleBundle) -> tuple[bool, list[str]]:
         """
         Validar venta antes de enviar a SUNAT
 
@@ -320,9 +974,10 @@ class PSEService:
         5. NO es RUC 20 (empresas)
         6. Total > 0
         7. No excede límite RUS
+        8. No incluida en un resumen diario
 
         Args:
-            sale: Objeto Sale a validar
+            sale: SaleBundle a validar (items y cliente ya cargados)
 
         Returns:
             tuple: (is_valid, errors_list)
@@ -338,7 +993,7 @@ class PSEService:
             errors.append(f"Estado inválido para envío: {sale.sunat_status}")
 
         # 3. Tiene items
-        if not sale.items or sale.items.count() == 0:
+        if not sale.items:
             errors.append("Venta sin items")
 
         # 4. Cliente válido
@@ -362,21 +1017,25 @@ class PSEService:
             errors.append("Total inválido o cero")
 
         # 7. Límite RUS
-        rus_control = RUSControl.get_or_create_current()
+        rus_control = RUSControl.get_current_snapshot()
         if not rus_control.can_add_amount(sale.total):
             errors.append(
                 f"Excede límite RUS mensual. "
                 f"Disponible: S/ {rus_control.remaining_amount():.2f}"
             )
 
+        # 8. No incluida en un resumen diario
+        if sale.daily_summary_id:
+            errors.append("Boleta incluida en un resumen diario, su estado se actualiza con el ticket del resumen")
+
         return (len(errors) == 0, errors)
 
-    def _generate_xml_content(self, sale: Sale) -> str:
+    def _generate_xml_content(self, sale: SaleBundle) -> str:
         """
         Generar contenido XML UBL 2.1
 
         Args:
-            sale: Objeto Sale
+            sale: SaleBundle (items y cliente ya cargados)
 
         Returns:
             str: XML como string
@@ -385,7 +1044,7 @@ class PSEService:
 
     def _send_to_pse_api(self, xml_content: str, sale: Sale) -> dict:
         """
-        Enviar XML a PSE para firma y transmisión a SUNAT
+        Enviar XML a PSE para firma (si no viene firmado) y transmisión a SUNAT
 
         Args:
             xml_content: XML como string
@@ -410,7 +1069,8 @@ class PSEService:
                 'serie': serie,
                 'numero': numero,
                 'correlative': sale.correlative,
-                'ruc': self.company_ruc
+                'ruc': self.company_ruc,
+                'signed': self.signer.enabled  # Firmado localmente: el PSE solo transmite
             }
 
             logger.info(f"Enviando boleta {sale.correlative} a PSE: {self.api_url}")
@@ -429,15 +1089,14 @@ class PSEService:
                     'sunat_message': 'La Boleta ha sido aceptada (MOCK)'
                 }
 
-            # Enviar a PSE
-            response = requests.post(
+            # Enviar a PSE (sesión persistente: sin handshake TCP/TLS por boleta)
+            response = self.http.post(
                 f"{self.api_url}/invoices/send",
                 json=payload,
                 headers={
                     'Authorization': f'Bearer {self.token}',
                     'Content-Type': 'application/json'
-                },
-                timeout=self.timeout
+                }
             )
 
             if response.status_code == 200:
@@ -460,6 +1119,13 @@ class PSEService:
                     'error_code': response.status_code
                 }
 
+        except PSECircuitOpenError:
+            logger.warning(f"Circuito PSE abierto, no se envía {sale.correlative}")
+            return {
+                'success': False,
+                'message': 'PSE no disponible (circuito abierto)',
+                'error_code': 'CIRCUIT_OPEN'
+            }
         except requests.Timeout:
             logger.error(f"Timeout al enviar {sale.correlative} a PSE")
             return {
@@ -513,23 +1179,32 @@ class PSEService:
             logger.error(f"Error guardando XML: {e}")
             raise
 
-    def _process_cdr_response(self, cdr_response: dict, sale: Sale) -> bool:
+    def _process_cdr_response(self, cdr_response: dict, sale: Sale, cdr_content: bytes = None) -> bool:
         """
         Procesar respuesta CDR de SUNAT
 
-        CDR contiene:
-        - Código respuesta (2000, 2001, 4xxx, 5xxx)
-        - Descripción
-        - Hash del documento
+        Si llega el ZIP del CDR, el estado sale del ApplicationResponse
+        (ResponseCode, Description y observaciones); si no es legible, del
+        resumen JSON del PSE.
 
         Args:
-            cdr_response: Dict con respuesta CDR
+            cdr_response: Dict con respuesta CDR del PSE (code, description)
             sale: Objeto Sale
+            cdr_content: ZIP del CDR ya decodificado (opcional)
 
         Returns:
-            bool: True si procesado exitosamente
+            bool: True si la boleta fue aceptada
         """
         try:
+            cdr = self._parse_cdr(cdr_content, sale.correlative)
+            if cdr:
+                self._update_sale_status(sale, cdr['status'], {
+                    'code': cdr['response_code'],
+                    'message': cdr['description'] or 'Sin descripción'
+                })
+                self._apply_cdr(sale, cdr)
+                return cdr['status'] == 'ACCEPTED'
+
             sunat_code = cdr_response.get('code', '5000')
             sunat_message = cdr_response.get('description', 'Sin respuesta')
 
@@ -548,6 +1223,37 @@ class PSEService:
             logger.error(f"Error procesando CDR: {e}")
             return False
 
+    def _parse_cdr(self, cdr_content, reference):
+        """Leer el CDR en memoria; None si no hay contenido o no es legible"""
+        if not cdr_content:
+            return None
+        try:
+            return self.cdr_processor.parse(cdr_content)
+        except ValueError as e:
+            logger.warning(f"CDR de {reference} no legible, se usa la respuesta del PSE: {e}")
+            return None
+
+    def _apply_cdr(self, sale: Sale, cdr: dict):
+        """Guardar código, observaciones y estado del CDR leído en la venta"""
+        sale.set_sunat_status(cdr['status'])
+        sale.sunat_response = self.cdr_processor.format_response(cdr)
+        sale.sunat_response_code = cdr['response_code']
+        sale.sunat_notes = json.dumps(cdr['notes']) if cdr['notes'] else None
+
+    def _read_cdr_file(self, cdr_path):
+        """CDR leído desde disco (una lectura); 'MISSING' o None si no es legible"""
+        if not os.path.exists(cdr_path):
+            return 'MISSING'
+
+        with open(cdr_path, 'rb') as f:
+            content = f.read()
+
+        try:
+            return self.cdr_processor.parse(content)
+        except ValueError as e:
+            logger.warning(f"CDR {os.path.basename(cdr_path)} no legible: {e}")
+            return None
+
     def _save_cdr_file(self, cdr_content: bytes, sale: Sale) -> str:
         """
         Guardar CDR en storage/cdr/
@@ -579,6 +1285,26 @@ class PSEService:
             logger.error(f"Error guardando CDR: {e}")
             raise
 
+    def _is_pse_unavailable(self, pse_response: dict) -> bool:
+        """Error de transporte o 5xx del PSE (no un rechazo del comprobante)"""
+        error_code = pse_response.get('error_code')
+        if error_code in self.CONTINGENCY_ERROR_CODES:
+            return True
+        return isinstance(error_code, int) and error_code >= 500
+
+    def _park_in_contingency(self, sale: Sale, reason: str):
+        """
+        Dejar la venta PENDING en la cola de contingencia
+
+        Conserva la fecha de ingreso original para drenar en orden.
+        """
+        if sale.sunat_contingency_at is None:
+            sale.sunat_contingency_at = datetime.utcnow()
+        sale.set_sunat_status('PENDING')
+        sale.sunat_response = f"CONTINGENCIA: {reason}"
+
+        logger.warning(f"Boleta {sale.correlative} en contingencia: {reason}")
+
     def _update_sale_status(self, sale: Sale, status: str, response: dict):
         """
         Actualizar estado SUNAT de la venta
@@ -588,7 +1314,7 @@ class PSEService:
             status: Nuevo estado (PENDING|ACCEPTED|REJECTED|ERROR)
             response: Dict con información de respuesta
         """
-        sale.sunat_status = status
+        sale.set_sunat_status(status)
         sale.sunat_response = f"{response.get('code', 'N/A')}: {response.get('message', 'Sin mensaje')}"
         sale.sunat_sent_at = datetime.utcnow()
 
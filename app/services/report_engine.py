@@ -0,0 +1,309 @@
+"""
+Motor de reportes del módulo Reportes
+Top de productos, vendedores, horas y uso RUS desde los acumulados diarios, con comparación de periodos y caché
+"""
+import time
+from datetime import date, timedelta
+from flask import current_app
+from loguru import logger
+
+from app import db, cache
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.daily_product_sales import DailyProductSales
+from app.models.product import Product
+from app.models.rus_control import RUSControl
+from app.models.user import User
+from app.utils.helpers import lima_today
+
+
+class ReportService:
+    """
+    Reportes de un periodo de días de Lima comparados con el periodo anterior
+
+    El periodo anterior termina el día previo al inicio: si el periodo son
+    meses completos, son los mismos meses inmediatamente anteriores (un mes
+    contra el mes previo, un año contra el año previo); si no, la misma
+    cantidad de días.
+
+    Los reportes leen los acumulados diarios (DailySalesSummary,
+    DailyProductSales), así que el costo depende de días × productos o
+    vendedores, no de las líneas vendidas. Totales, vendedores y horas
+    suman ambos periodos en una sola consulta con CASE; el top de
+    productos ordena solo el periodo actual y consulta el anterior para
+    los productos del top. El uso RUS sale de rus_control (ya es mensual).
+
+    Los resultados se cachean por reporte y periodo: REPORTS_CACHE_TIMEOUT
+    para periodos cerrados, REPORTS_CACHE_TIMEOUT_OPEN si incluyen hoy.
+    """
+
+    REPORTS = ('summary', 'top_products', 'sellers', 'hours', 'rus')
+
+    def __init__(self, start_date, end_date):
+        """
+        Args:
+            start_date: Primer día (Lima)
+            end_date: Último día, inclusive
+        """
+        if end_date < start_date:
+            raise ValueError("La fecha final debe ser igual o posterior a la inicial")
+
+        self.start_date = start_date
+        self.end_date = end_date
+        self.previous_end = start_date - timedelta(days=1)
+        if start_date.day == 1 and (end_date + timedelta(days=1)).day == 1:
+            year, month = self._shift_month(
+                (start_date.year, start_date.month), -len(self._months(start_date, end_date))
+            )
+            self.previous_start = date(year, month, 1)
+        else:
+            self.previous_start = self.previous_end - (end_date - start_date)
+
+        self.limit_cat2 = current_app.config.get('RUS_LIMIT_CATEGORY_2', 8000.00)
+        self.cache_timeout = current_app.config.get(
+            'REPORTS_CACHE_TIMEOUT_OPEN' if end_date >= lima_today() else 'REPORTS_CACHE_TIMEOUT', 60
+        )
+
+    @staticmethod
+    def month_period(year, month) -> tuple[date, date]:
+        """Primer y último día de un mes"""
+        first = date(year, month, 1)
+        following = date(year + (month == 12), month % 12 + 1, 1)
+        return first, following - timedelta(days=1)
+
+    def run(self, name, **options) -> dict:
+        """
+        Ejecutar un reporte (desde caché si está disponible)
+
+        Args:
+            name: Uno de REPORTS
+            **options: Opciones del reporte (top_products: limit)
+
+        Returns:
+            dict: {
+                'name': str,
+                'from': str, 'to': str,
+                'previous_from': str, 'previous_to': str,
+                'rows': list[dict],
+                'elapsed_ms': float  # Tiempo de cálculo (no de lectura de caché)
+            }
+        """
+        if name not in self.REPORTS:
+            raise ValueError(f"Reporte desconocido: {name}")
+
+        option_key = ':'.join(f'{key}={value}' for key, value in sorted(options.items()))
+        cache_key = f'report:{name}:{self.start_date.isoformat()}:{self.end_date.isoformat()}:{option_key}'
+        result = cache.get(cache_key)
+        if result is not None:
+            return result
+
+        started = time.perf_counter()
+        rows = getattr(self, f'_report_{name}')(**options)
+        result = {
+            'name': name,
+            'from': self.start_date.isoformat(),
+            'to': self.end_date.isoformat(),
+            'previous_from': self.previous_start.isoformat(),
+            'previous_to': self.previous_end.isoformat(),
+            'rows': rows,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+        logger.debug(f"Reporte {name} {self.start_date} a {self.end_date}: {result['elapsed_ms']} ms")
+        cache.set(cache_key, result, timeout=self.cache_timeout)
+        return result
+
+    def run_all(self, top_limit=20) -> dict:
+        """Todos los reportes del periodo: {nombre: resultado de run}"""
+        return {
+            name: self.run(name, limit=top_limit) if name == 'top_products' else self.run(name)
+            for name in self.REPORTS
+        }
+
+    # ===================
+    # REPORTES
+    # ===================
+
+    def _report_summary(self):
+        """Totales del periodo (ventas no anuladas)"""
+        summary = DailySalesSummary
+        current, previous = self._period_case(summary.day)
+        accepted = summary.sunat_status == 'ACCEPTED'
+
+        row = db.session.query(
+            db.func.sum(db.case((current, summary.sale_count), else_=0)),
+            db.func.sum(db.case((previous, summary.sale_count), else_=0)),
+            db.func.sum(db.case((current, summary.total), else_=0)),
+            db.func.sum(db.case((previous, summary.total), else_=0)),
+            db.func.sum(db.case((db.and_(current, accepted), summary.total), else_=0)),
+            db.func.sum(db.case((db.and_(previous, accepted), summary.total), else_=0))
+        ).filter(*self._range(summary.day), summary.is_cancelled == False).one()
+
+        result = self._metrics(row, ('sale_count', 'total', 'accepted_total'))
+        result['average_ticket'] = round(result['total'] / result['sale_count'], 2) if result['sale_count'] else 0
+        return [result]
+
+    def _report_top_products(self, limit=20):
+        """Productos con mayor monto vendido en el periodo"""
+        sales = DailyProductSales
+        amount = db.func.sum(sales.amount)
+
+        # Ranking solo con el periodo actual; el anterior, solo para los productos del top
+        top = db.session.query(
+            sales.product_id, db.func.sum(sales.quantity), amount
+        ).filter(
+            sales.day >= self.start_date, sales.day <= self.end_date
+        ).group_by(sales.product_id).having(amount > 0).order_by(amount.desc()).limit(limit).all()
+        if not top:
+            return []
+
+        product_ids = [product_id for product_id, _, _ in top]
+        previous = {
+            product_id: (quantity, previous_amount)
+            for product_id, quantity, previous_amount in db.session.query(
+                sales.product_id, db.func.sum(sales.quantity), amount
+            ).filter(
+                sales.product_id.in_(product_ids),
+                sales.day >= self.previous_start, sales.day <= self.previous_end
+            ).group_by(sales.product_id)
+        }
+        products = {
+            product.id: product
+            for product in Product.query.filter(Product.id.in_(product_ids))
+        }
+
+        rows = []
+        for product_id, quantity, current_amount in top:
+            previous_quantity, previous_amount = previous.get(product_id, (0, 0))
+            product = products.get(product_id)
+            rows.append({
+                'product_id': product_id,
+                'name': product.name if product else None,
+                'sku': product.sku if product else None,
+                **self._metrics(
+                    (quantity, previous_quantity, current_amount, previous_amount), ('quantity', 'amount')
+                )
+            })
+        return rows
+
+    def _report_sellers(self):
+        """Ventas por vendedor"""
+        summary = DailySalesSummary
+        current, previous = self._period_case(summary.day)
+        total = db.func.sum(db.case((current, summary.total), else_=0))
+
+        rows = db.session.query(
+            summary.seller_id,
+            User.full_name,
+            db.func.sum(db.case((current, summary.sale_count), else_=0)),
+            db.func.sum(db.case((previous, summary.sale_count), else_=0)),
+            total,
+            db.func.sum(db.case((previous, summary.total), else_=0))
+        ).join(User, User.id == summary.seller_id).filter(
+            *self._range(summary.day), summary.is_cancelled == False
+        ).group_by(summary.seller_id, User.full_name).order_by(total.desc()).all()
+
+        return [
+            {'seller_id': seller_id, 'seller': seller, **self._metrics(values, ('sale_count', 'total'))}
+            for seller_id, seller, *values in rows
+        ]
+
+    def _report_hours(self):
+        """Ventas por hora del día (Lima), las 24 horas"""
+        summary = DailySalesSummary
+        current, previous = self._period_case(summary.day)
+
+        rows = db.session.query(
+            summary.hour,
+            db.func.sum(db.case((current, summary.sale_count), else_=0)),
+            db.func.sum(db.case((previous, summary.sale_count), else_=0)),
+            db.func.sum(db.case((current, summary.total), else_=0)),
+            db.func.sum(db.case((previous, summary.total), else_=0))
+        ).filter(
+            *self._range(summary.day), summary.is_cancelled == False
+        ).group_by(summary.hour).all()
+
+        by_hour = {hour: values for hour, *values in rows}
+        return [
+            {'hour': hour, **self._metrics(by_hour.get(hour, (0, 0, 0, 0)), ('sale_count', 'total'))}
+            for hour in range(24)
+        ]
+
+    def _report_rus(self):
+        """Uso mensual del límite RUS, cada mes contra el mes equivalente del periodo anterior"""
+        months = self._months(self.start_date, self.end_date)
+        offset = len(months)
+        wanted = months + [self._shift_month(month, -offset) for month in months]
+
+        # Una fila por mes: basta filtrar por años y descartar los meses fuera del rango
+        controls = {
+            (control.year, control.month): control
+            for control in RUSControl.query.filter(
+                RUSControl.year.between(min(wanted)[0], max(wanted)[0])
+            )
+        }
+
+        rows = []
+        for month in months:
+            control = controls.get(month)
+            before = controls.get(self._shift_month(month, -offset))
+            values = (
+                control.total_invoiced if control else 0,
+                before.total_invoiced if before else 0,
+                control.transaction_count if control else 0,
+                before.transaction_count if before else 0
+            )
+            row = {
+                'month': f'{month[0]:04d}-{month[1]:02d}',
+                **self._metrics(values, ('total_invoiced', 'transaction_count')),
+                'alert_level': control.alert_level if control else 'GREEN',
+                'is_blocked': control.is_blocked if control else False
+            }
+            row['usage_percentage'] = round(row['total_invoiced'] / float(self.limit_cat2) * 100, 2)
+            rows.append(row)
+        return rows
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _range(self, day_column):
+        """Filtro de días: periodo anterior + periodo actual (contiguos)"""
+        return (day_column >= self.previous_start, day_column <= self.end_date)
+
+    def _period_case(self, day_column):
+        """Condiciones (actual, anterior) para sumar ambos periodos en la misma consulta"""
+        return day_column >= self.start_date, day_column <= self.previous_end
+
+    @staticmethod
+    def _metrics(values, names) -> dict:
+        """
+        (actual, anterior) por métrica -> {m, m_previous, m_change}
+
+        m_change es la variación porcentual respecto al periodo anterior
+        (None si el periodo anterior es 0).
+        """
+        values = list(values)
+        result = {}
+        for index, name in enumerate(names):
+            current = float(values[index * 2] or 0)
+            previous = float(values[index * 2 + 1] or 0)
+            result[name] = round(current, 2)
+            result[f'{name}_previous'] = round(previous, 2)
+            result[f'{name}_change'] = round((current - previous) / previous * 100, 1) if previous else None
+        return result
+
+    @staticmethod
+    def _months(start_date, end_date) -> list[tuple]:
+        """Meses (año, mes) que cubre el rango"""
+        months = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            months.append((year, month))
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return months
+
+    @staticmethod
+    def _shift_month(month, offset) -> tuple:
+        """(año, mes) desplazado offset meses"""
+        index = month[0] * 12 + month[1] - 1 + offset
+        return index // 12, index % 12 + 1
@@ -0,0 +1,99 @@
+"""
+Carga ansiosa de ventas para generación de documentos
+Venta + cliente + vendedor + items en dos consultas, compartida por validación, XML, PDF y JSON
+"""
+from app import db
+from app.models.sale import Sale, SaleItem
+
+
+class SaleBundle:
+    """
+    Venta con su cliente, vendedor e items ya cargados (solo lectura)
+
+    Sale.items es una relación dinámica (cada acceso es una consulta y no
+    admite joinedload/selectinload): el bundle carga las ventas con cliente
+    y vendedor en una consulta (joinedload) y los items de todas ellas en
+    otra.
+
+    Los campos de la venta se leen a través del bundle (bundle.correlative,
+    bundle.total...), así que XMLBuilder y PDFService lo usan igual que un
+    Sale. El bundle es inmutable; los cambios de estado, rutas o hash se
+    escriben en bundle.sale.
+    """
+
+    __slots__ = ('sale', 'customer', 'seller', 'items')
+
+    def __init__(self, sale, items):
+        object.__setattr__(self, 'sale', sale)
+        object.__setattr__(self, 'customer', sale.customer)
+        object.__setattr__(self, 'seller', sale.seller)
+        object.__setattr__(self, 'items', tuple(items))
+
+    def __getattr__(self, name):
+        return getattr(self.sale, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"SaleBundle es de solo lectura: asignar {name} en bundle.sale")
+
+    def __repr__(self):
+        return f'<SaleBundle {self.sale.correlative} ({len(self.items)} items)>'
+
+    @classmethod
+    def load(cls, sale_id):
+        """
+        Cargar una venta con cliente, vendedor e items (2 consultas)
+
+        Args:
+            sale_id: ID de la venta
+
+        Returns:
+            SaleBundle | None: None si la venta no existe
+        """
+        bundles = cls.from_query(Sale.query.filter(Sale.id == sale_id))
+        return bundles[0] if bundles else None
+
+    @classmethod
+    def load_many(cls, sale_ids):
+        """
+        Cargar varias ventas (2 consultas en total)
+
+        Args:
+            sale_ids: IDs de las ventas
+
+        Returns:
+            list[SaleBundle]: Ordenados por ID
+        """
+        if not sale_ids:
+            return []
+        return cls.from_query(Sale.query.filter(Sale.id.in_(sale_ids)).order_by(Sale.id))
+
+    @classmethod
+    def from_query(cls, query):
+        """
+        Cargar las ventas de una consulta de Sale con sus relaciones
+
+        Args:
+            query: Sale.query con los filtros y orden deseados
+
+        Returns:
+            list[SaleBundle]: En el orden de la consulta
+        """
+        sales = query.options(
+            db.joinedload(Sale.customer),
+            db.joinedload(Sale.seller)
+        ).all()
+        if not sales:
+            return []
+
+        items_by_sale = {}
+        items = SaleItem.query.filter(
+            SaleItem.sale_id.in_([sale.id for sale in sales])
+        ).order_by(SaleItem.id)
+        for item in items:
+            items_by_sale.setdefault(item.sale_id, []).append(item)
+
+        return [cls(sale, items_by_sale.get(sale.id, ())) for sale in sales]
+
+    def to_dict(self):
+        """Sale.to_dict() sin consultas adicionales"""
+        return self.sale.to_dict(items=self.items)
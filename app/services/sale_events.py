@@ -0,0 +1,120 @@
+"""
+Eventos de estado SUNAT de ventas
+Publicación desde los workers de Celery vía Redis pub/sub y stream SSE para el POS
+"""
+import json
+import time
+import redis
+from flask import current_app
+from loguru import logger
+
+from app.utils.redis_client import get_redis_client
+
+
+class SaleEventService:
+    """
+    Canal de eventos por venta: izisales:sale:<id>
+
+    Eventos:
+    - status: {'sale_id', 'sunat_status', 'message', 'final'}
+    - pdf: {'sale_id', 'has_pdf', 'message', 'final'}
+
+    'final' indica que no habrá más eventos para el envío en curso y el
+    stream SSE se cierra.
+
+    Cada conexión dura como máximo SUNAT_EVENTS_STREAM_TIMEOUT, por debajo
+    del timeout del worker de gunicorn: al cortarse sin evento final el
+    EventSource reconecta (retry: SUNAT_EVENTS_RECONNECT_MS) y recibe de
+    nuevo el estado actual, así que no se pierden transiciones.
+    """
+
+    CHANNEL = 'izisales:sale:{sale_id}'
+
+    def __init__(self):
+        """Inicializar servicio con configuración de Redis y SSE"""
+        self.redis_url = current_app.config.get('REDIS_URL')
+        self.stream_timeout = current_app.config.get('SUNAT_EVENTS_STREAM_TIMEOUT', 20)
+        self.reconnect_ms = current_app.config.get('SUNAT_EVENTS_RECONNECT_MS', 1000)
+        self.heartbeat = current_app.config.get('SUNAT_EVENTS_HEARTBEAT', 10)
+
+    def publish(self, sale_id: int, event: str, **data) -> bool:
+        """
+        Publicar un evento de la venta
+
+        Un fallo de Redis no interrumpe el envío: el POS puede consultar
+        /pos/check-sunat-status como respaldo.
+
+        Args:
+            sale_id: ID de la venta
+            event: Nombre del evento (status, pdf)
+            **data: Datos del evento
+
+        Returns:
+            bool: True si se publicó
+        """
+        message = json.dumps({'event': event, 'sale_id': sale_id, **data})
+        try:
+            get_redis_client(self.redis_url).publish(self.CHANNEL.format(sale_id=sale_id), message)
+            return True
+        except redis.RedisError as e:
+            logger.warning(f"No se pudo publicar evento {event} de venta {sale_id}: {e}")
+            return False
+
+    def stream(self, sale_id: int, snapshot):
+        """
+        Generador SSE con los eventos de la venta (una conexión)
+
+        Se suscribe antes de leer el estado actual para no perder una
+        transición publicada entre ambas operaciones.
+
+        Args:
+            sale_id: ID de la venta
+            snapshot: Función que retorna (event, data) con el estado actual
+
+        Yields:
+            str: Mensajes en formato text/event-stream
+        """
+        pubsub = None
+        try:
+            pubsub = get_redis_client(self.redis_url).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.CHANNEL.format(sale_id=sale_id))
+        except redis.RedisError as e:
+            logger.warning(f"Stream SSE de venta {sale_id} sin Redis: {e}")
+            pubsub = None
+
+        try:
+            event, data = snapshot()
+            yield f"retry: {self.reconnect_ms}\n" + self._format(event, data)
+
+            if data.get('final') or pubsub is None:
+                return
+
+            deadline = time.monotonic() + self.stream_timeout
+            while time.monotonic() < deadline:
+                message = pubsub.get_message(timeout=min(self.heartbeat, max(deadline - time.monotonic(), 0)))
+                if message is None:
+                    yield ': ping\n\n'
+                    continue
+
+                data = json.loads(message['data'])
+                yield self._format(data.pop('event'), data)
+                if data.get('final'):
+                    return
+
+            # Fin de la conexión sin evento final: el navegador reconecta
+
+        except redis.RedisError as e:
+            logger.warning(f"Stream SSE de venta {sale_id} interrumpido: {e}")
+            yield self._format('timeout', {'sale_id': sale_id, 'final': True})
+
+        finally:
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except redis.RedisError:
+                    pass
+
+    @staticmethod
+    def _format(event, data):
+        """Serializar un evento SSE"""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,194 @@
+"""
+Servicio de registro de ventas
+Unidad de trabajo que confirma la venta completa en una sola transacción
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from flask import current_app
+from loguru import logger
+
+from app import db
+from app.models.sale import Sale, SaleItem
+from app.models.customer import Customer
+from app.models.rus_control import RUSControl
+from app.models.audit_log import AuditLog
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.daily_product_sales import DailyProductSales
+from app.services.correlative_allocator import correlative_allocator
+
+
+class SaleService:
+    """
+    Registro de ventas del POS
+
+    Correlativo, control RUS, venta con sus items, acumulados diarios y
+    audit log se escriben en la misma transacción con un único commit: o se
+    confirma todo o nada.
+    """
+
+    def __init__(self):
+        """Inicializar servicio con límites RUS"""
+        self.limit_cat1 = current_app.config.get('RUS_LIMIT_CATEGORY_1', 5000.00)
+        self.limit_cat2 = current_app.config.get('RUS_LIMIT_CATEGORY_2', 8000.00)
+        correlative_allocator.block_size = current_app.config.get('CORRELATIVE_BLOCK_SIZE', 1)
+
+    def create_sale(self, customer_data: dict, sale_lines: list, seller_id: int,
+                    ip_address: str = None, user_agent: str = None) -> dict:
+        """
+        Registrar una venta con un único commit
+
+        Args:
+            customer_data: Datos del cliente enviados por el POS
+            sale_lines: Líneas ya resueltas contra productos locales
+                        (product_id, name, sku, quantity, unit_price, subtotal)
+            seller_id: ID del vendedor
+            ip_address: Dirección IP del usuario
+            user_agent: User agent del navegador
+
+        Returns:
+            dict: {
+                'success': bool,
+                'sale_id': int,
+                'correlative': str,
+                'total': Decimal,
+                'message': str
+            }
+        """
+        correlative = None
+
+        try:
+            # Calcular totales (precio ya incluye IGV)
+            total = sum(line['subtotal'] for line in sale_lines)
+
+            # Calcular IGV (usando el total que ya lo incluye)
+            # total = subtotal * 1.18 => subtotal = total / 1.18
+            subtotal = (total / Decimal('1.18')).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            tax = total - subtotal
+
+            # Verificar límite RUS (copia en caché; el UPDATE final lo garantiza)
+            rus_control = RUSControl.get_current_snapshot()
+
+            if not rus_control.can_add_amount(total, self.limit_cat2):
+                return self._rus_limit_error(rus_control)
+
+            customer = self._get_or_create_customer(customer_data)
+
+            # Asignar correlativo (bloqueo de fila o bloque reservado por proceso)
+            correlative = correlative_allocator.allocate('BOLETA')
+            if not correlative:
+                db.session.rollback()
+                return {
+                    'success': False,
+                    'message': 'No hay correlativo activo para boletas'
+                }
+
+            # Crear venta
+            sale = Sale(
+                correlative=correlative,
+                document_type='BOLETA',
+                customer_id=customer.id,
+                seller_id=seller_id,
+                subtotal=subtotal,
+                tax=tax,
+                total=total,
+                sunat_status='PENDING'
+            )
+            db.session.add(sale)
+            db.session.flush()
+
+            # Crear items de venta (snapshot ya resuelto)
+            for line in sale_lines:
+                db.session.add(SaleItem(
+                    sale_id=sale.id,
+                    product_id=line['product_id'],
+                    product_name=line['name'],
+                    product_sku=line['sku'],
+                    quantity=line['quantity'],
+                    unit_price=line['unit_price'],
+                    subtotal=line['subtotal']
+                ))
+
+            # Primera venta del mes: crear la fila en esta transacción (solo flush)
+            if rus_control.id is None:
+                RUSControl.get_or_create_current(commit=False)
+
+            # Actualizar control RUS con UPDATE atómico (falla si supera el límite)
+            if not RUSControl.add_amount(rus_control.year, rus_control.month, total,
+                                         self.limit_cat1, self.limit_cat2, enforce_limit=True):
+                db.session.rollback()
+                correlative_allocator.release(correlative)
+                RUSControl.invalidate_snapshot()
+                return self._rus_limit_error(RUSControl.get_current_snapshot())
+
+            # Acumulados diarios (dashboard y reportes)
+            DailySalesSummary.record(sale)
+            DailyProductSales.record(sale.created_at, [
+                (line['product_id'], line['quantity'], line['subtotal']) for line in sale_lines
+            ])
+
+            # Registrar en audit log
+            AuditLog.log_action(
+                user_id=seller_id,
+                action='sale_created',
+                entity_type='sale',
+                entity_id=sale.id,
+                details=f'Venta {correlative} - Total: S/ {total:.2f}',
+                ip_address=ip_address,
+                user_agent=user_agent,
+                commit=False
+            )
+
+            # Único commit de la unidad de trabajo
+            db.session.commit()
+            RUSControl.invalidate_snapshot()
+
+            logger.info(f"Venta {correlative} registrada - Total: S/ {total:.2f}")
+
+            return {
+                'success': True,
+                'sale_id': sale.id,
+                'correlative': correlative,
+                'total': total,
+                'message': f'Venta {correlative} registrada exitosamente'
+            }
+
+        except Exception:
+            db.session.rollback()
+            correlative_allocator.release(correlative)
+            raise
+
+    def _rus_limit_error(self, rus_control) -> dict:
+        """Respuesta de límite RUS excedido"""
+        return {
+            'success': False,
+            'message': f'Límite RUS excedido. Disponible: S/ {rus_control.remaining_amount(self.limit_cat2):.2f}'
+        }
+
+    def _get_or_create_customer(self, customer_data: dict) -> Customer:
+        """
+        Buscar o crear el cliente de la venta (sin commit)
+
+        Args:
+            customer_data: Datos del cliente enviados por el POS
+
+        Returns:
+            Customer: Cliente existente o recién agregado a la sesión
+        """
+        document_number = customer_data.get('document_number')
+
+        customer = Customer.query.filter_by(
+            document_number=document_number
+        ).first()
+
+        if not customer:
+            customer = Customer(
+                document_type=customer_data.get('document_type'),
+                document_number=document_number,
+                name=customer_data.get('full_name'),
+                email=customer_data.get('email'),
+                phone=customer_data.get('phone'),
+                address=customer_data.get('address')
+            )
+            db.session.add(customer)
+            db.session.flush()  # Para obtener el ID
+
+        return customer
@@ -0,0 +1,188 @@
+"""
+Reportes de ventas por rango de días
+Agregación en SQL (GROUP BY) sobre el rango UTC de días de Lima, sin cargar objetos Sale
+"""
+import itertools
+from decimal import Decimal
+
+from app import db
+from app.models.sale import Sale
+from app.models.user import User
+from app.models.daily_sales_summary import DailySalesSummary
+from app.utils.helpers import lima_day_bounds
+
+
+class SalesReportService:
+    """
+    Reporte de ventas (no anuladas) de uno o varios días de Lima
+
+    Todas las consultas filtran por created_at >= inicio AND created_at < fin
+    (rango UTC del día de Lima, usa el índice de created_at) y agrupan en
+    SQL: cada consulta devuelve a lo sumo unas decenas de filas, sin
+    importar cuántas ventas tenga el rango.
+
+    Los desgloses (vendedor, hora, día) son generadores: se leen por
+    bloques del cursor y se entregan fila a fila.
+    """
+
+    STATUSES = ('ACCEPTED', 'REJECTED', 'ERROR', 'PENDING')
+
+    def __init__(self, start_date, end_date=None):
+        """
+        Args:
+            start_date: Primer día (Lima)
+            end_date: Último día, inclusive (default: start_date)
+        """
+        self.start_date = start_date
+        self.end_date = end_date or start_date
+        self.start, _ = lima_day_bounds(self.start_date)
+        _, self.end = lima_day_bounds(self.end_date)
+
+    def build(self) -> dict:
+        """
+        Reporte completo del rango
+
+        Returns:
+            dict: Totales por estado (ver status_totals) más 'from', 'to',
+                  'by_day', 'by_seller' y 'by_hour'
+        """
+        return {
+            'from': self.start_date.isoformat(),
+            'to': self.end_date.isoformat(),
+            **self.status_totals(),
+            'by_day': list(self.iter_by_day()),
+            'by_seller': list(self.iter_by_seller()),
+            'by_hour': list(self.iter_by_hour())
+        }
+
+    def status_totals(self) -> dict:
+        """
+        Totales del rango con un único GROUP BY sunat_status
+
+        Returns:
+            dict: {
+                'total': int,
+                'accepted': int,
+                'rejected': int,
+                'error': int,
+                'pending': int,
+                'success_rate': float,
+                'total_facturado': float  # Solo aceptadas
+            }
+        """
+        rows = db.session.query(
+            Sale.sunat_status,
+            db.func.count(Sale.id),
+            db.func.sum(Sale.total)
+        ).filter(*self._filters()).group_by(Sale.sunat_status)
+
+        return self._fold(rows)
+
+    def iter_by_seller(self):
+        """
+        Totales por vendedor (GROUP BY seller_id, sunat_status)
+
+        Yields:
+            dict: {'seller_id', 'seller', **totales por estado}
+        """
+        statement = db.select(
+            Sale.seller_id,
+            User.full_name,
+            Sale.sunat_status,
+            db.func.count(Sale.id),
+            db.func.sum(Sale.total)
+        ).join(User, User.id == Sale.seller_id).where(
+            *self._filters()
+        ).group_by(
+            Sale.seller_id, User.full_name, Sale.sunat_status
+        ).order_by(Sale.seller_id)
+
+        for (seller_id, seller), rows in self._grouped(statement, 2):
+            yield {'seller_id': seller_id, 'seller': seller, **self._fold(rows)}
+
+    def iter_by_hour(self):
+        """
+        Totales por hora del día en Lima (GROUP BY hora, sunat_status)
+
+        Yields:
+            dict: {'hour': int (0-23), **totales por estado}
+        """
+        hour = DailySalesSummary.lima_hour(Sale.created_at).label('hour')
+        statement = db.select(
+            hour,
+            Sale.sunat_status,
+            db.func.count(Sale.id),
+            db.func.sum(Sale.total)
+        ).where(*self._filters()).group_by(hour, Sale.sunat_status).order_by(hour)
+
+        for (lima_hour,), rows in self._grouped(statement, 1):
+            yield {'hour': int(lima_hour), **self._fold(rows)}
+
+    def iter_by_day(self):
+        """
+        Totales por día desde el acumulado diario (DailySalesSummary)
+
+        Yields:
+            dict: {'day': str, **totales por estado}
+        """
+        statement = db.select(
+            DailySalesSummary.day,
+            DailySalesSummary.sunat_status,
+            db.func.sum(DailySalesSummary.sale_count),
+            db.func.sum(DailySalesSummary.total)
+        ).where(
+            DailySalesSummary.day >= self.start_date,
+            DailySalesSummary.day <= self.end_date,
+            DailySalesSummary.is_cancelled == False
+        ).group_by(
+            DailySalesSummary.day, DailySalesSummary.sunat_status
+        ).order_by(DailySalesSummary.day)
+
+        for (day,), rows in self._grouped(statement, 1):
+            yield {'day': day.isoformat(), **self._fold(rows)}
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _filters(self):
+        """Rango UTC de los días de Lima (sargable) y ventas no anuladas"""
+        return (
+            Sale.created_at >= self.start,
+            Sale.created_at < self.end,
+            Sale.is_cancelled == False
+        )
+
+    @staticmethod
+    def _grouped(statement, key_size):
+        """
+        Ejecutar leyendo el cursor por bloques y agrupar filas consecutivas
+
+        Cada fila es (*clave, sunat_status, count, sum); la consulta debe
+        venir ordenada por la clave.
+        """
+        result = db.session.execute(statement.execution_options(yield_per=500))
+        for key, rows in itertools.groupby(result, key=lambda row: tuple(row[:key_size])):
+            yield key, (tuple(row[key_size:]) for row in rows)
+
+    @classmethod
+    def _fold(cls, rows) -> dict:
+        """(sunat_status, count, sum) por estado -> totales del reporte"""
+        counts = dict.fromkeys(cls.STATUSES, 0)
+        accepted_amount = Decimal('0.00')
+
+        for status, count, amount in rows:
+            counts[status] = counts.get(status, 0) + int(count or 0)
+            if status == 'ACCEPTED':
+                accepted_amount += Decimal(amount or 0)
+
+        total = sum(counts.values())
+        return {
+            'total': total,
+            'accepted': counts['ACCEPTED'],
+            'rejected': counts['REJECTED'],
+            'error': counts['ERROR'],
+            'pending': counts['PENDING'],
+            'success_rate': round(counts['ACCEPTED'] / total * 100, 2) if total else 0,
+            'total_facturado': float(accepted_amount.quantize(Decimal('0.01')))
+        }
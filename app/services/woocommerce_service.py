@@ -1,17 +1,33 @@
 """
 Servicio de integración con WooCommerce
 """
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
 from woocommerce import API
+from woocommerce.oauth import OAuth
 from flask import current_app
 from app import db, cache
 from app.models.product import Product
-from datetime import datetime
+from app.models.sync_state import SyncState
+from app.services.product_search_index import product_index
+from app.services.product_sync import ProductSyncWriter
+from datetime import datetime, timedelta
 from loguru import logger
 
 
 class WooCommerceService:
     """Servicio para interactuar con la API de WooCommerce"""
 
+    # Nombre de la marca de agua en SyncState
+    SYNC_NAME = 'woo_products'
+    RECONCILE_NAME = 'woo_products_reconcile'
+
     def __init__(self):
         """Inicializar conexión con WooCommerce"""
         self.wcapi = API(
@@ -21,6 +37,9 @@ class WooCommerceService:
             version="wc/v3",
             timeout=30
         )
+        self.timeout = current_app.config.get('WOO_TIMEOUT', 30)
+        self.sync_workers = max(1, current_app.config.get('WOO_SYNC_WORKERS', 4))
+        self._http = None
 
     def get_products(self, per_page=100, page=1):
         """
@@ -34,17 +53,11 @@ class WooCommerceService:
             list: Lista de productos
         """
         try:
-            response = self.wcapi.get("products", params={
+            products, _ = self._fetch_page("products", {
                 "per_page": per_page,
-                "page": page,
                 "status": "publish"
-            })
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error WooCommerce API: {response.status_code}")
-                return []
+            }, page)
+            return products
 
         except Exception as e:
             logger.error(f"Error obteniendo productos: {str(e)}")
@@ -100,7 +113,7 @@ class WooCommerceService:
 
     def get_product_variations(self, product_id):
         """
-        Obtener variaciones de un producto variable
+        Obtener todas las variaciones de un producto variable (todas las páginas)
 
         Args:
             product_id: ID del producto en WooCommerce
@@ -109,13 +122,7 @@ class WooCommerceService:
             list: Lista de variaciones del producto
         """
         try:
-            response = self.wcapi.get(f"products/{product_id}/variations")
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Error obteniendo variaciones del producto {product_id}: {response.status_code}")
-                return []
+            return self._fetch_all(f"products/{product_id}/variations", {"per_page": 100})
 
         except Exception as e:
             logger.error(f"Error obteniendo variaciones del producto {product_id}: {str(e)}")
@@ -126,52 +133,35 @@ class WooCommerceService:
         Sincronizar productos de WooCommerce a base de datos local
         Incluye productos simples y todas las variaciones de productos variables
 
+        Las páginas y variaciones se descargan en paralelo (WOO_SYNC_WORKERS) y
+        se entregan al escritor por una cola acotada. Cada página se escribe con
+        upsert por bloques y commit propio; las filas cuyo contenido no cambió
+        desde la última sincronización se omiten.
+
         Returns:
             int: Cantidad de productos sincronizados
         """
         try:
-            page = 1
-            total_synced = 0
-
-            while True:
-                products = self.get_products(per_page=100, page=page)
-
-                if not products:
-                    break
-
-                for woo_product in products:
-                    product_type = woo_product.get('type', 'simple')
+            started_at = datetime.utcnow()
+            writer = ProductSyncWriter()
+            totals = self._new_totals()
 
-                    # Procesar productos simples normalmente
-                    if product_type == 'simple':
-                        synced = self._sync_simple_product(woo_product)
-                        if synced:
-                            total_synced += 1
+            self._write_catalog(writer, self._fetch_catalog(writer), totals)
 
-                    # Procesar productos variables: importar cada variación
-                    elif product_type == 'variable':
-                        logger.info(f"Producto variable detectado: {woo_product['name']} (ID: {woo_product['id']})")
-                        variations = self.get_product_variations(woo_product['id'])
+            total_synced = totals['written'] + totals['unchanged']
+            logger.info(
+                f"Sincronizados {total_synced} productos desde WooCommerce "
+                f"({totals['written']} actualizados, {totals['unchanged']} sin cambios, "
+                f"{totals['failed']} con error)"
+            )
 
-                        if variations:
-                            for variation in variations:
-                                synced = self._sync_variation_product(woo_product, variation)
-                                if synced:
-                                    total_synced += 1
-                        else:
-                            # Si no tiene variaciones, sincronizar el producto padre
-                            synced = self._sync_simple_product(woo_product)
-                            if synced:
-                                total_synced += 1
+            # La sincronización incremental continúa desde aquí solo si no faltaron páginas
+            if not totals['page_errors']:
+                SyncState.mark(self.SYNC_NAME, started_at, full=True,
+                               details=self._totals_summary(totals))
 
-                # Si hay menos de 100 productos, es la última página
-                if len(products) < 100:
-                    break
-
-                page += 1
-
-            db.session.commit()
-            logger.info(f"Sincronizados {total_synced} productos desde WooCommerce")
+            # Actualizar incrementalmente el índice de búsqueda en memoria
+            product_index.refresh()
 
             # Limpiar cache (comentado: requiere Redis activo)
             # cache.clear()
@@ -183,114 +173,478 @@ class WooCommerceService:
             logger.error(f"Error sincronizando productos: {str(e)}")
             return 0
 
-    def _sync_simple_product(self, woo_product):
+    def sync_products_incremental(self):
         """
-        Sincronizar un producto simple
+        Sincronización incremental desde la última marca de agua
 
-        Args:
-            woo_product: Datos del producto desde WooCommerce
+        Descarga solo los productos modificados desde la marca de agua
+        (modified_after, con margen WOO_DELTA_SYNC_OVERLAP); las variaciones
+        se consultan únicamente para los productos variables devueltos.
+        Despublicados, eliminados y variaciones modificadas sin cambio en
+        el padre los detecta reconcile_products, con su propio horario.
+
+        Sin marca de agua (primera ejecución) realiza una sincronización completa.
 
         Returns:
-            bool: True si se sincronizó correctamente
+            dict: {
+                'success': bool,
+                'mode': str,
+                'written': int,
+                'unchanged': int,
+                'deactivated': int,
+                'failed': int,
+                'message': str
+            }
         """
+        high_water_mark = SyncState.get_high_water_mark(self.SYNC_NAME)
+
+        if high_water_mark is None:
+            logger.info("Sin marca de agua de productos, ejecutando sincronización completa")
+            count = self.sync_products_to_local()
+            return {
+                'success': SyncState.get_high_water_mark(self.SYNC_NAME) is not None,
+                'mode': 'full',
+                'written': count,
+                'unchanged': 0,
+                'deactivated': 0,
+                'failed': 0,
+                'message': f'Sincronización completa: {count} productos'
+            }
+
         try:
-            # Buscar o crear producto local
-            product = Product.query.filter_by(
-                woo_id=woo_product['id']
-            ).first()
-
-            # Generar SKU: usar el de WooCommerce o generar uno único
-            sku = woo_product.get('sku') or f"WOO-{woo_product['id']}"
-
-            if not product:
-                product = Product(
-                    woo_id=woo_product['id'],
-                    sku=sku
-                )
-            else:
-                # Actualizar SKU si estaba vacío
-                if not product.sku or product.sku.strip() == '':
-                    product.sku = sku
+            started_at = datetime.utcnow()
+            writer = ProductSyncWriter()
+            totals = self._new_totals()
+
+            self._write_catalog(writer, self._fetch_catalog(writer, {
+                "modified_after": self._with_overlap(high_water_mark).replace(microsecond=0).isoformat(),
+                "dates_are_gmt": "true"
+            }), totals)
+
+            if not totals['page_errors']:
+                SyncState.mark(self.SYNC_NAME, started_at, details=self._totals_summary(totals))
+
+            product_index.refresh()
+
+            message = (
+                f"Sincronización incremental: {totals['written']} actualizados, "
+                f"{totals['unchanged']} sin cambios, {totals['failed']} con error"
+            )
+            logger.info(message)
+
+            return {
+                'success': not totals['page_errors'],
+                'mode': 'incremental',
+                'written': totals['written'],
+                'unchanged': totals['unchanged'],
+                'deactivated': 0,
+                'failed': totals['failed'],
+                'message': message
+            }
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error en sincronización incremental de productos: {str(e)}")
+            return {
+                'success': False,
+                'mode': 'incremental',
+                'written': 0,
+                'unchanged': 0,
+                'deactivated': 0,
+                'failed': 0,
+                'message': f'Error en sincronización incremental: {str(e)}'
+            }
+
+    def reconcile_products(self):
+        """
+        Reconciliación del catálogo completo por IDs (horario propio, más lento)
+
+        1. Lista los woo_id publicados y las variaciones de cada producto
+           variable (consultas de solo IDs, una por producto variable)
+        2. Desactiva los productos despublicados o eliminados
+        3. Vuelve a sincronizar los productos padre con variaciones
+           modificadas desde la reconciliación anterior
 
-            # Actualizar datos
-            product.name = woo_product['name']
-            product.price = float(woo_product.get('price') or 0)
-            product.stock_quantity = woo_product.get('stock_quantity') or 0
-            product.description = woo_product.get('short_description', '')
-            product.is_active = woo_product['status'] == 'publish'
-            product.last_sync = datetime.utcnow()
+        Returns:
+            dict: {
+                'success': bool,
+                'written': int,
+                'unchanged': int,
+                'deactivated': int,
+                'failed': int,
+                'message': str
+            }
+        """
+        since = (
+            SyncState.get_high_water_mark(self.RECONCILE_NAME)
+            or SyncState.get_high_water_mark(self.SYNC_NAME)
+        )
+        if since is None:
+            return {
+                'success': False,
+                'written': 0,
+                'unchanged': 0,
+                'deactivated': 0,
+                'failed': 0,
+                'message': 'Sin sincronización previa de productos: ejecutar primero la sincronización completa'
+            }
+
+        try:
+            started_at = datetime.utcnow()
+            writer = ProductSyncWriter()
+            totals = self._new_totals()
 
-            # Extraer URL de la primera imagen
-            images = woo_product.get('images', [])
-            product.image_url = images[0]['src'] if images else None
+            # 1. Reconciliación por IDs
+            live_woo_ids, changed_parents = self._reconcile_catalog(self._with_overlap(since))
 
-            db.session.add(product)
-            return True
+            # 2. Despublicados / eliminados
+            if live_woo_ids:
+                totals['deactivated'] = writer.deactivate_missing(live_woo_ids)
+            else:
+                # Catálogo vacío: más probable un error de la tienda que un borrado total
+                logger.warning("WooCommerce no devolvió productos publicados, se omite la desactivación")
+
+            # 3. Productos variables con variaciones modificadas
+            if changed_parents:
+                rows, failed = self.build_product_rows(writer, self.get_products_by_ids(changed_parents))
+                stats = writer.write_page(rows)
+                stats['failed'] += failed
+                self._add_totals(totals, stats)
+
+            SyncState.mark(self.RECONCILE_NAME, started_at, details=self._totals_summary(totals))
+            product_index.refresh()
+
+            message = (
+                f"Reconciliación de productos: {totals['written']} actualizados, "
+                f"{totals['deactivated']} desactivados, {totals['failed']} con error"
+            )
+            logger.info(message)
+
+            return {
+                'success': True,
+                'written': totals['written'],
+                'unchanged': totals['unchanged'],
+                'deactivated': totals['deactivated'],
+                'failed': totals['failed'],
+                'message': message
+            }
 
         except Exception as e:
-            logger.error(f"Error sincronizando producto simple {woo_product['id']}: {str(e)}")
-            return False
+            db.session.rollback()
+            logger.error(f"Error en reconciliación de productos: {str(e)}")
+            return {
+                'success': False,
+                'written': 0,
+                'unchanged': 0,
+                'deactivated': 0,
+                'failed': 0,
+                'message': f'Error en reconciliación de productos: {str(e)}'
+            }
+
+    def get_products_by_ids(self, woo_ids):
+        """
+        Obtener productos por ID (100 por consulta)
 
-    def _sync_variation_product(self, parent_product, variation):
+        Args:
+            woo_ids: IDs de productos en WooCommerce
+
+        Returns:
+            list: Productos encontrados
         """
-        Sincronizar una variación de producto como producto independiente
+        woo_ids = list(woo_ids)
+        products = []
+        for start in range(0, len(woo_ids), 100):
+            products.extend(self._fetch_all("products", {
+                "include": ','.join(str(woo_id) for woo_id in woo_ids[start:start + 100]),
+                "per_page": 100
+            }))
+        return products
+
+    def build_product_rows(self, writer, products):
+        """
+        Convertir productos de WooCommerce en filas locales
+        (descarga en paralelo las variaciones de los productos variables)
 
         Args:
-            parent_product: Producto padre desde WooCommerce
-            variation: Datos de la variación desde WooCommerce
+            writer: ProductSyncWriter
+            products: Productos desde WooCommerce
 
         Returns:
-            bool: True si se sincronizó correctamente
+            tuple: (rows, failed)
+        """
+        with ThreadPoolExecutor(self.sync_workers, thread_name_prefix='woo-variations') as pool:
+            return self._build_page_rows(writer, products, pool)
+
+    def _reconcile_catalog(self, since):
         """
+        Obtener los woo_id publicados con consultas de solo IDs
+
+        Los productos variables se expanden en sus variaciones publicadas.
+        Cualquier error de descarga se propaga: sin la lista completa no se
+        desactiva nada.
+
+        Args:
+            since: Fecha (UTC) desde la que una variación se considera modificada
+
+        Returns:
+            tuple: (live_woo_ids: set, changed_parents: list)
+        """
+        published = self._fetch_all("products", {
+            "per_page": 100,
+            "status": "publish",
+            "_fields": "id,type"
+        })
+
+        live_woo_ids = {p['id'] for p in published if p.get('type', 'simple') == 'simple'}
+        variable_ids = [p['id'] for p in published if p.get('type') == 'variable']
+
+        with ThreadPoolExecutor(self.sync_workers, thread_name_prefix='woo-variations') as pool:
+            variation_lists = pool.map(
+                lambda woo_id: self._fetch_all(f"products/{woo_id}/variations", {
+                    "per_page": 100,
+                    "_fields": "id,status,date_modified_gmt"
+                }),
+                variable_ids
+            )
+
+            changed_parents = []
+            for parent_id, variations in zip(variable_ids, variation_lists):
+                if not variations:
+                    # Producto variable sin variaciones: se sincroniza el padre
+                    live_woo_ids.add(parent_id)
+                    continue
+
+                live_woo_ids.update(v['id'] for v in variations if v.get('status') == 'publish')
+
+                if any(self._parse_gmt(v.get('date_modified_gmt')) >= since for v in variations):
+                    changed_parents.append(parent_id)
+
+        return live_woo_ids, changed_parents
+
+    def _write_catalog(self, writer, pages, totals):
+        """
+        Escribir las páginas entregadas por _fetch_catalog
+
+        Args:
+            writer: ProductSyncWriter
+            pages: Generador de (page, rows, failed, error)
+            totals: Acumulador de estadísticas
+        """
+        for page, rows, failed, error in pages:
+            if error:
+                totals['page_errors'] += 1
+                logger.error(f"Error descargando página {page} de productos: {str(error)}")
+                continue
+
+            stats = writer.write_page(rows)
+            stats['failed'] += failed
+            self._add_totals(totals, stats)
+
+            logger.debug(
+                f"Página {page}: {stats['written']} escritos, "
+                f"{stats['unchanged']} sin cambios, {stats['failed']} con error"
+            )
+
+    @staticmethod
+    def _new_totals():
+        """Acumulador de estadísticas de sincronización"""
+        return {'processed': 0, 'written': 0, 'unchanged': 0, 'failed': 0,
+                'deactivated': 0, 'page_errors': 0}
+
+    @staticmethod
+    def _add_totals(totals, stats):
+        """Sumar las estadísticas de una página"""
+        for key, value in stats.items():
+            totals[key] += value
+
+    @staticmethod
+    def _totals_summary(totals):
+        """Resumen de estadísticas para SyncState.details"""
+        return ', '.join(f"{key}={value}" for key, value in totals.items())
+
+    @staticmethod
+    def _with_overlap(high_water_mark):
+        """Marca de agua menos el margen WOO_DELTA_SYNC_OVERLAP (relojes desfasados)"""
+        return high_water_mark - timedelta(seconds=current_app.config.get('WOO_DELTA_SYNC_OVERLAP', 120))
+
+    @staticmethod
+    def _parse_gmt(value):
+        """Convertir fecha GMT de WooCommerce (sin zona horaria) a datetime"""
+        if not value:
+            return datetime.min
+        return datetime.fromisoformat(value)
+
+    def _fetch_catalog(self, writer, params=None):
+        """
+        Descargar el catálogo en paralelo y entregar las páginas convertidas
+
+        La primera página se descarga antes para leer X-WP-TotalPages; el
+        resto de páginas y las variaciones se descargan con un pool de hilos.
+        Los hilos solo hacen HTTP y construyen filas; la escritura en BD queda
+        en el hilo que consume el generador (contexto de aplicación).
+
+        Args:
+            writer: ProductSyncWriter
+            params: Filtros adicionales para /products
+
+        Yields:
+            tuple: (page, rows, failed, error)
+        """
+        params = {"per_page": 100, "status": "publish", **(params or {})}
+        first_page, total_pages = self._fetch_page("products", params, 1)
+        total_pages = max(total_pages, 1)
+
+        # Cola acotada: si el escritor se atrasa, las descargas esperan
+        results = queue.Queue(maxsize=self.sync_workers * 2)
+        cancelled = threading.Event()
+
+        pages_pool = ThreadPoolExecutor(self.sync_workers, thread_name_prefix='woo-pages')
+        variations_pool = ThreadPoolExecutor(self.sync_workers, thread_name_prefix='woo-variations')
+
+        def fetch_page(page, products=None):
+            try:
+                if products is None:
+                    products, _ = self._fetch_page("products", params, page)
+                rows, failed = self._build_page_rows(writer, products, variations_pool)
+                item = (page, rows, failed, None)
+            except Exception as e:
+                item = (page, [], 0, e)
+
+            while not cancelled.is_set():
+                try:
+                    results.put(item, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
         try:
-            # Buscar o crear producto local usando el ID de la variación
-            product = Product.query.filter_by(
-                woo_id=variation['id']
-            ).first()
-
-            # Generar SKU: usar el de la variación o generar uno único
-            sku = variation.get('sku') or f"WOO-VAR-{variation['id']}"
-
-            # Construir nombre combinando producto padre + atributos de variación
-            variation_name = parent_product['name']
-            if variation.get('attributes'):
-                # Obtener los valores de los atributos (ej: "Negro", "Talla M")
-                attr_values = [attr.get('option', '') for attr in variation['attributes'] if attr.get('option')]
-                if attr_values:
-                    variation_name = f"{parent_product['name']} - {' - '.join(attr_values)}"
-
-            if not product:
-                product = Product(
-                    woo_id=variation['id'],
-                    sku=sku
-                )
-            else:
-                # Actualizar SKU si estaba vacío
-                if not product.sku or product.sku.strip() == '':
-                    product.sku = sku
-
-            # Actualizar datos de la variación
-            product.name = variation_name
-            product.price = float(variation.get('price') or 0)
-            product.stock_quantity = variation.get('stock_quantity') or 0
-            product.description = variation.get('description') or parent_product.get('short_description', '')
-            product.is_active = variation.get('status') == 'publish' and parent_product.get('status') == 'publish'
-            product.last_sync = datetime.utcnow()
-
-            # Extraer URL de imagen: usar la de la variación o la del producto padre
-            variation_image = variation.get('image')
-            if variation_image and variation_image.get('src'):
-                product.image_url = variation_image['src']
-            else:
-                parent_images = parent_product.get('images', [])
-                product.image_url = parent_images[0]['src'] if parent_images else None
+            pages_pool.submit(fetch_page, 1, first_page)
+            for page in range(2, total_pages + 1):
+                pages_pool.submit(fetch_page, page)
+
+            for _ in range(total_pages):
+                yield results.get()
+        finally:
+            cancelled.set()
+            pages_pool.shutdown(wait=True, cancel_futures=True)
+            variations_pool.shutdown(wait=True, cancel_futures=True)
+
+    def _build_page_rows(self, writer, products, variations_pool):
+        """
+        Convertir una página de productos en filas locales
 
-            db.session.add(product)
-            return True
+        Las variaciones de los productos variables de la página se descargan
+        en paralelo. Los productos variables se importan como una fila por
+        variación; si no tienen variaciones se importa el producto padre.
 
-        except Exception as e:
-            logger.error(f"Error sincronizando variación {variation['id']}: {str(e)}")
-            return False
+        Returns:
+            tuple: (rows, failed)
+        """
+        variations = {
+            woo_product['id']: variations_pool.submit(
+                self._fetch_all, f"products/{woo_product['id']}/variations", {"per_page": 100}
+            )
+            for woo_product in products
+            if woo_product.get('type', 'simple') == 'variable'
+        }
+
+        rows, failed = [], 0
+        for woo_product in products:
+            try:
+                product_type = woo_product.get('type', 'simple')
+
+                # Procesar productos simples normalmente
+                if product_type == 'simple':
+                    rows.append(writer.build_simple_row(woo_product))
+
+                # Procesar productos variables: importar cada variación
+                elif product_type == 'variable':
+                    product_variations = variations[woo_product['id']].result()
+
+                    if product_variations:
+                        rows.extend(
+                            writer.build_variation_row(woo_product, variation)
+                            for variation in product_variations
+                        )
+                    else:
+                        # Si no tiene variaciones, sincronizar el producto padre
+                        rows.append(writer.build_simple_row(woo_product))
+
+            except Exception as e:
+                failed += 1
+                logger.error(f"Error procesando producto {woo_product.get('id')}: {str(e)}")
+
+        return rows, failed
+
+    def _fetch_all(self, endpoint, params):
+        """
+        Descargar todas las páginas de un endpoint
+
+        Returns:
+            list: Elementos de todas las páginas
+        """
+        items, total_pages = self._fetch_page(endpoint, params, 1)
+        for page in range(2, total_pages + 1):
+            page_items, _ = self._fetch_page(endpoint, params, page)
+            items.extend(page_items)
+        return items
+
+    def _fetch_page(self, endpoint, params, page):
+        """
+        Descargar una página de la API REST con la sesión compartida
+
+        Returns:
+            tuple: (items, total_pages)
+
+        Raises:
+            requests.HTTPError: Si la API no responde 200
+        """
+        response = self._api_get(endpoint, {**params, "page": page})
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"Error WooCommerce API {endpoint} (página {page}): {response.status_code}",
+                response=response
+            )
+
+        total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+        return response.json(), total_pages
+
+    def _api_get(self, endpoint, params):
+        """
+        GET a la API REST de WooCommerce reutilizando conexiones (keep-alive)
+
+        Misma autenticación que la librería woocommerce: Basic sobre HTTPS,
+        OAuth 1.0a sobre HTTP.
+        """
+        url = f"{self.wcapi.url.rstrip('/')}/wp-json/{self.wcapi.version}/{endpoint}"
+
+        if not self.wcapi.is_ssl:
+            url = OAuth(
+                url=f"{url}?{urlencode(params)}",
+                consumer_key=self.wcapi.consumer_key,
+                consumer_secret=self.wcapi.consumer_secret,
+                version=self.wcapi.version,
+                method="GET"
+            ).get_oauth_url()
+            params = None
+
+        return self._session().get(url, params=params, timeout=self.timeout)
+
+    def _session(self):
+        """Sesión HTTP compartida entre hilos con pool de conexiones"""
+        if self._http is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.sync_workers * 2)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'user-agent': self.wcapi.user_agent,
+                'accept': 'application/json'
+            })
+            if self.wcapi.is_ssl:
+                session.auth = HTTPBasicAuth(self.wcapi.consumer_key, self.wcapi.consumer_secret)
+            self._http = session
+        return self._http
 
     # @cache.memoize(timeout=300)  # Cache por 5 minutos (comentado: requiere Redis activo)
     def get_local_products(self, search=None, limit=50):
@@ -304,6 +658,15 @@ class WooCommerceService:
         Returns:
             list: Lista de productos
         """
+        # Índice en memoria (sin consultar MySQL); None si debe resolverse en SQL
+        if current_app.config.get('PRODUCT_SEARCH_INDEX_ENABLED', True):
+            try:
+                products = product_index.search(search=search, limit=limit)
+                if products is not None:
+                    return products
+            except Exception as e:
+                logger.error(f"Error en índice de productos, usando búsqueda SQL: {str(e)}")
+
         query = Product.query.filter_by(is_active=True)
 
         if search:
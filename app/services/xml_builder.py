@@ -2,12 +2,54 @@
 Servicio de generación de XML UBL 2.1 para SUNAT
 Genera archivos XML compatibles con la especificación SUNAT para boletas electrónicas
 """
+import re
 from lxml import etree
 from decimal import Decimal
 from datetime import datetime
+from types import SimpleNamespace
 from flask import current_app
 from loguru import logger
 
+from app.services.xml_validator import UBLSchemaValidator
+
+
+# Plantillas de boleta compiladas por proceso, por configuración de empresa
+_INVOICE_TEMPLATES = {}
+
+_FIELD_PATTERN = re.compile(r'@@(\w+)@@')
+
+# Caracteres no permitidos en XML 1.0 (lxml los rechaza con ValueError)
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _compile(fragment):
+    """Dividir un fragmento en [texto, campo, texto, campo, ..., texto]"""
+    return _FIELD_PATTERN.split(fragment)
+
+
+def _render(parts, fields):
+    """Rellenar una plantilla compilada con _compile"""
+    rendered = parts[:]
+    for i in range(1, len(parts), 2):
+        rendered[i] = fields[parts[i]]
+    return ''.join(rendered)
+
+
+def _xml_text(value):
+    """Escapar texto de elemento igual que la serialización de lxml"""
+    value = str(value)
+    if _INVALID_XML_CHARS.search(value):
+        raise ValueError(f"Texto con caracteres no válidos para XML: {value!r}")
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+
+
+def _xml_attr(value):
+    """Escapar valor de atributo igual que la serialización de lxml"""
+    return (
+        _xml_text(value).replace('"', '&quot;')
+        .replace('\n', '&#10;').replace('\t', '&#9;')
+    )
+
 
 class XMLBuilder:
     """
@@ -25,6 +67,19 @@ class XMLBuilder:
         'ext': "urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2"
     }
 
+    # Namespaces del Resumen Diario (SummaryDocuments)
+    SUMMARY_NAMESPACES = {
+        None: "urn:sunat:names:specification:ubl:peru:schema:xsd:SummaryDocuments-1",
+        'cac': "urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2",
+        'cbc': "urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2",
+        'ds': "http://www.w3.org/2000/09/xmldsig#",
+        'ext': "urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2",
+        'sac': "urn:sunat:names:specification:ubl:peru:schema:xsd:SunatAggregateComponents-1"
+    }
+
+    # Máximo de líneas por Resumen Diario
+    SUMMARY_MAX_LINES = 500
+
     # Códigos de tipo de documento SUNAT
     DOCUMENT_TYPE_CODES = {
         'DNI': '1',
@@ -40,34 +95,244 @@ class XMLBuilder:
         self.company_name = current_app.config.get('COMPANY_NAME')
         self.company_address = current_app.config.get('COMPANY_ADDRESS')
         self.company_ubigeo = current_app.config.get('COMPANY_UBIGEO', '150101')
+        self.validator = UBLSchemaValidator()
 
     def build_invoice(self, sale) -> str:
         """
         Construir XML UBL 2.1 completo para una boleta
 
+        Usa la plantilla precompilada del proceso (ver _invoice_template):
+        solo se escapan y concatenan los campos de la venta y sus líneas.
+        La salida es compacta y equivale byte a byte a serializar sin
+        pretty_print el árbol de _build_invoice_tree.
+
         Args:
             sale: Objeto Sale con todos los datos de la venta
 
+        Returns:
+            str: XML como string
+        """
+        try:
+            template = self._invoice_template()
+            customer = sale.customer
+            issue_datetime = sale.created_at if sale.created_at else datetime.utcnow()
+            tax = self._format_decimal(sale.tax)
+            subtotal = self._format_decimal(sale.subtotal)
+            total = self._format_decimal(sale.total)
+
+            fields = {
+                'correlative': _xml_text(sale.correlative),
+                'issue_date': issue_datetime.strftime('%Y-%m-%d'),
+                'issue_time': issue_datetime.strftime('%H:%M:%S'),
+                'customer_doc_type': _xml_attr(self.DOCUMENT_TYPE_CODES.get(customer.document_type.upper(), '1')),
+                'customer_doc': _xml_text(customer.document_number or '-'),
+                'customer_name': _xml_text(customer.name or ''),
+                'tax': tax,
+                'taxable': subtotal,
+                'tax_detail': tax,
+                'line_extension': subtotal,
+                'tax_inclusive': total,
+                'payable': total,
+            }
+
+            parts = [_render(template['head'], fields)]
+            line_template = template['line']
+            for index, item in enumerate(sale.items, start=1):
+                parts.append(_render(line_template, self._line_fields(index, item)))
+            parts.append(template['tail'])
+
+            xml_string = ''.join(parts)
+
+            logger.info(f"XML generado exitosamente para venta {sale.correlative}")
+            return xml_string
+
+        except Exception as e:
+            logger.error(f"Error generando XML para venta {sale.id}: {e}")
+            raise
+
+    def _build_invoice_tree(self, sale):
+        """
+        Construir el árbol lxml completo de una boleta
+
+        Define la estructura del documento: se usa para compilar la
+        plantilla y como referencia en el benchmark.
+
+        Args:
+            sale: Objeto Sale con todos los datos de la venta
+
+        Returns:
+            etree.Element: Elemento raíz Invoice
+        """
+        # Crear elemento raíz Invoice
+        root = etree.Element(
+            'Invoice',
+            nsmap=self.NAMESPACES
+        )
+
+        # Construir secciones del XML
+        self._build_header(root, sale)
+        self._build_signature_placeholder(root)
+        self._build_supplier(root)
+        self._build_customer(root, sale.customer)
+        self._build_tax_totals(root, sale)
+        self._build_monetary_totals(root, sale)
+        self._build_invoice_lines(root, sale)
+
+        return root
+
+    def _invoice_template(self):
+        """
+        Plantilla de boleta precompilada para la empresa configurada
+
+        Se compila una vez por proceso (y por configuración COMPANY_*): el
+        encabezado fijo, la firma, el emisor y los esquemas de impuestos
+        quedan serializados; los campos variables son marcadores.
+
+        Returns:
+            dict: {'head': list, 'line': list, 'tail': str}
+        """
+        key = (self.company_ruc, self.company_name, self.company_address, self.company_ubigeo)
+        template = _INVOICE_TEMPLATES.get(key)
+        if template is None:
+            template = self._compile_invoice_template()
+            _INVOICE_TEMPLATES[key] = template
+        return template
+
+    def _compile_invoice_template(self):
+        """
+        Compilar la plantilla a partir del árbol de _build_invoice_tree
+
+        Construye una boleta de una línea, reemplaza los campos variables
+        por marcadores @@campo@@, la serializa compacta y la divide en
+        partes fijas y campos.
+        """
+        cac = self.NAMESPACES['cac']
+        cbc = self.NAMESPACES['cbc']
+
+        item = SimpleNamespace(quantity=1, unit_price=0, product_name='-', product_sku='-')
+        customer = SimpleNamespace(document_type='DNI', document_number='-', name='-')
+        sale = SimpleNamespace(
+            correlative='-', created_at=datetime(2000, 1, 1), customer=customer,
+            tax=0, subtotal=0, total=0, items=[item]
+        )
+        root = self._build_invoice_tree(sale)
+
+        def mark(element, path, field, attribute=None):
+            target = element.find(path.format(cac=f'{{{cac}}}', cbc=f'{{{cbc}}}'))
+            if attribute:
+                target.set(attribute, f'@@{field}@@')
+            else:
+                target.text = f'@@{field}@@'
+
+        mark(root, '{cbc}ID', 'correlative')
+        mark(root, '{cbc}IssueDate', 'issue_date')
+        mark(root, '{cbc}IssueTime', 'issue_time')
+        party = '{cac}AccountingCustomerParty/{cac}Party/'
+        mark(root, party + '{cac}PartyIdentification/{cbc}ID', 'customer_doc')
+        mark(root, party + '{cac}PartyIdentification/{cbc}ID', 'customer_doc_type', attribute='schemeID')
+        mark(root, party + '{cac}PartyLegalEntity/{cbc}RegistrationName', 'customer_name')
+        mark(root, '{cac}TaxTotal/{cbc}TaxAmount', 'tax')
+        mark(root, '{cac}TaxTotal/{cac}TaxSubtotal/{cbc}TaxableAmount', 'taxable')
+        mark(root, '{cac}TaxTotal/{cac}TaxSubtotal/{cbc}TaxAmount', 'tax_detail')
+        mark(root, '{cac}LegalMonetaryTotal/{cbc}LineExtensionAmount', 'line_extension')
+        mark(root, '{cac}LegalMonetaryTotal/{cbc}TaxInclusiveAmount', 'tax_inclusive')
+        mark(root, '{cac}LegalMonetaryTotal/{cbc}PayableAmount', 'payable')
+
+        line = root.find(f'{{{cac}}}InvoiceLine')
+        mark(line, '{cbc}ID', 'line_id')
+        mark(line, '{cbc}InvoicedQuantity', 'quantity')
+        mark(line, '{cbc}LineExtensionAmount', 'line_subtotal')
+        mark(line, '{cac}PricingReference/{cac}AlternativeConditionPrice/{cbc}PriceAmount', 'price_with_tax')
+        mark(line, '{cac}TaxTotal/{cbc}TaxAmount', 'line_tax')
+        mark(line, '{cac}TaxTotal/{cac}TaxSubtotal/{cbc}TaxableAmount', 'line_taxable')
+        mark(line, '{cac}TaxTotal/{cac}TaxSubtotal/{cbc}TaxAmount', 'line_tax_detail')
+        mark(line, '{cac}Item/{cbc}Description', 'description')
+        mark(line, '{cac}Item/{cac}SellersItemIdentification/{cbc}ID', 'sku')
+        mark(line, '{cac}Price/{cbc}PriceAmount', 'unit_price')
+
+        document = etree.tostring(root, xml_declaration=True, encoding='UTF-8').decode('utf-8')
+
+        # Las líneas son los últimos hijos de Invoice
+        line_start = document.index(f'<{line.prefix}:InvoiceLine>')
+        line_end = document.rindex('</Invoice>')
+
+        logger.debug(f"Plantilla XML de boleta compilada para RUC {self.company_ruc}")
+        return {
+            'head': _compile(document[:line_start]),
+            'line': _compile(document[line_start:line_end]),
+            'tail': document[line_end:]
+        }
+
+    def _line_fields(self, index, item):
+        """Campos variables de una línea (mismos cálculos que _build_invoice_lines)"""
+        unit_price = Decimal(str(item.unit_price))
+        line_subtotal = Decimal(str(item.quantity)) * unit_price
+        line_subtotal_text = self._format_decimal(line_subtotal)
+        item_tax_text = self._format_decimal(line_subtotal * Decimal('0.18'))
+
+        return {
+            'line_id': str(index),
+            'quantity': self._format_decimal(item.quantity, 0),
+            'line_subtotal': line_subtotal_text,
+            'price_with_tax': self._format_decimal(unit_price * Decimal('1.18')),
+            'line_tax': item_tax_text,
+            'line_taxable': line_subtotal_text,
+            'line_tax_detail': item_tax_text,
+            'description': _xml_text(item.product_name),
+            'sku': _xml_text(item.product_sku),
+            'unit_price': self._format_decimal(item.unit_price),
+        }
+
+    def build_daily_summary(self, summary_id, reference_date, issue_date, sales) -> str:
+        """
+        Construir XML del Resumen Diario de boletas (RC)
+
+        Una línea por boleta (estado 1 = adicionar), hasta SUMMARY_MAX_LINES.
+
+        Args:
+            summary_id: Identificador RC-YYYYMMDD-N
+            reference_date: Fecha de emisión de las boletas
+            issue_date: Fecha de generación del resumen
+            sales: Ventas del resumen (con customer cargado)
+
         Returns:
             str: XML formateado como string
         """
+        if len(sales) > self.SUMMARY_MAX_LINES:
+            raise ValueError(f"Un resumen diario admite hasta {self.SUMMARY_MAX_LINES} boletas")
+
         try:
-            # Crear elemento raíz Invoice
-            root = etree.Element(
-                'Invoice',
-                nsmap=self.NAMESPACES
-            )
-
-            # Construir secciones del XML
-            self._build_header(root, sale)
+            cac = self.SUMMARY_NAMESPACES['cac']
+            cbc = self.SUMMARY_NAMESPACES['cbc']
+
+            # Raíz con su namespace: el XSD valida el árbol en memoria, no el serializado
+            root = etree.Element(f'{{{self.SUMMARY_NAMESPACES[None]}}}SummaryDocuments', nsmap=self.SUMMARY_NAMESPACES)
+
+            # Encabezado
+            etree.SubElement(root, f'{{{cbc}}}UBLVersionID').text = '2.0'
+            etree.SubElement(root, f'{{{cbc}}}CustomizationID').text = '1.1'
+            etree.SubElement(root, f'{{{cbc}}}ID').text = summary_id
+            etree.SubElement(root, f'{{{cbc}}}ReferenceDate').text = reference_date.strftime('%Y-%m-%d')
+            etree.SubElement(root, f'{{{cbc}}}IssueDate').text = issue_date.strftime('%Y-%m-%d')
+
             self._build_signature_placeholder(root)
-            self._build_supplier(root)
-            self._build_customer(root, sale.customer)
-            self._build_tax_totals(root, sale)
-            self._build_monetary_totals(root, sale)
-            self._build_invoice_lines(root, sale)
 
-            # Convertir a string con formato
+            # Emisor
+            supplier = etree.SubElement(root, f'{{{cac}}}AccountingSupplierParty')
+            etree.SubElement(supplier, f'{{{cbc}}}CustomerAssignedAccountID').text = self.company_ruc
+            etree.SubElement(supplier, f'{{{cbc}}}AdditionalAccountID').text = '6'  # 6 = RUC
+            party = etree.SubElement(supplier, f'{{{cac}}}Party')
+            party_legal = etree.SubElement(party, f'{{{cac}}}PartyLegalEntity')
+            etree.SubElement(party_legal, f'{{{cbc}}}RegistrationName').text = self.company_name
+
+            for index, sale in enumerate(sales, start=1):
+                self._build_summary_line(root, index, sale)
+
+            # Validar el árbol en memoria antes de serializar
+            is_valid, errors = self.validator.validate(root)
+            if not is_valid:
+                raise ValueError(f"Resumen diario {summary_id} no válido: {'; '.join(errors[:5])}")
+
             xml_string = etree.tostring(
                 root,
                 pretty_print=True,
@@ -75,13 +340,61 @@ class XMLBuilder:
                 encoding='UTF-8'
             ).decode('utf-8')
 
-            logger.info(f"XML generado exitosamente para venta {sale.correlative}")
+            logger.info(f"XML de resumen diario {summary_id} generado ({len(sales)} boletas)")
             return xml_string
 
         except Exception as e:
-            logger.error(f"Error generando XML para venta {sale.id}: {e}")
+            logger.error(f"Error generando resumen diario {summary_id}: {e}")
             raise
 
+    def _build_summary_line(self, root, index, sale):
+        """
+        Construir línea del resumen diario para una boleta
+
+        Args:
+            index: Número de línea
+            sale: Objeto Sale
+        """
+        cac = self.SUMMARY_NAMESPACES['cac']
+        cbc = self.SUMMARY_NAMESPACES['cbc']
+        sac = self.SUMMARY_NAMESPACES['sac']
+
+        line = etree.SubElement(root, f'{{{sac}}}SummaryDocumentsLine')
+        etree.SubElement(line, f'{{{cbc}}}LineID').text = str(index)
+        etree.SubElement(line, f'{{{cbc}}}DocumentTypeCode').text = '03'  # Boleta
+        etree.SubElement(line, f'{{{cbc}}}ID').text = sale.correlative
+
+        # Cliente
+        customer = sale.customer
+        customer_party = etree.SubElement(line, f'{{{cac}}}AccountingCustomerParty')
+        etree.SubElement(customer_party, f'{{{cbc}}}CustomerAssignedAccountID').text = customer.document_number or '-'
+        etree.SubElement(customer_party, f'{{{cbc}}}AdditionalAccountID').text = self.DOCUMENT_TYPE_CODES.get(
+            customer.document_type.upper(),
+            '1'  # Default: DNI
+        )
+
+        # Estado: 1 = Adicionar
+        status = etree.SubElement(line, f'{{{cac}}}Status')
+        etree.SubElement(status, f'{{{cbc}}}ConditionCode').text = '1'
+
+        etree.SubElement(line, f'{{{sac}}}TotalAmount', currencyID='PEN').text = self._format_decimal(sale.total)
+
+        # Operaciones gravadas (01)
+        billing = etree.SubElement(line, f'{{{sac}}}BillingPayment')
+        etree.SubElement(billing, f'{{{cbc}}}PaidAmount', currencyID='PEN').text = self._format_decimal(sale.subtotal)
+        etree.SubElement(billing, f'{{{cbc}}}InstructionID').text = '01'
+
+        # IGV
+        tax_total = etree.SubElement(line, f'{{{cac}}}TaxTotal')
+        etree.SubElement(tax_total, f'{{{cbc}}}TaxAmount', currencyID='PEN').text = self._format_decimal(sale.tax)
+        tax_subtotal = etree.SubElement(tax_total, f'{{{cac}}}TaxSubtotal')
+        etree.SubElement(tax_subtotal, f'{{{cbc}}}TaxAmount', currencyID='PEN').text = self._format_decimal(sale.tax)
+        tax_category = etree.SubElement(tax_subtotal, f'{{{cac}}}TaxCategory')
+        tax_scheme = etree.SubElement(tax_category, f'{{{cac}}}TaxScheme')
+        etree.SubElement(tax_scheme, f'{{{cbc}}}ID').text = '1000'
+        etree.SubElement(tax_scheme, f'{{{cbc}}}Name').text = 'IGV'
+        etree.SubElement(tax_scheme, f'{{{cbc}}}TaxTypeCode').text = 'VAT'
+
     def _build_header(self, root, sale):
         """
         Construir encabezado del documento
@@ -163,13 +476,15 @@ class XMLBuilder:
         party_legal = etree.SubElement(party, f'{{{cac}}}PartyLegalEntity')
         etree.SubElement(party_legal, f'{{{cbc}}}RegistrationName').text = self.company_name
 
-        # Dirección
+        # Dirección (UBL exige ID antes de AddressTypeCode)
         address = etree.SubElement(party_legal, f'{{{cac}}}RegistrationAddress')
-        etree.SubElement(address, f'{{{cbc}}}AddressTypeCode').text = '0000'
 
         # Ubigeo (código de ubicación geográfica)
         etree.SubElement(address, f'{{{cbc}}}ID').text = self.company_ubigeo
 
+        # Código de establecimiento anexo: 0000 = domicilio fiscal
+        etree.SubElement(address, f'{{{cbc}}}AddressTypeCode').text = '0000'
+
         # Dirección textual
         address_line = etree.SubElement(address, f'{{{cac}}}AddressLine')
         etree.SubElement(address_line, f'{{{cbc}}}Line').text = self.company_address
@@ -408,37 +723,12 @@ class XMLBuilder:
 
     def validate_xml(self, xml_string: str) -> tuple[bool, list[str]]:
         """
-        Validar estructura básica del XML generado
+        Validar el XML generado contra los XSD de UBL 2.1 / SUNAT
 
         Args:
-            xml_string: XML como string
+            xml_string: XML como string (o árbol lxml)
 
         Returns:
             tuple: (is_valid, errors_list)
         """
-        errors = []
-
-        try:
-            # Parsear XML
-            root = etree.fromstring(xml_string.encode('utf-8'))
-
-            # Validaciones básicas
-            if root.tag != '{urn:oasis:names:specification:ubl:schema:xsd:Invoice-2}Invoice':
-                errors.append("Elemento raíz no es Invoice")
-
-            # Verificar elementos requeridos
-            cbc = self.NAMESPACES['cbc']
-            required_elements = ['UBLVersionID', 'ID', 'IssueDate', 'InvoiceTypeCode']
-
-            for element_name in required_elements:
-                if root.find(f'.//{{{cbc}}}{element_name}') is None:
-                    errors.append(f"Elemento requerido faltante: {element_name}")
-
-            return (len(errors) == 0, errors)
-
-        except etree.XMLSyntaxError as e:
-            errors.append(f"Error de sintaxis XML: {str(e)}")
-            return (False, errors)
-        except Exception as e:
-            errors.append(f"Error validando XML: {str(e)}")
-            return (False, errors)
+        return self.validator.validate(xml_string)
@@ -0,0 +1,244 @@
+"""
+Firma digital XML-DSig de comprobantes UBL / SUNAT
+Certificado PKCS#12 cargado una vez por proceso y firma local (sin ida y vuelta al PSE)
+"""
+import os
+import base64
+import threading
+import time
+from flask import current_app
+from loguru import logger
+from lxml import etree
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+
+# Certificados cargados por proceso: (ruta, mtime) -> _SigningKey
+_KEYS = {}
+_lock = threading.Lock()
+
+
+class _SigningKey:
+    """Clave privada y certificado X.509 (DER en base64) de la empresa"""
+
+    def __init__(self, private_key, certificate):
+        self.private_key = private_key
+        self.certificate = certificate
+        self.certificate_b64 = base64.b64encode(
+            certificate.public_bytes(serialization.Encoding.DER)
+        ).decode('ascii')
+
+
+class XMLSigner:
+    """
+    Firmante XML-DSig de boletas y resúmenes diarios
+
+    Genera la firma enveloped que exige SUNAT dentro de
+    ext:UBLExtensions/ext:UBLExtension/ext:ExtensionContent (primer hijo
+    del elemento raíz), con Id SignatureSP para que coincida con la
+    referencia de cac:Signature:
+
+    - Reference URI="" con transformación enveloped-signature
+    - Canonicalización C14N inclusiva (REC-xml-c14n-20010315)
+    - Digest y firma RSA con el algoritmo de XML_SIGNATURE_ALGORITHM
+
+    El DigestValue de la referencia es el "valor resumen" del comprobante
+    (se imprime en el QR y se guarda en Sale.hash).
+
+    Leer un PKCS#12 (descifrado con la contraseña) toma decenas de
+    milisegundos; firmar, cerca de un milisegundo. El certificado se carga
+    una sola vez por proceso y se recarga si el archivo cambia (renovación).
+    """
+
+    SIGNATURE_ID = 'SignatureSP'
+
+    DS = 'http://www.w3.org/2000/09/xmldsig#'
+    EXT = 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2'
+
+    C14N_METHOD = 'http://www.w3.org/TR/2001/REC-xml-c14n-20010315'
+    ENVELOPED_TRANSFORM = 'http://www.w3.org/2000/09/xmldsig#enveloped-signature'
+
+    # Algoritmo -> (hash, DigestMethod, SignatureMethod)
+    ALGORITHMS = {
+        'sha256': (
+            hashes.SHA256,
+            'http://www.w3.org/2001/04/xmlenc#sha256',
+            'http://www.w3.org/2001/04/xmldsig-more#rsa-sha256'
+        ),
+        'sha1': (
+            hashes.SHA1,
+            'http://www.w3.org/2000/09/xmldsig#sha1',
+            'http://www.w3.org/2000/09/xmldsig#rsa-sha1'
+        ),
+    }
+
+    def __init__(self):
+        """Inicializar firmante con configuración del certificado"""
+        self.enabled = current_app.config.get('XML_SIGNING_ENABLED', False)
+        self.cert_path = current_app.config.get('SIGNING_CERT_PATH')
+        self.cert_password = current_app.config.get('SIGNING_CERT_PASSWORD')
+
+        algorithm = current_app.config.get('XML_SIGNATURE_ALGORITHM', 'sha256')
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Algoritmo de firma no soportado: {algorithm}")
+        self.hash_class, self.digest_method, self.signature_method = self.ALGORITHMS[algorithm]
+
+    def sign(self, document) -> tuple[str, str]:
+        """
+        Firmar un comprobante
+
+        Si el documento ya tenía ext:UBLExtensions se reemplaza (re-firma).
+
+        Args:
+            document: XML como str/bytes o árbol lxml (el árbol se modifica)
+
+        Returns:
+            tuple: (signed_xml, digest_value) con el DigestValue en base64
+        """
+        root = self._to_element(document)
+        key = self.key()
+
+        for extensions in root.findall(f'{{{self.EXT}}}UBLExtensions'):
+            root.remove(extensions)
+
+        extensions = etree.Element(f'{{{self.EXT}}}UBLExtensions')
+        extension = etree.SubElement(extensions, f'{{{self.EXT}}}UBLExtension')
+        content = etree.SubElement(extension, f'{{{self.EXT}}}ExtensionContent')
+        root.insert(0, extensions)
+
+        # Enveloped: el digest se calcula sobre el documento sin ds:Signature,
+        # que es exactamente el documento antes de insertarla
+        digest_value = self._b64(self._digest(etree.tostring(root, method='c14n')))
+
+        signature = etree.SubElement(
+            content, f'{{{self.DS}}}Signature', Id=self.SIGNATURE_ID, nsmap={'ds': self.DS}
+        )
+        signed_info = self._build_signed_info(signature, digest_value)
+
+        signature_value = key.private_key.sign(
+            etree.tostring(signed_info, method='c14n'),
+            padding.PKCS1v15(),
+            self.hash_class()
+        )
+        etree.SubElement(signature, f'{{{self.DS}}}SignatureValue').text = self._b64(signature_value)
+
+        key_info = etree.SubElement(signature, f'{{{self.DS}}}KeyInfo')
+        x509_data = etree.SubElement(key_info, f'{{{self.DS}}}X509Data')
+        etree.SubElement(x509_data, f'{{{self.DS}}}X509Certificate').text = key.certificate_b64
+
+        # Serialización compacta: cualquier espacio agregado después invalida la firma
+        signed_xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8').decode('utf-8')
+        return signed_xml, digest_value
+
+    def sign_batch(self, documents) -> dict:
+        """
+        Firmar muchos comprobantes con el mismo certificado cargado
+
+        Args:
+            documents: Iterable de (clave, documento); documento como en sign()
+
+        Returns:
+            dict: {'signed': {clave: (signed_xml, digest_value)},
+                   'errors': {clave: str}, 'elapsed_ms': float}
+        """
+        started = time.perf_counter()
+        self.key()  # Cargar el certificado antes del lote
+
+        signed = {}
+        errors = {}
+        for key, document in documents:
+            try:
+                signed[key] = self.sign(document)
+            except Exception as e:
+                logger.error(f"Error firmando {key}: {e}")
+                errors[key] = str(e)
+
+        return {
+            'signed': signed,
+            'errors': errors,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def key(self) -> _SigningKey:
+        """
+        Clave y certificado de firma (cacheados por proceso)
+
+        Returns:
+            _SigningKey: Clave privada y certificado
+
+        Raises:
+            FileNotFoundError: Si el certificado no existe
+            ValueError: Si el PKCS#12 no contiene clave y certificado
+        """
+        if not self.cert_path or not os.path.exists(self.cert_path):
+            raise FileNotFoundError(f"Certificado de firma no encontrado: {self.cert_path}")
+
+        path = os.path.abspath(self.cert_path)
+        cache_key = (path, os.path.getmtime(path))
+        key = _KEYS.get(cache_key)
+        if key is not None:
+            return key
+
+        with _lock:
+            key = _KEYS.get(cache_key)
+            if key is not None:
+                return key
+
+            started = time.perf_counter()
+            with open(path, 'rb') as f:
+                password = self.cert_password.encode('utf-8') if self.cert_password else None
+                private_key, certificate, _ = pkcs12.load_key_and_certificates(f.read(), password)
+
+            if private_key is None or certificate is None:
+                raise ValueError(f"El certificado {path} no contiene clave privada y certificado")
+
+            # Un certificado renovado reemplaza al anterior
+            for stale in [k for k in _KEYS if k[0] == path]:
+                del _KEYS[stale]
+
+            key = _KEYS[cache_key] = _SigningKey(private_key, certificate)
+            logger.info(
+                f"Certificado de firma cargado en {(time.perf_counter() - started) * 1000:.0f} ms "
+                f"(vence {certificate.not_valid_after_utc:%Y-%m-%d})"
+            )
+            return key
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    def _build_signed_info(self, signature, digest_value):
+        """ds:SignedInfo con la referencia enveloped al documento completo"""
+        ds = self.DS
+
+        signed_info = etree.SubElement(signature, f'{{{ds}}}SignedInfo')
+        etree.SubElement(signed_info, f'{{{ds}}}CanonicalizationMethod', Algorithm=self.C14N_METHOD)
+        etree.SubElement(signed_info, f'{{{ds}}}SignatureMethod', Algorithm=self.signature_method)
+
+        reference = etree.SubElement(signed_info, f'{{{ds}}}Reference', URI='')
+        transforms = etree.SubElement(reference, f'{{{ds}}}Transforms')
+        etree.SubElement(transforms, f'{{{ds}}}Transform', Algorithm=self.ENVELOPED_TRANSFORM)
+        etree.SubElement(reference, f'{{{ds}}}DigestMethod', Algorithm=self.digest_method)
+        etree.SubElement(reference, f'{{{ds}}}DigestValue').text = digest_value
+
+        return signed_info
+
+    def _digest(self, data):
+        digest = hashes.Hash(self.hash_class())
+        digest.update(data)
+        return digest.finalize()
+
+    @staticmethod
+    def _b64(data):
+        return base64.b64encode(data).decode('ascii')
+
+    @staticmethod
+    def _to_element(document):
+        if isinstance(document, etree._ElementTree):
+            return document.getroot()
+        if isinstance(document, etree._Element):
+            return document
+        if isinstance(document, str):
+            document = document.encode('utf-8')
+        return etree.fromstring(document)
@@ -0,0 +1,171 @@
+"""
+Validación de XML UBL 2.1 / SUNAT contra los esquemas XSD
+Esquemas compilados una vez por proceso y validación por lotes
+"""
+import os
+import threading
+import time
+from flask import current_app
+from loguru import logger
+from lxml import etree
+
+
+# Esquemas compilados por proceso: ruta del XSD -> etree.XMLSchema
+_SCHEMAS = {}
+_MISSING = set()
+_lock = threading.Lock()
+
+
+class UBLSchemaValidator:
+    """
+    Validador de comprobantes contra los XSD de UBL 2.1 y SUNAT
+
+    Los XSD se leen de UBL_XSD_DIR (estructura de la distribución:
+    maindoc/UBL-Invoice-2.1.xsd, common/..., y el esquema SUNAT del
+    Resumen Diario en maindoc/). Compilar un XMLSchema de UBL toma
+    cientos de milisegundos; validar un documento, fracciones de
+    milisegundo, por eso cada esquema se compila una sola vez por proceso.
+
+    Sin los XSD disponibles (o con UBL_SCHEMA_VALIDATION desactivado) se
+    aplica solo la validación estructural mínima (elementos obligatorios).
+    """
+
+    # Elemento raíz -> XSD relativo a UBL_XSD_DIR
+    SCHEMA_FILES = {
+        'Invoice': os.path.join('maindoc', 'UBL-Invoice-2.1.xsd'),
+        'SummaryDocuments': os.path.join('maindoc', 'UBLPE-SummaryDocuments-1.0.xsd'),
+    }
+
+    # Validación estructural mínima sin XSD
+    REQUIRED_ELEMENTS = {
+        'Invoice': ('UBLVersionID', 'ID', 'IssueDate', 'InvoiceTypeCode'),
+        'SummaryDocuments': ('UBLVersionID', 'ID', 'ReferenceDate', 'IssueDate'),
+    }
+
+    CBC = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+
+    def __init__(self):
+        """Inicializar validador con configuración de esquemas"""
+        self.xsd_dir = current_app.config.get('UBL_XSD_DIR')
+        self.enabled = current_app.config.get('UBL_SCHEMA_VALIDATION', True)
+
+    def validate(self, document) -> tuple[bool, list[str]]:
+        """
+        Validar un comprobante
+
+        Args:
+            document: Árbol lxml (se valida antes de serializar) o XML como str/bytes
+
+        Returns:
+            tuple: (is_valid, errors_list)
+        """
+        try:
+            root = self._to_element(document)
+        except etree.XMLSyntaxError as e:
+            return False, [f"Error de sintaxis XML: {e}"]
+
+        doc_type = etree.QName(root).localname
+        schema = self.schema(doc_type)
+
+        if schema is None:
+            return self._validate_structure(root, doc_type)
+
+        if schema.validate(root):
+            return True, []
+
+        errors = [f"Línea {error.line}: {error.message}" for error in schema.error_log]
+        return False, errors
+
+    def validate_batch(self, documents) -> dict:
+        """
+        Validar muchos comprobantes en una pasada (mismo esquema compilado)
+
+        Args:
+            documents: Iterable de (clave, documento); documento como en validate()
+
+        Returns:
+            dict: {'checked': int, 'valid': int, 'invalid': int,
+                   'errors': {clave: [str]}, 'elapsed_ms': float}
+        """
+        started = time.perf_counter()
+        checked = valid = 0
+        errors = {}
+
+        for key, document in documents:
+            checked += 1
+            is_valid, document_errors = self.validate(document)
+            if is_valid:
+                valid += 1
+            else:
+                errors[key] = document_errors
+
+        return {
+            'checked': checked,
+            'valid': valid,
+            'invalid': checked - valid,
+            'errors': errors,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def schema(self, doc_type):
+        """
+        XMLSchema compilado para el tipo de documento (cacheado por proceso)
+
+        Args:
+            doc_type: Nombre local del elemento raíz (Invoice, SummaryDocuments)
+
+        Returns:
+            etree.XMLSchema | None: None si el XSD no está disponible
+        """
+        relative = self.SCHEMA_FILES.get(doc_type)
+        if not self.enabled or not relative or not self.xsd_dir:
+            return None
+
+        path = os.path.abspath(os.path.join(self.xsd_dir, relative))
+        schema = _SCHEMAS.get(path)
+        if schema is not None or path in _MISSING:
+            return schema
+
+        with _lock:
+            if path in _SCHEMAS or path in _MISSING:
+                return _SCHEMAS.get(path)
+
+            if not os.path.exists(path):
+                _MISSING.add(path)
+                logger.warning(f"XSD no encontrado ({path}), se aplica solo validación estructural")
+                return None
+
+            started = time.perf_counter()
+            schema = etree.XMLSchema(etree.parse(path))
+            _SCHEMAS[path] = schema
+            logger.info(
+                f"Esquema {doc_type} compilado en {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return schema
+
+    # ===================
+    # MÉTODOS PRIVADOS
+    # ===================
+
+    @staticmethod
+    def _to_element(document):
+        if isinstance(document, etree._ElementTree):
+            return document.getroot()
+        if isinstance(document, etree._Element):
+            return document
+        if isinstance(document, str):
+            document = document.encode('utf-8')
+        return etree.fromstring(document)
+
+    def _validate_structure(self, root, doc_type):
+        """Validación mínima: tipo de documento y elementos obligatorios"""
+        required = self.REQUIRED_ELEMENTS.get(doc_type)
+        if required is None:
+            return False, [f"Elemento raíz no soportado: {doc_type}"]
+
+        errors = [
+            f"Elemento requerido faltante: {name}"
+            for name in required
+            if root.find(f'{{{self.CBC}}}{name}') is None
+        ]
+        return len(errors) == 0, errors
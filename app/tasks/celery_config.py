@@ -17,6 +17,42 @@ beat_schedule = {
         }
     },
 
+    # Drenar la cola de contingencia del PSE cada minuto
+    'drain-pse-contingency-every-minute': {
+        'task': 'app.tasks.sunat_tasks.drain_pse_contingency',
+        'schedule': crontab(minute='*'),  # Cada minuto
+        'options': {
+            'expires': 50,  # La tarea expira en 50 segundos
+        }
+    },
+
+    # Sincronización incremental de productos WooCommerce cada 5 minutos
+    'sync-products-incremental-every-5min': {
+        'task': 'app.tasks.product_tasks.sync_products_incremental',
+        'schedule': crontab(minute='*/5'),  # Cada 5 minutos
+        'options': {
+            'expires': 60 * 4,  # La tarea expira en 4 minutos (evita ejecuciones acumuladas)
+        }
+    },
+
+    # Reconciliación del catálogo (despublicados y variaciones) cada hora
+    'reconcile-products-hourly': {
+        'task': 'app.tasks.product_tasks.reconcile_products',
+        'schedule': crontab(minute=20),  # Cada hora, al minuto 20
+        'options': {
+            'expires': 60 * 50,  # La tarea expira en 50 minutos
+        }
+    },
+
+    # Aplicar webhooks de productos pendientes (respaldo si no se programó la tarea diferida)
+    'apply-product-webhooks-every-minute': {
+        'task': 'app.tasks.product_tasks.apply_product_webhooks',
+        'schedule': crontab(minute='*'),  # Cada minuto
+        'options': {
+            'expires': 50,  # La tarea expira en 50 segundos
+        }
+    },
+
     # Generar reporte diario de SUNAT a las 23:00
     'generate-daily-sunat-report': {
         'task': 'app.tasks.sunat_tasks.generate_daily_report',
@@ -26,6 +62,33 @@ beat_schedule = {
         }
     },
 
+    # Generar reporte mensual de ventas (mes anterior) el día 1 a las 01:00
+    'generate-monthly-sales-report': {
+        'task': 'app.tasks.sunat_tasks.generate_monthly_report',
+        'schedule': crontab(hour=1, minute=0, day_of_month=1),  # Día 1, 01:00
+        'options': {
+            'expires': 60 * 60,  # La tarea expira en 1 hora
+        }
+    },
+
+    # Enviar Resumen Diario de boletas del día anterior a las 00:30
+    'send-daily-summary': {
+        'task': 'app.tasks.sunat_tasks.send_daily_summary',
+        'schedule': crontab(hour=0, minute=30),  # 00:30 todos los días
+        'options': {
+            'expires': 60 * 60,  # La tarea expira en 1 hora
+        }
+    },
+
+    # Consultar tickets de resúmenes diarios cada 15 minutos
+    'check-daily-summaries-every-15min': {
+        'task': 'app.tasks.sunat_tasks.check_daily_summaries',
+        'schedule': crontab(minute='*/15'),  # Cada 15 minutos
+        'options': {
+            'expires': 60 * 10,  # La tarea expira en 10 minutos
+        }
+    },
+
     # Limpiar archivos antiguos todos los domingos a las 02:00
     'cleanup-old-files-weekly': {
         'task': 'app.tasks.sunat_tasks.cleanup_old_files',
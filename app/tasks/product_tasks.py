@@ -0,0 +1,95 @@
+"""
+Tareas asíncronas de productos con Celery
+
+Sincronización periódica del catálogo local con WooCommerce
+"""
+from celery import shared_task
+from loguru import logger
+
+from app.services.woocommerce_service import WooCommerceService
+from app.services.product_webhook_service import ProductWebhookService
+from app.tasks.worker_app import get_worker_app
+
+
+@shared_task
+def sync_products_incremental():
+    """
+    Tarea periódica: Sincronización incremental de productos
+
+    Ejecutar cada 5 minutos vía Celery Beat
+
+    Descarga solo los productos modificados desde la última ejecución.
+    Sin marca de agua previa realiza una sincronización completa.
+
+    Returns:
+        dict: Estadísticas de la sincronización
+    """
+    with get_worker_app().app_context():
+        try:
+            logger.info("[Celery] Iniciando sincronización incremental de productos")
+
+            result = WooCommerceService().sync_products_incremental()
+
+            logger.info(f"[Celery] {result['message']}")
+            return result
+
+        except Exception as e:
+            logger.error(f"[Celery] Error en sincronización incremental de productos: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
+@shared_task
+def reconcile_products():
+    """
+    Tarea periódica: Reconciliación del catálogo de productos
+
+    Ejecutar cada hora vía Celery Beat
+
+    Recorre los IDs publicados y las variaciones de cada producto variable
+    (una consulta por producto variable): desactiva los despublicados o
+    eliminados y sincroniza las variaciones modificadas sin cambio en el padre.
+
+    Returns:
+        dict: Estadísticas de la reconciliación
+    """
+    with get_worker_app().app_context():
+        try:
+            logger.info("[Celery] Iniciando reconciliación de productos")
+
+            result = WooCommerceService().reconcile_products()
+
+            logger.info(f"[Celery] {result['message']}")
+            return result
+
+        except Exception as e:
+            logger.error(f"[Celery] Error en reconciliación de productos: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
+@shared_task
+def apply_product_webhooks():
+    """
+    Tarea diferida/periódica: Aplicar webhooks de productos pendientes
+
+    Se programa desde el endpoint de webhooks al final de la ventana de
+    coalescencia y además cada minuto vía Celery Beat como respaldo.
+
+    Returns:
+        dict: Estadísticas de la aplicación
+    """
+    with get_worker_app().app_context():
+        try:
+            return ProductWebhookService().apply_pending()
+
+        except Exception as e:
+            logger.error(f"[Celery] Error aplicando webhooks de productos: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
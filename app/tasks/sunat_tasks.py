@@ -4,25 +4,38 @@ Tareas asíncronas para SUNAT con Celery
 Tareas para envío de comprobantes a SUNAT sin bloquear el POS
 """
 from celery import shared_task
-from datetime import datetime, timedelta
+from flask import current_app
+import calendar
+from datetime import date, datetime, timedelta
 from loguru import logger
 
-from app import create_app, db
+from app import db
 from app.models.sale import Sale
+from app.models.daily_summary import DailySummary
 from app.services.pse_service import PSEService
 from app.services.pdf_service import PDFService
+from app.services.pdf_batch import PDFBatchService
+from app.services.sale_bundle import SaleBundle
+from app.services.sale_events import SaleEventService
+from app.services.sales_report import SalesReportService
+from app.utils.helpers import lima_today
+from app.tasks.worker_app import get_worker_app
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=300)
-def send_sale_to_sunat_async(self, sale_id):
+@shared_task
+def send_sale_to_sunat_async(sale_id):
     """
     Tarea asíncrona: Enviar boleta a SUNAT
 
     Ventajas:
     - No bloquea la interfaz del POS
-    - Reintentos automáticos (3 veces, cada 5 minutos)
+    - Fallos de transporte (timeout, conexión, 5xx, circuito abierto):
+      la venta queda PENDING en contingencia y la reenvía drain_pse_contingency
+    - Errores de validación o rechazos del PSE son definitivos: no se
+      reintentan ni cambian el estado de la venta
     - Si es ACCEPTED → genera PDF automáticamente
     - Usuario puede continuar trabajando mientras se envía
+    - Cada transición se publica en Redis (izisales:sale:<id>) para el stream SSE del POS
 
     Args:
         sale_id: ID de la venta a enviar
@@ -30,72 +43,93 @@ def send_sale_to_sunat_async(self, sale_id):
     Returns:
         dict: Resultado del envío
     """
-    app = create_app()
-
-    with app.app_context():
+    with get_worker_app().app_context():
+        events = SaleEventService()
         try:
             logger.info(f"[Celery] Iniciando envío asíncrono de venta {sale_id} a SUNAT")
+            events.publish(sale_id, 'status', sunat_status='PENDING', message='Enviando a SUNAT', final=False)
 
             # Enviar a SUNAT
             pse_service = PSEService()
             result = pse_service.send_sale_to_sunat(sale_id)
 
+            if result.get('contingency'):
+                # PSE no disponible: sin reintentos propios, la drena drain_pse_contingency
+                logger.warning(f"[Celery] Venta {sale_id} en contingencia: {result.get('message')}")
+                events.publish(sale_id, 'status', sunat_status='PENDING', message=result.get('message'), final=True)
+                return result
+
             if not result['success']:
+                # Error definitivo (validación, XML, rechazo del PSE): el servicio ya
+                # registró el estado que corresponde, la tarea no lo modifica
                 error_message = result.get('message', 'Error desconocido')
-                sunat_status = result.get('sunat_status', 'ERROR')
-
-                # Si es error temporal (timeout, servicio no disponible), reintentar
-                if sunat_status == 'ERROR' or 'TIMEOUT' in error_message.upper():
-                    logger.warning(
-                        f"[Celery] Error temporal en venta {sale_id}, "
-                        f"reintentando ({self.request.retries + 1}/3)..."
-                    )
-                    raise self.retry(exc=Exception(error_message))
-                else:
-                    # Error permanente (validación, rechazado)
-                    logger.error(
-                        f"[Celery] Error permanente en venta {sale_id}: {error_message}"
-                    )
-                    return result
+                if result.get('errors'):
+                    error_message = f"{error_message}: {'; '.join(result['errors'])}"
+                logger.error(f"[Celery] Error definitivo en venta {sale_id}: {error_message}")
+
+                sale = db.session.get(Sale, sale_id)
+                events.publish(
+                    sale_id, 'status', sunat_status=sale.sunat_status if sale else result.get('sunat_status'),
+                    message=error_message, final=True
+                )
+                return result
+
+            status = result.get('sunat_status')
+            events.publish(
+                sale_id, 'status', sunat_status=status,
+                message=result.get('message', ''), final=status != 'ACCEPTED'
+            )
 
             # Si fue aceptado, generar PDF
-            if result.get('sunat_status') == 'ACCEPTED':
+            if status == 'ACCEPTED':
                 logger.info(f"[Celery] Boleta {sale_id} aceptada, generando PDF...")
+                has_pdf = False
                 try:
-                    sale = Sale.query.get(sale_id)
-                    if sale:
+                    bundle = SaleBundle.load(sale_id)
+                    if bundle:
                         pdf_service = PDFService()
-                        pdf_path = pdf_service.generate_invoice_pdf(sale)
-                        sale.pdf_path = pdf_path
+                        pdf_path = pdf_service.generate_invoice_pdf(bundle)
                         db.session.commit()
+                        has_pdf = True
                         logger.info(f"[Celery] PDF generado para venta {sale_id}: {pdf_path}")
                 except Exception as pdf_error:
                     logger.error(f"[Celery] Error generando PDF para venta {sale_id}: {pdf_error}")
                     # No fallar la tarea si solo el PDF falla
 
+                events.publish(
+                    sale_id, 'pdf', has_pdf=has_pdf,
+                    message='PDF listo' if has_pdf else 'No se pudo generar el PDF', final=True
+                )
+
             logger.info(
                 f"[Celery] Venta {sale_id} procesada exitosamente. "
-                f"Estado: {result.get('sunat_status')}"
+                f"Estado: {status}"
             )
             return result
 
         except Exception as e:
             logger.error(f"[Celery] Error procesando venta {sale_id}: {e}")
 
-            # Actualizar estado a ERROR en la base de datos
+            # Marcar ERROR para que la retome retry_failed_sales, salvo que ya esté
+            # aceptada, rechazada o incluida en un resumen diario (RC)
             try:
+                db.session.rollback()
                 sale = Sale.query.get(sale_id)
-                if sale and sale.sunat_status != 'ERROR':
-                    sale.sunat_status = 'ERROR'
+                if sale and sale.is_sendable and sale.sunat_status != 'ERROR':
+                    sale.set_sunat_status('ERROR')
                     sale.sunat_response = f'Error Celery: {str(e)}'
                     sale.sunat_sent_at = datetime.utcnow()
                     db.session.commit()
+                    events.publish(sale_id, 'status', sunat_status='ERROR', message=str(e), final=True)
             except Exception as db_error:
                 logger.error(f"[Celery] Error actualizando estado de venta {sale_id}: {db_error}")
 
-            # Propagar excepción para que Celery maneje reintentos
             raise
 
+        finally:
+            # Envío terminado: el POS puede volver a enviar la boleta
+            PSEService.release_send_lock(sale_id)
+
 
 @shared_task
 def retry_failed_sales():
@@ -113,12 +147,21 @@ def retry_failed_sales():
     Returns:
         dict: Estadísticas de reintentos
     """
-    app = create_app()
-
-    with app.app_context():
+    with get_worker_app().app_context():
         try:
             logger.info("[Celery] Iniciando tarea de reintentos automáticos")
 
+            # Con el PSE caído los reintentos solo sumarían carga: esperar al circuito cerrado
+            pse_service = PSEService()
+            circuit = pse_service.http.breaker.state()['state']
+            if circuit != 'CLOSED':
+                logger.warning(f"[Celery] Circuito PSE {circuit}, reintentos pospuestos")
+                return {
+                    'success': True,
+                    'total_retried': 0,
+                    'message': f'Circuito PSE {circuit}, reintentos pospuestos'
+                }
+
             # Buscar ventas con error hace más de 1 hora
             one_hour_ago = datetime.utcnow() - timedelta(hours=1)
 
@@ -138,11 +181,12 @@ def retry_failed_sales():
 
             logger.info(f"[Celery] Se reintentarán {len(failed_sales)} ventas con error")
 
-            # Lanzar tarea asíncrona para cada venta
+            # Lanzar tarea asíncrona para cada venta, espaciadas al ritmo de drenado
+            interval = 1 / current_app.config.get('PSE_CONTINGENCY_DRAIN_RATE', 1)
             retried_count = 0
             for sale in failed_sales:
                 try:
-                    send_sale_to_sunat_async.delay(sale.id)
+                    send_sale_to_sunat_async.apply_async((sale.id,), countdown=retried_count * interval)
                     retried_count += 1
                     logger.info(f"[Celery] Tarea de reintento lanzada para venta {sale.id}")
                 except Exception as e:
@@ -164,6 +208,32 @@ def retry_failed_sales():
             }
 
 
+@shared_task
+def drain_pse_contingency():
+    """
+    Tarea periódica: Drenar la cola de contingencia del PSE
+
+    Ejecutar cada minuto vía Celery Beat
+
+    Con el circuito abierto no hace nada; en half-open encola una venta de
+    prueba y con el circuito cerrado reencola un lote a ritmo controlado
+    (PSE_CONTINGENCY_DRAIN_BATCH / PSE_CONTINGENCY_DRAIN_RATE).
+
+    Returns:
+        dict: Estado del circuito y ventas reencoladas
+    """
+    with get_worker_app().app_context():
+        try:
+            return PSEService().drain_contingency()
+
+        except Exception as e:
+            logger.error(f"[Celery] Error drenando contingencia PSE: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
 @shared_task
 def generate_daily_report():
     """
@@ -181,45 +251,15 @@ def generate_daily_report():
     Returns:
         dict: Reporte con estadísticas del día
     """
-    app = create_app()
-
-    with app.app_context():
+    with get_worker_app().app_context():
         try:
             logger.info("[Celery] Generando reporte diario de SUNAT")
 
-            # Obtener ventas del día actual
-            today = datetime.utcnow().date()
-
-            sales = Sale.query.filter(
-                db.func.date(Sale.created_at) == today,
-                Sale.is_cancelled == False
-            ).all()
-
-            # Calcular estadísticas
-            total = len(sales)
-            accepted = len([s for s in sales if s.sunat_status == 'ACCEPTED'])
-            rejected = len([s for s in sales if s.sunat_status == 'REJECTED'])
-            error = len([s for s in sales if s.sunat_status == 'ERROR'])
-            pending = len([s for s in sales if s.sunat_status == 'PENDING'])
-
-            # Calcular porcentaje de éxito
-            success_rate = (accepted / total * 100) if total > 0 else 0
-
-            # Calcular total facturado (solo aceptadas)
-            total_facturado = sum(
-                float(s.total) for s in sales
-                if s.sunat_status == 'ACCEPTED'
-            )
-
+            # Un GROUP BY sunat_status sobre el rango UTC del día de Lima
+            today = lima_today()
             report = {
                 'date': today.isoformat(),
-                'total': total,
-                'accepted': accepted,
-                'rejected': rejected,
-                'error': error,
-                'pending': pending,
-                'success_rate': round(success_rate, 2),
-                'total_facturado': round(total_facturado, 2)
+                **SalesReportService(today).status_totals()
             }
 
             logger.info(f"[Celery] Reporte diario SUNAT: {report}")
@@ -242,6 +282,51 @@ def generate_daily_report():
             }
 
 
+@shared_task
+def generate_monthly_report(year=None, month=None):
+    """
+    Tarea periódica: Generar reporte mensual de ventas
+
+    Ejecutar el día 1 a las 01:00 vía Celery Beat (reporta el mes anterior)
+
+    Incluye totales por estado y desgloses por día, vendedor y hora de Lima,
+    todos agregados en SQL (memoria constante sin importar el volumen).
+
+    Args:
+        year: Año del reporte (default: mes anterior)
+        month: Mes del reporte (default: mes anterior)
+
+    Returns:
+        dict: Reporte del mes
+    """
+    with get_worker_app().app_context():
+        try:
+            if year and month:
+                first = date(year, month, 1)
+            else:
+                first = (lima_today().replace(day=1) - timedelta(days=1)).replace(day=1)
+            last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+
+            logger.info(f"[Celery] Generando reporte mensual {first:%Y-%m}")
+            report = SalesReportService(first, last).build()
+            logger.info(
+                f"[Celery] Reporte mensual {first:%Y-%m}: {report['total']} ventas, "
+                f"S/ {report['total_facturado']:.2f} aceptadas"
+            )
+
+            return {
+                'success': True,
+                'report': report
+            }
+
+        except Exception as e:
+            logger.error(f"[Celery] Error generando reporte mensual: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
 @shared_task
 def cleanup_old_files():
     """
@@ -258,18 +343,16 @@ def cleanup_old_files():
     Returns:
         dict: Estadísticas de limpieza
     """
-    app = create_app()
-
-    with app.app_context():
+    with get_worker_app().app_context():
         try:
             import os
             from pathlib import Path
 
             logger.info("[Celery] Iniciando limpieza de archivos antiguos")
 
-            xml_dir = Path(app.config.get('XML_PATH'))
-            cdr_dir = Path(app.config.get('CDR_PATH'))
-            pdf_dir = Path(app.config.get('PDF_PATH'))
+            xml_dir = Path(current_app.config.get('XML_PATH'))
+            cdr_dir = Path(current_app.config.get('CDR_PATH'))
+            pdf_dir = Path(current_app.config.get('PDF_PATH'))
             qr_dir = pdf_dir / 'qr'
 
             six_months_ago = datetime.utcnow() - timedelta(days=180)
@@ -291,7 +374,7 @@ def cleanup_old_files():
                         cdr_file.unlink()
                         cleaned_files += 1
 
-            # Limpiar QR codes antiguos
+            # Limpiar QR codes antiguos (PNG de versiones que no generaban el QR en memoria)
             if qr_dir.exists():
                 for qr_file in qr_dir.glob('*.png'):
                     if datetime.fromtimestamp(qr_file.stat().st_mtime) < six_months_ago:
@@ -326,3 +409,152 @@ def cleanup_old_files():
                 'success': False,
                 'error': str(e)
             }
+
+
+@shared_task
+def send_daily_summary(reference_date=None):
+    """
+    Tarea periódica: Enviar Resumen Diario (RC) de boletas
+
+    Ejecutar a las 00:30 vía Celery Beat para las boletas del día anterior
+
+    Args:
+        reference_date: Fecha de las boletas en formato YYYY-MM-DD
+                        (default: ayer en hora de Lima)
+
+    Returns:
+        dict: Resultado del envío
+    """
+    with get_worker_app().app_context():
+        try:
+            day = (
+                datetime.strptime(reference_date, '%Y-%m-%d').date()
+                if reference_date else lima_today() - timedelta(days=1)
+            )
+
+            logger.info(f"[Celery] Enviando resumen diario de boletas del {day.isoformat()}")
+
+            result = PSEService().send_daily_summary(day)
+
+            logger.info(f"[Celery] {result['message']}")
+            return result
+
+        except Exception as e:
+            logger.error(f"[Celery] Error enviando resumen diario: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
+@shared_task
+def check_daily_summaries():
+    """
+    Tarea periódica: Consultar tickets de resúmenes diarios en proceso
+
+    Ejecutar cada 15 minutos vía Celery Beat
+
+    Returns:
+        dict: Resúmenes consultados y procesados
+    """
+    with get_worker_app().app_context():
+        try:
+            pending = DailySummary.query.filter_by(status='SENT').all()
+            pse_service = PSEService()
+
+            processed = 0
+            for summary in pending:
+                result = pse_service.check_daily_summary(summary.id)
+                if result.get('status') != 'SENT':
+                    processed += 1
+
+            if pending:
+                logger.info(f"[Celery] Resúmenes consultados: {len(pending)}, procesados: {processed}")
+
+            return {
+                'success': True,
+                'checked': len(pending),
+                'processed': processed
+            }
+
+        except Exception as e:
+            logger.error(f"[Celery] Error consultando resúmenes diarios: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
+@shared_task
+def generate_pdfs_bulk(date_from=None, date_to=None, sale_ids=None):
+    """
+    Tarea: Generar en masa los PDF de boletas aceptadas (reimpresión mensual)
+
+    Los procesos del worker de Celery no pueden crear un pool propio: cada
+    lote se encola como generate_pdf_chunk y los reparte el pool prefork.
+
+    Args:
+        date_from: Primer día en formato YYYY-MM-DD
+        date_to: Último día (inclusive) en formato YYYY-MM-DD
+        sale_ids: Lista explícita de IDs de venta
+
+    Returns:
+        dict: Ventas y lotes encolados
+    """
+    with get_worker_app().app_context():
+        try:
+            def parse(value):
+                return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+            service = PDFBatchService()
+            ids = service.select_sale_ids(parse(date_from), parse(date_to), sale_ids)
+            chunks = service.chunks(ids)
+
+            for chunk in chunks:
+                generate_pdf_chunk.delay(chunk)
+
+            logger.info(f"[Celery] PDF masivos: {len(ids)} ventas en {len(chunks)} lotes encolados")
+
+            return {
+                'success': True,
+                'total': len(ids),
+                'chunks': len(chunks)
+            }
+
+        except Exception as e:
+            logger.error(f"[Celery] Error encolando PDF masivos: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+
+@shared_task
+def generate_pdf_chunk(sale_ids):
+    """
+    Tarea: Renderizar y guardar los PDF de un lote de ventas
+
+    Args:
+        sale_ids: IDs de las ventas del lote
+
+    Returns:
+        dict: Resultado de PDFBatchService.render_chunk con PDF/s del proceso
+    """
+    with get_worker_app().app_context():
+        try:
+            result = PDFBatchService().render_chunk(sale_ids)
+            elapsed = result['elapsed_ms'] / 1000
+            result['pdfs_per_second'] = round(result['rendered'] / elapsed, 1) if elapsed else 0.0
+
+            logger.info(
+                f"[Celery] Lote de PDF: {result['rendered']}/{len(sale_ids)} "
+                f"({result['pdfs_per_second']} PDF/s en este proceso)"
+            )
+            return {'success': not result['errors'], **result}
+
+        except Exception as e:
+            logger.error(f"[Celery] Error generando lote de PDF: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
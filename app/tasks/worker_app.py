@@ -0,0 +1,72 @@
+"""
+App de Flask por proceso worker de Celery
+
+Las tareas se enlazan a una única app (y a su engine/pool de SQLAlchemy)
+creada una vez por proceso, en lugar de llamar a create_app() en cada
+ejecución (sinks de loguru, blueprints, engine nuevo y directorios de
+storage por tarea).
+"""
+import os
+import threading
+from loguru import logger
+
+from app import create_app, db
+
+_app = None
+_pid = None
+_lock = threading.Lock()
+
+
+def get_worker_app():
+    """
+    Obtener la app del proceso actual (se crea en el primer uso)
+
+    Si el proceso es hijo de un fork (pool prefork de Celery), las
+    conexiones heredadas del padre se descartan antes de reutilizar la app.
+
+    Returns:
+        app: Instancia de Flask del proceso
+    """
+    global _app, _pid
+
+    with _lock:
+        if _app is None:
+            _app = create_app()
+            _pid = os.getpid()
+        elif _pid != os.getpid():
+            _reset_pools(_app)
+            _pid = os.getpid()
+
+        return _app
+
+
+def init_worker_process():
+    """
+    Inicializar la app en un proceso worker recién creado
+
+    Conectado a la señal worker_process_init en celery_app.py.
+    """
+    app = get_worker_app()
+    logger.info(f"[Celery] App de worker lista (pid {os.getpid()})")
+    return app
+
+
+def shutdown_worker_process():
+    """Cerrar las conexiones del pool al terminar el proceso worker"""
+    with _lock:
+        if _app is not None and _pid == os.getpid():
+            with _app.app_context():
+                for engine in db.engines.values():
+                    engine.dispose()
+
+
+def _reset_pools(app):
+    """
+    Descartar las conexiones heredadas del proceso padre
+
+    close=False: el socket sigue siendo del padre, el hijo solo abandona
+    sus referencias y abre conexiones propias.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -17,7 +17,8 @@ from app.utils.helpers import (
     generate_secret_key,
     flash_errors,
     get_or_404,
-    paginate
+    paginate,
+    keyset_paginate
 )
 
 from app.utils.constants import (
@@ -52,6 +53,7 @@ __all__ = [
     'flash_errors',
     'get_or_404',
     'paginate',
+    'keyset_paginate',
     # Constants
     'DOCUMENT_TYPES',
     'USER_ROLES',
@@ -2,7 +2,9 @@
 Funciones auxiliares y utilidades
 """
 from flask import flash, redirect, url_for
+from sqlalchemy import or_
 from functools import wraps
+from datetime import date, datetime, time, timedelta
 import secrets
 
 
@@ -57,3 +59,110 @@ def paginate(query, page: int = 1, per_page: int = 20):
         Pagination: Objeto de paginación
     """
     return query.paginate(page=page, per_page=per_page, error_out=False)
+
+
+def encode_cursor(value: datetime, row_id: int) -> str:
+    """Cursor de paginación (fecha, id) como texto apto para URL"""
+    return f"{value.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor: str):
+    """
+    Leer un cursor de encode_cursor
+
+    Returns:
+        tuple: (datetime, id) o None si el cursor no es válido
+    """
+    try:
+        value, row_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(value), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_paginate(query, sort_column, id_column, after: str = None, before: str = None,
+                    per_page: int = 20) -> dict:
+    """
+    Paginación por cursor sobre (sort_column, id) descendente
+
+    A diferencia de paginate() no usa OFFSET ni COUNT: cada página es un
+    rango del índice a partir del último (o primer) registro visto, así
+    que su costo no crece con la profundidad.
+
+    Args:
+        query: Query SQLAlchemy (sin order_by)
+        sort_column: Columna de orden (p. ej. Sale.created_at)
+        id_column: Clave primaria (desempate)
+        after: Cursor del último registro de la página anterior (siguiente página)
+        before: Cursor del primer registro de la página siguiente (página anterior)
+        per_page: Items por página
+
+    Returns:
+        dict: {'items': list, 'next_cursor': str|None, 'prev_cursor': str|None}
+    """
+    backwards = bool(before and decode_cursor(before))
+    cursor = decode_cursor(before if backwards else after)
+
+    if backwards:
+        value, row_id = cursor
+        query = query.filter(
+            sort_column >= value,
+            or_(sort_column > value, id_column > row_id)
+        ).order_by(sort_column.asc(), id_column.asc())
+    else:
+        if cursor:
+            value, row_id = cursor
+            query = query.filter(
+                sort_column <= value,
+                or_(sort_column < value, id_column < row_id)
+            )
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+
+    has_next = True if backwards else has_more
+    has_prev = has_more if backwards else cursor is not None
+
+    def cursor_of(item):
+        return encode_cursor(getattr(item, sort_column.key), getattr(item, id_column.key))
+
+    return {
+        'items': items,
+        'next_cursor': cursor_of(items[-1]) if items and has_next else None,
+        'prev_cursor': cursor_of(items[0]) if items and has_prev else None
+    }
+
+
+# Perú no aplica horario de verano: hora de Lima = UTC-5 todo el año
+LIMA_UTC_OFFSET = timedelta(hours=-5)
+
+
+def lima_today() -> date:
+    """Fecha actual en Lima"""
+    return (datetime.utcnow() + LIMA_UTC_OFFSET).date()
+
+
+def lima_date(value: datetime) -> date:
+    """Fecha en Lima de un datetime UTC (created_at, sent_at...)"""
+    return (value + LIMA_UTC_OFFSET).date()
+
+
+def lima_day_bounds(day: date) -> tuple:
+    """
+    Rango UTC [inicio, fin) de un día calendario de Lima
+
+    Las fechas se guardan en UTC (datetime.utcnow); filtrar con este rango
+    permite usar el índice de created_at.
+
+    Args:
+        day: Fecha en Lima
+
+    Returns:
+        tuple: (start_utc, end_utc) como datetime sin zona horaria
+    """
+    start = datetime.combine(day, time.min) - LIMA_UTC_OFFSET
+    return start, start + timedelta(days=1)
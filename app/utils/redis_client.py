@@ -0,0 +1,29 @@
+"""
+Cliente Redis compartido por proceso
+"""
+import os
+import threading
+import redis
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_redis_client(url):
+    """
+    Cliente Redis del proceso actual (pool de conexiones propio, se recrea tras un fork)
+
+    Args:
+        url: URL de Redis
+
+    Returns:
+        redis.Redis: Cliente del proceso actual
+    """
+    key = (url, os.getpid())
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = redis.Redis.from_url(url, socket_connect_timeout=2, socket_timeout=2)
+            _clients[key] = client
+        return client
@@ -4,8 +4,9 @@ Inicialización de Celery para iziSales
 Este archivo configura Celery con Flask usando el Application Factory Pattern
 """
 from celery import Celery
-from app import create_app
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.tasks.celery_config import beat_schedule, timezone
+from app.tasks.worker_app import get_worker_app, init_worker_process, shutdown_worker_process
 
 
 def make_celery(app=None):
@@ -13,13 +14,13 @@ def make_celery(app=None):
     Crear instancia de Celery configurada con Flask
 
     Args:
-        app: Instancia de Flask (opcional)
+        app: Instancia de Flask (opcional, por defecto la app del worker)
 
     Returns:
         celery: Instancia de Celery configurada
     """
     if app is None:
-        app = create_app()
+        app = get_worker_app()
 
     celery = Celery(
         app.import_name,
@@ -53,6 +54,18 @@ def make_celery(app=None):
     return celery
 
 
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    """Cada proceso hijo reutiliza la app y abre su propio pool de conexiones"""
+    init_worker_process()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs):
+    """Cerrar las conexiones del proceso hijo"""
+    shutdown_worker_process()
+
+
 # Crear instancia de Celery
 celery = make_celery()
 
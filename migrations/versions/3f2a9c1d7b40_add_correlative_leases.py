@@ -0,0 +1,42 @@
+"""Add correlative_leases table
+
+Revision ID: 3f2a9c1d7b40
+Revises: abc123456789
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b40'
+down_revision = 'abc123456789'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bloques de correlativos reservados por proceso (trazabilidad de saltos)
+    op.create_table('correlative_leases',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('correlative_id', sa.Integer(), nullable=False),
+    sa.Column('series', sa.String(length=4), nullable=False),
+    sa.Column('start_number', sa.Integer(), nullable=False),
+    sa.Column('end_number', sa.Integer(), nullable=False),
+    sa.Column('worker', sa.String(length=100), nullable=True),
+    sa.Column('last_used_number', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('released_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['correlative_id'], ['correlatives.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('correlative_leases', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_correlative_leases_series'), ['series'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('correlative_leases', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_correlative_leases_series'))
+
+    op.drop_table('correlative_leases')
@@ -0,0 +1,25 @@
+"""Add sync_hash field to products table
+
+Revision ID: 7c1e4b2a9d53
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b2a9d53'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hash del contenido sincronizado desde WooCommerce
+    op.add_column('products', sa.Column('sync_hash', sa.String(length=40), nullable=True))
+
+
+def downgrade():
+    op.drop_column('products', 'sync_hash')
@@ -0,0 +1,28 @@
+"""Add sales.sunat_contingency_at (contingency queue for PSE outages)
+
+Revision ID: a4c6e8f0b213
+Revises: e5b7c9d1f248
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c6e8f0b213'
+down_revision = 'e5b7c9d1f248'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sunat_contingency_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_sales_sunat_contingency_at'), ['sunat_contingency_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sales_sunat_contingency_at'))
+        batch_op.drop_column('sunat_contingency_at')
@@ -0,0 +1,109 @@
+"""Add hour to daily_sales_summary and daily_product_sales rollup table
+
+Revision ID: a8e4c2f6b731
+Revises: f1a3b5c7d902
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4c2f6b731'
+down_revision = 'f1a3b5c7d902'
+branch_labels = None
+depends_on = None
+
+
+# Día y hora de Lima (UTC-5, sin horario de verano) de sales.created_at (UTC) por motor
+LIMA_DAY_HOUR = {
+    'mysql': (
+        'DATE(DATE_SUB(s.created_at, INTERVAL 5 HOUR))',
+        'HOUR(DATE_SUB(s.created_at, INTERVAL 5 HOUR))'
+    ),
+    'postgresql': (
+        "CAST(s.created_at - INTERVAL '5 hours' AS DATE)",
+        "CAST(EXTRACT(HOUR FROM s.created_at - INTERVAL '5 hours') AS INTEGER)"
+    ),
+    'sqlite': (
+        "date(s.created_at, '-5 hours')",
+        "CAST(strftime('%H', s.created_at, '-5 hours') AS INTEGER)"
+    ),
+}
+
+
+def _populate_sales_summary(with_hour):
+    """Recalcular daily_sales_summary desde sales (mismo resultado que `flask rebuild-sales-summary`)"""
+    day, hour = LIMA_DAY_HOUR[op.get_bind().dialect.name]
+    hour_column, hour_value = ('hour, ', f'{hour}, ') if with_hour else ('', '')
+
+    op.execute('DELETE FROM daily_sales_summary')
+    op.execute(
+        f'INSERT INTO daily_sales_summary '
+        f'(day, {hour_column}seller_id, sunat_status, is_cancelled, sale_count, total, updated_at) '
+        f'SELECT {day}, {hour_value}s.seller_id, s.sunat_status, s.is_cancelled, COUNT(s.id), SUM(s.total), CURRENT_TIMESTAMP '
+        f'FROM sales s '
+        f'GROUP BY {day}, {hour_value}s.seller_id, s.sunat_status, s.is_cancelled'
+    )
+
+
+def _populate_product_sales():
+    """Poblar daily_product_sales desde sale_items de ventas no anuladas"""
+    day, _ = LIMA_DAY_HOUR[op.get_bind().dialect.name]
+
+    op.execute(
+        f'INSERT INTO daily_product_sales (day, product_id, quantity, line_count, amount, updated_at) '
+        f'SELECT {day}, i.product_id, SUM(i.quantity), COUNT(i.id), SUM(i.subtotal), CURRENT_TIMESTAMP '
+        f'FROM sale_items i JOIN sales s ON s.id = i.sale_id '
+        f'WHERE NOT s.is_cancelled '
+        f'GROUP BY {day}, i.product_id'
+    )
+
+
+def upgrade():
+    # Acumulados derivados de sales: se vacían aquí y se recalculan al final
+    op.execute('DELETE FROM daily_sales_summary')
+
+    with op.batch_alter_table('daily_sales_summary', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hour', sa.SmallInteger(), nullable=False))
+        batch_op.drop_constraint('unique_daily_sales_bucket', type_='unique')
+        batch_op.create_unique_constraint(
+            'unique_daily_sales_bucket', ['day', 'hour', 'seller_id', 'sunat_status', 'is_cancelled']
+        )
+
+    op.create_table('daily_product_sales',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'product_id', name='unique_daily_product_sales')
+    )
+    with op.batch_alter_table('daily_product_sales', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_product_sales_product_id'), ['product_id'], unique=False)
+
+    _populate_sales_summary(with_hour=True)
+    _populate_product_sales()
+
+
+def downgrade():
+    with op.batch_alter_table('daily_product_sales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_product_sales_product_id'))
+
+    op.drop_table('daily_product_sales')
+
+    op.execute('DELETE FROM daily_sales_summary')
+
+    with op.batch_alter_table('daily_sales_summary', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_daily_sales_bucket', type_='unique')
+        batch_op.create_unique_constraint(
+            'unique_daily_sales_bucket', ['day', 'seller_id', 'sunat_status', 'is_cancelled']
+        )
+        batch_op.drop_column('hour')
+
+    _populate_sales_summary(with_hour=False)
@@ -0,0 +1,25 @@
+"""Add sales (sunat_status, created_at) index for the keyset-paginated sales list
+
+Revision ID: b2d6f8a3c915
+Revises: a8e4c2f6b731
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d6f8a3c915'
+down_revision = 'a8e4c2f6b731'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_sunat_status_created_at', ['sunat_status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_sunat_status_created_at')
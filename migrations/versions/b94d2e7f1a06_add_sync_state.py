@@ -0,0 +1,35 @@
+"""Add sync_state table
+
+Revision ID: b94d2e7f1a06
+Revises: 7c1e4b2a9d53
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b94d2e7f1a06'
+down_revision = '7c1e4b2a9d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Marca de agua de las sincronizaciones incrementales
+    op.create_table('sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('high_water_mark', sa.DateTime(), nullable=True),
+    sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+    sa.Column('details', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_state')
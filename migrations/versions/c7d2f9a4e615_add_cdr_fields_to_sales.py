@@ -0,0 +1,30 @@
+"""Add sales.sunat_response_code and sales.sunat_notes (parsed CDR)
+
+Revision ID: c7d2f9a4e615
+Revises: a4c6e8f0b213
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2f9a4e615'
+down_revision = 'a4c6e8f0b213'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sunat_response_code', sa.String(length=4), nullable=True))
+        batch_op.add_column(sa.Column('sunat_notes', sa.Text(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_sales_sunat_response_code'), ['sunat_response_code'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sales_sunat_response_code'))
+        batch_op.drop_column('sunat_notes')
+        batch_op.drop_column('sunat_response_code')
@@ -0,0 +1,38 @@
+"""Add product_webhook_events table
+
+Revision ID: d3a8f5c2e917
+Revises: b94d2e7f1a06
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f5c2e917'
+down_revision = 'b94d2e7f1a06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cola de webhooks de productos (último evento por woo_id)
+    op.create_table('product_webhook_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('woo_id', sa.Integer(), nullable=False),
+    sa.Column('topic', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('product_webhook_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_webhook_events_woo_id'), ['woo_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('product_webhook_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_webhook_events_woo_id'))
+
+    op.drop_table('product_webhook_events')
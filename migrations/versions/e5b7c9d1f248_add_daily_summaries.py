@@ -0,0 +1,60 @@
+"""Add daily_summaries table and sales.daily_summary_id
+
+Revision ID: e5b7c9d1f248
+Revises: d3a8f5c2e917
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7c9d1f248'
+down_revision = 'd3a8f5c2e917'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Resúmenes diarios de boletas (RC)
+    op.create_table('daily_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('summary_id', sa.String(length=20), nullable=False),
+    sa.Column('reference_date', sa.Date(), nullable=False),
+    sa.Column('issue_date', sa.Date(), nullable=False),
+    sa.Column('line_count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'ACCEPTED', 'REJECTED', 'ERROR', name='daily_summary_statuses'), nullable=False),
+    sa.Column('ticket', sa.String(length=50), nullable=True),
+    sa.Column('xml_path', sa.String(length=255), nullable=True),
+    sa.Column('cdr_path', sa.String(length=255), nullable=True),
+    sa.Column('sunat_response', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('daily_summaries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_summaries_summary_id'), ['summary_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_daily_summaries_reference_date'), ['reference_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_daily_summaries_status'), ['status'], unique=False)
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('daily_summary_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_sales_daily_summary_id'), ['daily_summary_id'], unique=False)
+        batch_op.create_foreign_key('fk_sales_daily_summary_id', 'daily_summaries', ['daily_summary_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_sales_daily_summary_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_sales_daily_summary_id'))
+        batch_op.drop_column('daily_summary_id')
+
+    with op.batch_alter_table('daily_summaries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_summaries_status'))
+        batch_op.drop_index(batch_op.f('ix_daily_summaries_reference_date'))
+        batch_op.drop_index(batch_op.f('ix_daily_summaries_summary_id'))
+
+    op.drop_table('daily_summaries')
@@ -0,0 +1,42 @@
+"""Add daily_sales_summary rollup table
+
+Revision ID: f1a3b5c7d902
+Revises: c7d2f9a4e615
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a3b5c7d902'
+down_revision = 'c7d2f9a4e615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Acumulado diario de ventas (poblar con `flask rebuild-sales-summary`)
+    op.create_table('daily_sales_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('seller_id', sa.Integer(), nullable=False),
+    sa.Column('sunat_status', sa.String(length=10), nullable=False),
+    sa.Column('is_cancelled', sa.Boolean(), nullable=False),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['seller_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'seller_id', 'sunat_status', 'is_cancelled', name='unique_daily_sales_bucket')
+    )
+    with op.batch_alter_table('daily_sales_summary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_sales_summary_seller_id'), ['seller_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_sales_summary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_sales_summary_seller_id'))
+
+    op.drop_table('daily_sales_summary')
@@ -10,12 +10,16 @@ Para iniciar con Flask CLI:
 """
 from app import create_app
 from app.config import config
+from app.services.product_search_index import init_product_index
 import os
 
 # Crear instancia de la aplicación
 env = os.getenv('FLASK_ENV', 'development')
 app = create_app(config[env])
 
+# Construir índice de búsqueda de productos en memoria
+init_product_index(app)
+
 if __name__ == '__main__':
     # Configuración para desarrollo
     host = os.getenv('FLASK_HOST', '0.0.0.0')
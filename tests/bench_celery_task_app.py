@@ -0,0 +1,90 @@
+"""
+Benchmark: create_app() por tarea vs app reutilizada por worker de Celery
+
+Ejecuta el cuerpo típico de una tarea (contexto de app + consulta a sales)
+N veces y reporta milisegundos por tarea y conexiones nuevas a la base de
+datos para:
+- create_app: flujo anterior (app, engine y pool nuevos en cada tarea)
+- worker_app: get_worker_app() (una app y un pool por proceso)
+
+Uso:
+    python tests/bench_celery_task_app.py [tareas]
+
+Para medir contra MySQL definir BENCH_DATABASE_URL.
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# La app del worker se crea con la configuración del entorno
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault(
+    'TEST_DATABASE_URL',
+    os.getenv('BENCH_DATABASE_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'izisales_bench_tasks.db')}")
+)
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from app import create_app, db
+from app.models.sale import Sale
+from app.tasks.worker_app import get_worker_app
+
+
+connect_count = 0
+
+
+@event.listens_for(Pool, 'connect')
+def _count_connect(dbapi_connection, connection_record):
+    global connect_count
+    connect_count += 1
+
+
+def task_body(app):
+    """Cuerpo mínimo de una tarea: contexto de app y una consulta"""
+    with app.app_context():
+        db.session.query(Sale.id).filter(Sale.sunat_status == 'PENDING').limit(1).all()
+
+
+def run(mode, get_app, tasks):
+    """Ejecutar N tareas y reportar tiempo y conexiones nuevas"""
+    global connect_count
+    connect_count = 0
+
+    started = time.perf_counter()
+    for _ in range(tasks):
+        task_body(get_app())
+        logger.remove()  # create_app() vuelve a agregar los sinks
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{mode:<12} {tasks:>5} tareas  {elapsed * 1000 / tasks:>8.2f} ms/tarea  "
+        f"{connect_count:>5} conexiones nuevas  {connect_count / tasks:>5.2f} por tarea"
+    )
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    app = create_app()
+    logger.remove()
+    with app.app_context():
+        db.create_all()
+
+    print(f"--- BENCHMARK APP POR TAREA DE CELERY ({app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}) ---\n")
+
+    run('create_app', create_app, tasks)
+
+    # El costo de crear la app del worker se paga una vez al iniciar el proceso
+    get_worker_app()
+    logger.remove()
+    run('worker_app', get_worker_app, tasks)
+
+
+if __name__ == '__main__':
+    main()
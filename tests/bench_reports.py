@@ -0,0 +1,137 @@
+"""
+Benchmark: reportes anuales desde los acumulados diarios
+
+Llena daily_sales_summary y daily_product_sales con dos años de actividad
+sintética (equivalente a millones de líneas vendidas: el tamaño de los
+acumulados depende de días × productos, no de las líneas) y mide
+ReportService para un año completo comparado con el año anterior:
+- sin caché: cada reporte es una consulta agrupada
+- con caché: lectura del resultado cacheado
+
+Uso:
+    python tests/bench_reports.py [productos] [vendedores]
+
+Para medir contra MySQL definir BENCH_DATABASE_URL.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger
+
+from app import create_app, db, cache
+from app.config import TestingConfig
+from app.models.user import User
+from app.models.product import Product
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.daily_product_sales import DailyProductSales
+from app.services.report_engine import ReportService
+
+
+class BenchConfig(TestingConfig):
+    """Configuración del benchmark (SQLite en archivo por defecto)"""
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCH_DATABASE_URL',
+        f"sqlite:///{os.path.join(tempfile.gettempdir(), 'izisales_bench_reports.db')}"
+    )
+    DEBUG = False
+
+
+def populate(products, sellers, first_day, days):
+    """Acumulados sintéticos: todas las combinaciones día × producto y día × hora × vendedor"""
+    random.seed(42)
+    now = datetime.utcnow()
+
+    seller_ids = []
+    for i in range(sellers):
+        user = User(username=f'bench{i}', email=f'bench{i}@bench', full_name=f'Vendedor {i}', role='seller')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.flush()
+        seller_ids.append(user.id)
+
+    product_ids = []
+    for i in range(products):
+        product = Product(woo_id=i + 1, sku=f'BENCH-{i}', name=f'Producto {i}', price=Decimal('10.00'))
+        db.session.add(product)
+        db.session.flush()
+        product_ids.append(product.id)
+    db.session.commit()
+
+    lines = 0
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+
+        product_rows = []
+        for product_id in product_ids:
+            quantity = random.randint(1, 12)
+            lines += quantity
+            product_rows.append({
+                'day': day, 'product_id': product_id, 'quantity': quantity, 'line_count': quantity,
+                'amount': Decimal(quantity * random.randint(500, 5000)) / 100, 'updated_at': now
+            })
+        db.session.execute(db.insert(DailyProductSales), product_rows)
+
+        db.session.execute(db.insert(DailySalesSummary), [
+            {
+                'day': day, 'hour': hour, 'seller_id': seller_id, 'sunat_status': 'ACCEPTED',
+                'is_cancelled': False, 'sale_count': random.randint(1, 30),
+                'total': Decimal(random.randint(1000, 90000)) / 100, 'updated_at': now
+            }
+            for hour in range(8, 22) for seller_id in seller_ids
+        ])
+    db.session.commit()
+    return lines
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    sellers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    app = create_app(BenchConfig)
+    logger.remove()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        first_day = date(2025, 1, 1)
+        lines = populate(products, sellers, first_day, 730)
+        print("--- BENCHMARK REPORTES (año 2026 vs 2025 desde acumulados) ---\n")
+        print(
+            f"Acumulados: {DailyProductSales.query.count()} filas de productos, "
+            f"{DailySalesSummary.query.count()} de ventas (~{lines:,} líneas vendidas)\n"
+        )
+
+        service = ReportService(date(2026, 1, 1), date(2026, 12, 31))
+        cache.clear()
+
+        print(f"{'reporte':<14} {'sin caché ms':>13} {'con caché ms':>13}")
+        total_uncached = total_cached = 0.0
+        for name in ReportService.REPORTS:
+            started = time.perf_counter()
+            service.run(name)
+            uncached = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            service.run(name)
+            cached = (time.perf_counter() - started) * 1000
+
+            total_uncached += uncached
+            total_cached += cached
+            print(f"{name:<14} {uncached:>13.1f} {cached:>13.2f}")
+
+        print(f"{'total':<14} {total_uncached:>13.1f} {total_cached:>13.2f}")
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
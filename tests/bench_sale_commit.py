@@ -0,0 +1,181 @@
+"""
+Benchmark: registro de ventas con varios commits vs unidad de trabajo (un commit)
+
+Simula cajeros concurrentes registrando ventas y reporta ventas por segundo,
+commits por venta y errores para:
+- legacy: flujo anterior (correlativo, RUS, venta y audit log con commits separados)
+- unit_of_work: SaleService.create_sale (un único commit, correlativo con UPDATE atómico)
+- unit_of_work+bloques: igual, con bloques de correlativos por proceso
+
+Uso:
+    python tests/bench_sale_commit.py [cajeros] [ventas_por_cajero]
+
+Para medir contra MySQL (fsync real por commit) definir BENCH_DATABASE_URL.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.sale import Sale, SaleItem
+from app.models.customer import Customer
+from app.models.user import User
+from app.models.product import Product
+from app.models.correlative import Correlative
+from app.models.rus_control import RUSControl
+from app.models.audit_log import AuditLog
+from app.services.sale_service import SaleService
+
+
+class BenchConfig(TestingConfig):
+    """Configuración del benchmark (SQLite en archivo por defecto)"""
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'BENCH_DATABASE_URL',
+        f"sqlite:///{os.path.join(tempfile.gettempdir(), 'izisales_bench.db')}"
+    )
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        {'connect_args': {'timeout': 30}}
+        if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {'pool_size': 20}
+    )
+    RUS_LIMIT_CATEGORY_2 = 10 ** 9  # Sin bloqueo RUS durante el benchmark
+    DEBUG = False
+
+
+commit_count = 0
+commit_lock = threading.Lock()
+
+
+@event.listens_for(Session, 'after_commit')
+def _count_commit(session):
+    global commit_count
+    with commit_lock:
+        commit_count += 1
+
+
+def legacy_create_sale(lines, seller_id, customer_data):
+    """Flujo anterior de pos.create_sale (cuatro commits)"""
+    total = sum(line['subtotal'] for line in lines)
+    subtotal = (total / Decimal('1.18')).quantize(Decimal('0.01'))
+
+    rus_control = RUSControl.get_or_create_current()
+    customer = Customer.query.filter_by(document_number=customer_data['document_number']).first()
+    correlative_obj = Correlative.get_active_for_boleta()
+    correlative = correlative_obj.get_next_correlative()
+
+    sale = Sale(
+        correlative=correlative, document_type='BOLETA', customer_id=customer.id,
+        seller_id=seller_id, subtotal=subtotal, tax=total - subtotal, total=total,
+        sunat_status='PENDING'
+    )
+    db.session.add(sale)
+    db.session.flush()
+
+    for line in lines:
+        db.session.add(SaleItem(
+            sale_id=sale.id, product_id=line['product_id'], product_name=line['name'],
+            product_sku=line['sku'], quantity=line['quantity'],
+            unit_price=line['unit_price'], subtotal=line['subtotal']
+        ))
+
+    correlative_obj.advance_correlative()
+    rus_control.update_total(total, limit_cat2=BenchConfig.RUS_LIMIT_CATEGORY_2)
+    db.session.commit()
+    AuditLog.log_action(action='sale_created', user_id=seller_id, entity_type='sale',
+                        entity_id=sale.id, details=f'Venta {correlative}')
+
+
+def unit_of_work_create_sale(lines, seller_id, customer_data):
+    """Flujo actual: SaleService (un commit)"""
+    result = SaleService().create_sale(customer_data, lines, seller_id)
+    if not result['success']:
+        raise RuntimeError(result['message'])
+
+
+def run(app, mode, create_fn, cashiers, sales_per_cashier, lines, seller_id, customer_data):
+    """Ejecutar un escenario con N cajeros concurrentes"""
+    global commit_count
+    errors = []
+    commit_count = 0
+
+    def cashier():
+        with app.app_context():
+            for _ in range(sales_per_cashier):
+                try:
+                    create_fn(lines, seller_id, customer_data)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(type(e).__name__)
+            db.session.remove()
+
+    threads = [threading.Thread(target=cashier) for _ in range(cashiers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total_sales = cashiers * sales_per_cashier
+    ok = total_sales - len(errors)
+    print(
+        f"{mode:<14} {ok:>6} ventas  {ok / elapsed:>8.1f} ventas/s  "
+        f"{commit_count / max(ok, 1):>5.2f} commits/venta  {len(errors):>4} errores"
+        + (f" ({', '.join(sorted(set(errors)))})" if errors else '')
+    )
+
+
+def main():
+    cashiers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    sales_per_cashier = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    app = create_app(BenchConfig)
+    logger.remove()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        seller = User(username='bench', email='bench@example.com', full_name='Cajero Bench')
+        seller.set_password('bench')
+        db.session.add(seller)
+        db.session.add(Customer(document_type='DNI', document_number='12345678', name='Cliente Bench'))
+        db.session.add(Correlative(document_type='BOLETA', series='B001', current_number=0, is_active=True))
+
+        products = [
+            Product(woo_id=i, sku=f'BENCH-{i}', name=f'Producto {i}', price=Decimal('10.00'))
+            for i in range(1, 11)
+        ]
+        db.session.add_all(products)
+        db.session.commit()
+
+        seller_id = seller.id
+        lines = [{
+            'product_id': product.id, 'name': product.name, 'sku': product.sku,
+            'quantity': 1, 'unit_price': product.price, 'subtotal': product.price
+        } for product in products]
+
+    customer_data = {'document_type': 'DNI', 'document_number': '12345678', 'full_name': 'Cliente Bench'}
+
+    print(f"--- BENCHMARK REGISTRO DE VENTAS ({app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}) ---")
+    print(f"{cashiers} cajeros x {sales_per_cashier} ventas, {len(lines)} items por venta\n")
+
+    run(app, 'legacy', legacy_create_sale, cashiers, sales_per_cashier, lines, seller_id, customer_data)
+    run(app, 'unit_of_work', unit_of_work_create_sale, cashiers, sales_per_cashier, lines, seller_id, customer_data)
+
+    app.config['CORRELATIVE_BLOCK_SIZE'] = 50
+    run(app, 'uow+bloques', unit_of_work_create_sale, cashiers, sales_per_cashier, lines, seller_id, customer_data)
+
+
+if __name__ == '__main__':
+    main()
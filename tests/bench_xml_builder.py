@@ -0,0 +1,120 @@
+"""
+Benchmark: XML UBL de boletas con árbol lxml vs plantilla precompilada
+
+Para tickets de 1, 10 y 100 líneas:
+- Verifica que la plantilla produce el mismo documento: C14N idéntico al
+  flujo anterior (árbol lxml + pretty_print) y bytes idénticos a la
+  serialización compacta del mismo árbol
+- Reporta boletas por segundo de ambos caminos
+
+Uso:
+    python tests/bench_xml_builder.py [iteraciones]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loguru import logger
+from lxml import etree
+
+from app import create_app
+from app.config import TestingConfig
+from app.services.xml_builder import XMLBuilder
+
+
+class BenchConfig(TestingConfig):
+    """Datos de empresa con caracteres que requieren escape"""
+    COMPANY_RUC = '10456789012'
+    COMPANY_NAME = 'Comercial Ñandú & Hijos <E.I.R.L.>'
+    COMPANY_ADDRESS = 'Av. Los Álamos 123 "B", Lima'
+    DEBUG = False
+
+
+def make_sale(lines):
+    """Venta en memoria (sin base de datos)"""
+    items = [
+        SimpleNamespace(
+            quantity=(i % 3) + 1,
+            unit_price=Decimal('12.71') + i,
+            product_name=f'Polo talla {i} "Edición" Ñ & <especial>\r',
+            product_sku=f'SKU-{i:04d}'
+        )
+        for i in range(lines)
+    ]
+    total = sum(Decimal(item.quantity) * item.unit_price for item in items)
+    subtotal = (total / Decimal('1.18')).quantize(Decimal('0.01'))
+
+    return SimpleNamespace(
+        id=1,
+        correlative='B001-00000042',
+        created_at=datetime(2026, 10, 17, 15, 30, 5),
+        customer=SimpleNamespace(document_type='DNI', document_number='12345678', name='José Pérez & Cía'),
+        subtotal=subtotal,
+        tax=total - subtotal,
+        total=total,
+        items=items
+    )
+
+
+def legacy_build(builder, sale):
+    """Flujo anterior: árbol completo por venta + pretty_print"""
+    return etree.tostring(
+        builder._build_invoice_tree(sale), pretty_print=True, xml_declaration=True, encoding='UTF-8'
+    ).decode('utf-8')
+
+
+def canonical(xml_string):
+    """C14N del documento ignorando espacios de indentación"""
+    parser = etree.XMLParser(remove_blank_text=True)
+    return etree.tostring(etree.fromstring(xml_string.encode('utf-8'), parser), method='c14n')
+
+
+def timed(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - started
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    app = create_app(BenchConfig)
+    logger.remove()
+
+    with app.app_context():
+        builder = XMLBuilder()
+
+        print("--- BENCHMARK XML UBL (árbol lxml vs plantilla precompilada) ---\n")
+        print(f"{'líneas':>6} {'C14N':>6} {'bytes':>6} {'lxml/s':>10} {'plantilla/s':>12} {'speedup':>8}")
+
+        for lines in (1, 10, 100):
+            sale = make_sale(lines)
+            legacy = legacy_build(builder, sale)
+            fast = builder.build_invoice(sale)
+            compact = etree.tostring(
+                builder._build_invoice_tree(sale), xml_declaration=True, encoding='UTF-8'
+            ).decode('utf-8')
+
+            same_c14n = canonical(legacy) == canonical(fast)
+            same_bytes = compact == fast
+            assert same_c14n and same_bytes, f"Documento distinto para {lines} líneas"
+
+            n = max(iterations // lines, 20)
+            legacy_time = timed(lambda: legacy_build(builder, sale), n)
+            fast_time = timed(lambda: builder.build_invoice(sale), n)
+
+            print(
+                f"{lines:>6} {'ok' if same_c14n else 'FALLA':>6} {'ok' if same_bytes else 'FALLA':>6} "
+                f"{n / legacy_time:>10.0f} {n / fast_time:>12.0f} {legacy_time / fast_time:>7.1f}x"
+            )
+
+
+if __name__ == '__main__':
+    main()
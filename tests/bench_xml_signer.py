@@ -0,0 +1,127 @@
+"""
+Benchmark: firma XML-DSig local con certificado cargado por proceso
+
+Genera un certificado autofirmado PKCS#12 temporal y, para boletas de
+1, 10 y 100 líneas, reporta firmas por segundo de:
+- pkcs12/firma: certificado leído y descifrado en cada firma
+- cacheado: XMLSigner (certificado cargado una vez por proceso), con sign_batch
+
+Verifica además que el DigestValue coincide con el C14N del documento
+firmado sin ds:Signature (transformación enveloped).
+
+Uso:
+    python tests/bench_xml_signer.py [iteraciones]
+"""
+import os
+import sys
+import base64
+import hashlib
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cryptography import x509
+from cryptography.x509.oid import NameOID
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+from loguru import logger
+from lxml import etree
+
+from app import create_app
+from app.config import TestingConfig
+from app.services import xml_signer
+from app.services.xml_builder import XMLBuilder
+from app.services.xml_signer import XMLSigner
+
+from bench_xml_builder import make_sale
+
+
+CERT_PATH = os.path.join(tempfile.gettempdir(), 'izisales_bench_cert.pfx')
+CERT_PASSWORD = 'bench'
+
+
+class BenchConfig(TestingConfig):
+    XML_SIGNING_ENABLED = True
+    SIGNING_CERT_PATH = CERT_PATH
+    SIGNING_CERT_PASSWORD = CERT_PASSWORD
+    DEBUG = False
+
+
+def write_certificate():
+    """Certificado RSA 2048 autofirmado en PKCS#12 (como los de SUNAT)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'Benchmark iziSales')])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    with open(CERT_PATH, 'wb') as f:
+        f.write(pkcs12.serialize_key_and_certificates(
+            b'bench', key, certificate, None,
+            serialization.BestAvailableEncryption(CERT_PASSWORD.encode('utf-8'))
+        ))
+
+
+def enveloped_digest(signed_xml):
+    """DigestValue recalculado: C14N del documento sin ds:Signature"""
+    root = etree.fromstring(signed_xml.encode('utf-8'))
+    signature = root.find(f'.//{{{XMLSigner.DS}}}Signature')
+    signature.getparent().remove(signature)
+    return base64.b64encode(hashlib.sha256(etree.tostring(root, method='c14n')).digest()).decode('ascii')
+
+
+def sign_uncached(signer, xml):
+    """Flujo sin caché: leer el PKCS#12 en cada firma"""
+    xml_signer._KEYS.clear()
+    return signer.sign(xml)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    write_certificate()
+    app = create_app(BenchConfig)
+    logger.remove()
+
+    try:
+        with app.app_context():
+            builder = XMLBuilder()
+            signer = XMLSigner()
+
+            print("--- BENCHMARK FIRMA XML-DSig (PKCS#12 por firma vs cacheado) ---\n")
+            print(f"{'líneas':>6} {'digest':>7} {'pkcs12/firma/s':>15} {'cacheado/s':>11} {'speedup':>8}")
+
+            for lines in (1, 10, 100):
+                xml = builder.build_invoice(make_sale(lines))
+                signed_xml, digest_value = signer.sign(xml)
+                digest_ok = enveloped_digest(signed_xml) == digest_value
+                assert digest_ok, f"DigestValue incorrecto para {lines} líneas"
+
+                n = max(iterations // lines, 20)
+                started = time.perf_counter()
+                for _ in range(n):
+                    sign_uncached(signer, xml)
+                uncached_time = time.perf_counter() - started
+
+                result = signer.sign_batch((i, xml) for i in range(n))
+                assert not result['errors']
+                cached_time = result['elapsed_ms'] / 1000
+
+                print(
+                    f"{lines:>6} {'ok' if digest_ok else 'FALLA':>7} {n / uncached_time:>15.0f} "
+                    f"{n / cached_time:>11.0f} {uncached_time / cached_time:>7.1f}x"
+                )
+    finally:
+        os.remove(CERT_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Script de prueba: la tarea cleanup_old_files se ejecuta en el contexto
+de la app del worker y elimina solo los archivos antiguos
+
+Crea en un directorio temporal XML, CDR y QR con fechas de más de 6
+meses y recientes, ejecuta el cuerpo de la tarea (sin broker) y verifica
+que los antiguos se eliminaron y los recientes se conservan.
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# La app del worker se crea con la configuración del entorno
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['TEST_DATABASE_URL'] = 'sqlite://'
+
+from app import db
+from app.tasks.sunat_tasks import cleanup_old_files
+from app.tasks.worker_app import get_worker_app
+
+storage_dir = tempfile.mkdtemp(prefix='izisales_cleanup_')
+paths = {
+    'XML_PATH': os.path.join(storage_dir, 'xml'),
+    'CDR_PATH': os.path.join(storage_dir, 'cdr'),
+    'PDF_PATH': os.path.join(storage_dir, 'pdf')
+}
+os.makedirs(os.path.join(paths['PDF_PATH'], 'qr'))
+os.makedirs(paths['XML_PATH'])
+os.makedirs(paths['CDR_PATH'])
+
+app = get_worker_app()
+app.config.update(paths)
+
+
+def touch(path, days_old):
+    """Crear un archivo con fecha de modificación de hace N días"""
+    with open(path, 'w') as f:
+        f.write('x')
+    mtime = time.time() - days_old * 86400
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+with app.app_context():
+    db.create_all()
+
+print("--- PRUEBA DE LIMPIEZA DE ARCHIVOS ANTIGUOS ---")
+
+old_files = [
+    touch(os.path.join(paths['XML_PATH'], '10456789012-03-B001-00000001.xml'), 200),
+    touch(os.path.join(paths['CDR_PATH'], 'R-10456789012-03-B001-00000001.zip'), 200),
+    touch(os.path.join(paths['PDF_PATH'], 'qr', 'B001-00000001.png'), 200)
+]
+recent_files = [
+    touch(os.path.join(paths['XML_PATH'], '10456789012-03-B001-00000002.xml'), 10),
+    touch(os.path.join(paths['CDR_PATH'], 'R-10456789012-03-B001-00000002.zip'), 10),
+    touch(os.path.join(paths['PDF_PATH'], 'qr', 'B001-00000002.png'), 10)
+]
+
+failures = 0
+
+result = cleanup_old_files()
+
+if result.get('success') and result.get('files_cleaned') == len(old_files):
+    print(f"OK   tarea completada: {result['files_cleaned']} archivos eliminados")
+else:
+    failures += 1
+    print(f"FAIL resultado inesperado: {result}")
+
+for path in old_files:
+    if os.path.exists(path):
+        failures += 1
+        print(f"FAIL archivo antiguo conservado: {os.path.basename(path)}")
+
+for path in recent_files:
+    if not os.path.exists(path):
+        failures += 1
+        print(f"FAIL archivo reciente eliminado: {os.path.basename(path)}")
+
+if failures == 0:
+    print("\n✅ PRUEBA EXITOSA: La limpieza usa la configuración de la app del worker.")
+else:
+    print(f"\n❌ PRUEBA FALLIDA: {failures} errores.")
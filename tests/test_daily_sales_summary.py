@@ -0,0 +1,161 @@
+"""
+Script de prueba: los acumulados diarios mantenidos en cada operación
+(daily_sales_summary y daily_product_sales) coinciden con rebuild()
+
+Pasos: alta de ventas, cambio de estado SUNAT, movimiento masivo
+(move_rows, como el resumen diario) y anulación. Después de cada paso
+las filas incrementales deben ser idénticas a las recalculadas.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.config import config
+from app.models.correlative import Correlative
+from app.models.daily_product_sales import DailyProductSales
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.product import Product
+from app.models.sale import Sale, SaleItem
+from app.models.user import User
+from app.services.sale_service import SaleService
+from app.utils.helpers import lima_date
+
+app = create_app(config['testing'])
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'  # In-memory
+
+
+def snapshot():
+    """Filas no vacías de ambos acumulados"""
+    db.session.expire_all()
+    sales = sorted(
+        (row.day, row.hour, row.seller_id, row.sunat_status, row.is_cancelled, row.sale_count, row.total)
+        for row in DailySalesSummary.query if row.sale_count
+    )
+    products = sorted(
+        (row.day, row.product_id, row.quantity, row.line_count, row.amount)
+        for row in DailyProductSales.query if row.line_count
+    )
+    return sales, products
+
+
+def matches_rebuild(step):
+    """Comparar el acumulado incremental con rebuild() del rango de ventas"""
+    incremental = snapshot()
+
+    first, last = db.session.query(db.func.min(Sale.created_at), db.func.max(Sale.created_at)).one()
+    DailySalesSummary.rebuild(lima_date(first), lima_date(last))
+    DailyProductSales.rebuild(lima_date(first), lima_date(last))
+    rebuilt = snapshot()
+
+    if incremental == rebuilt:
+        print(f"OK   {step}: {len(rebuilt[0])} filas de ventas, {len(rebuilt[1])} de productos")
+        return True
+
+    print(f"FAIL {step}:\n  incremental={incremental}\n  rebuild={rebuilt}")
+    return False
+
+
+def add_past_sale(correlative, created_at, seller_id, customer_id, lines):
+    """Venta con fecha pasada registrada como en SaleService.create_sale"""
+    total = sum(quantity * price for _, quantity, price in lines)
+    sale = Sale(
+        correlative=correlative,
+        document_type='BOLETA',
+        customer_id=customer_id,
+        seller_id=seller_id,
+        subtotal=total,
+        tax=Decimal('0.00'),
+        total=total,
+        sunat_status='PENDING',
+        created_at=created_at
+    )
+    db.session.add(sale)
+    db.session.flush()
+    for product_id, quantity, price in lines:
+        db.session.add(SaleItem(
+            sale_id=sale.id, product_id=product_id, quantity=quantity, unit_price=price,
+            subtotal=quantity * price, product_name='Producto', product_sku=f'SKU-{product_id}'
+        ))
+    DailySalesSummary.record(sale)
+    DailyProductSales.record(created_at, [(product_id, quantity, quantity * price) for product_id, quantity, price in lines])
+    db.session.commit()
+    return sale
+
+
+with app.app_context():
+    print("--- PRUEBA DE ACUMULADOS DIARIOS DE VENTAS ---")
+
+    db.create_all()
+
+    sellers = []
+    for i in range(2):
+        user = User(username=f'vendedor{i}', email=f'vendedor{i}@example.com', full_name=f'Vendedor {i}', role='seller')
+        user.set_password('password')
+        db.session.add(user)
+        sellers.append(user)
+    for i in range(1, 4):
+        db.session.add(Product(woo_id=i, sku=f'SKU-{i}', name=f'Producto {i}', price=Decimal('10.00')))
+    db.session.add(Correlative(document_type='BOLETA', series='B001', current_number=0, is_active=True))
+    db.session.commit()
+
+    failures = 0
+    service = SaleService()
+
+    # 1. Alta: ventas de hoy por SaleService y ventas de días anteriores
+    #    (23:30 y 00:30 de Lima caen en días distintos)
+    sale_ids = []
+    for i in range(4):
+        lines = [
+            {'product_id': product_id, 'name': f'Producto {product_id}', 'sku': f'SKU-{product_id}',
+             'quantity': i + 1, 'unit_price': Decimal('10.00'), 'subtotal': Decimal('10.00') * (i + 1)}
+            for product_id in range(1, 2 + i % 3)
+        ]
+        result = service.create_sale(
+            {'document_type': 'DNI', 'document_number': '12345678', 'full_name': 'Cliente Prueba'},
+            lines, sellers[i % 2].id
+        )
+        sale_ids.append(result['sale_id'])
+
+    customer_id = db.session.get(Sale, sale_ids[0]).customer_id
+    base = datetime.utcnow().replace(hour=4, minute=30, second=0, microsecond=0) - timedelta(days=3)
+    for i, created_at in enumerate((base, base + timedelta(hours=1), base + timedelta(days=1))):
+        sale = add_past_sale(
+            f'B001-9000000{i}', created_at, sellers[i % 2].id, customer_id,
+            [(1, 2, Decimal('7.50')), (3, 1, Decimal('12.00'))]
+        )
+        sale_ids.append(sale.id)
+
+    failures += not matches_rebuild('alta de ventas')
+
+    # 2. Cambio de estado SUNAT por venta
+    db.session.get(Sale, sale_ids[0]).set_sunat_status('ACCEPTED')
+    db.session.get(Sale, sale_ids[4]).set_sunat_status('REJECTED')
+    db.session.commit()
+    failures += not matches_rebuild('cambio de estado')
+
+    # 3. Movimiento masivo (UPDATE con move_rows, como el resumen diario)
+    bulk_ids = [sale_ids[1], sale_ids[2], sale_ids[5], sale_ids[6]]
+    DailySalesSummary.move_rows(
+        db.session.query(
+            Sale.created_at, Sale.seller_id, Sale.sunat_status, Sale.is_cancelled, Sale.total
+        ).filter(Sale.id.in_(bulk_ids)),
+        sunat_status='ACCEPTED'
+    )
+    Sale.query.filter(Sale.id.in_(bulk_ids)).update({Sale.sunat_status: 'ACCEPTED'}, synchronize_session=False)
+    db.session.commit()
+    failures += not matches_rebuild('movimiento masivo')
+
+    # 4. Anulación (acumulado de ventas y de productos)
+    db.session.get(Sale, sale_ids[1]).cancel('Prueba')
+    db.session.get(Sale, sale_ids[5]).cancel('Prueba')
+    failures += not matches_rebuild('anulación')
+
+    if failures == 0:
+        print("\n✅ PRUEBA EXITOSA: Los acumulados incrementales coinciden con rebuild().")
+    else:
+        print(f"\n❌ PRUEBA FALLIDA: {failures} pasos con diferencias.")
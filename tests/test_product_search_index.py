@@ -0,0 +1,100 @@
+"""
+Script de prueba: el índice de búsqueda en memoria devuelve los mismos
+productos que la búsqueda SQL (ilike) de get_local_products
+
+SQLite no ignora acentos en LIKE; las búsquedas con acentos se comparan
+con el resultado de la collation _ci de MySQL ("cafe" encuentra "Café").
+"""
+import os
+import sys
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.config import config
+from app.models.product import Product
+from app.services.woocommerce_service import WooCommerceService
+from app.services.product_search_index import product_index
+
+app = create_app(config['testing'])
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'  # In-memory
+
+with app.app_context():
+    print("--- PRUEBA DE ÍNDICE DE BÚSQUEDA DE PRODUCTOS ---")
+
+    db.create_all()
+
+    names = [
+        'Polo Negro Talla 8',
+        'Polo Azul Talla 12',
+        'Camisa 8-10 Años',
+        'Zapatilla Air Max 90',
+        'Gorra (8) Roja',
+        '8 Pack Medias',
+        'Medias Pack 8',
+        'Casaca Inactiva 8',
+        'Café Molido 250g',
+        'Peluche Ñandú',
+    ]
+    for index, name in enumerate(names, start=1):
+        db.session.add(Product(
+            woo_id=index,
+            sku=f"SKU-{index:03d}",
+            name=name,
+            price=10,
+            is_active='Inactiva' not in name
+        ))
+    db.session.commit()
+
+    # El servicio solo se usa para consultar la BD local (sin API WooCommerce)
+    service = WooCommerceService.__new__(WooCommerceService)
+    product_index.invalidate()
+
+    queries = ['polo', '8', 'polo 8', 'talla 12', 'air 90', 'sku-00', 'pack', '(8', 'xyz', '00']
+    failures = 0
+
+    for query in queries:
+        app.config['PRODUCT_SEARCH_INDEX_ENABLED'] = False
+        expected = service.get_local_products(search=query, limit=20)
+
+        app.config['PRODUCT_SEARCH_INDEX_ENABLED'] = True
+        result = service.get_local_products(search=query, limit=20)
+
+        if result == expected:
+            print(f"OK   '{query}': {len(result)} productos")
+        else:
+            failures += 1
+            print(f"FAIL '{query}': SQL={[p['sku'] for p in expected]} índice={[p['sku'] for p in result]}")
+
+    # Acentos y mayúsculas ignorados, como la collation _ci de MySQL
+    accent_queries = {
+        'cafe': ['SKU-009'],
+        'CAFÉ molido': ['SKU-009'],
+        'nandu': ['SKU-010'],
+        'años': ['SKU-003'],
+        'anos 8': ['SKU-003'],
+    }
+    for query, expected_skus in accent_queries.items():
+        result = [p['sku'] for p in product_index.search(query, limit=20)]
+        if result == expected_skus:
+            print(f"OK   '{query}': {result}")
+        else:
+            failures += 1
+            print(f"FAIL '{query}': esperado={expected_skus} índice={result}")
+
+    # Actualización incremental: desactivar un producto y refrescar
+    product = Product.query.filter_by(sku='SKU-001').first()
+    product.is_active = False
+    product.last_sync = product.last_sync.replace(year=product.last_sync.year + 1)
+    db.session.commit()
+    product_index.refresh()
+
+    if any(p['sku'] == 'SKU-001' for p in product_index.search('polo', limit=20)):
+        failures += 1
+        print("FAIL: el producto desactivado sigue en el índice")
+
+    if failures == 0:
+        print("\n✅ PRUEBA EXITOSA: El índice coincide con la búsqueda SQL.")
+    else:
+        print(f"\n❌ PRUEBA FALLIDA: {failures} diferencias.")
@@ -0,0 +1,99 @@
+"""
+Script de prueba: el Resumen Diario (RC) se valida contra un XSD real
+
+Escribe en un directorio temporal un XSD del Resumen Diario con el
+namespace de SUNAT y comprueba que build_daily_summary (que valida el
+árbol en memoria antes de serializar) lo acepta, igual que el XML
+serializado, y que un documento fuera del namespace se rechaza.
+"""
+import os
+import sys
+import tempfile
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Añadir el directorio raíz al path para poder importar la app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.config import config
+from app.services.xml_builder import XMLBuilder
+from app.services.xml_validator import UBLSchemaValidator
+
+SUMMARY_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           targetNamespace="urn:sunat:names:specification:ubl:peru:schema:xsd:SummaryDocuments-1"
+           elementFormDefault="qualified">
+    <xs:element name="SummaryDocuments">
+        <xs:complexType>
+            <xs:sequence>
+                <xs:any namespace="##other" processContents="lax" minOccurs="5" maxOccurs="unbounded"/>
+            </xs:sequence>
+        </xs:complexType>
+    </xs:element>
+</xs:schema>
+"""
+
+xsd_dir = tempfile.mkdtemp(prefix='izisales_xsd_')
+os.makedirs(os.path.join(xsd_dir, 'maindoc'))
+with open(os.path.join(xsd_dir, UBLSchemaValidator.SCHEMA_FILES['SummaryDocuments']), 'w') as f:
+    f.write(SUMMARY_XSD)
+
+app = create_app(config['testing'])
+app.config.update(
+    UBL_XSD_DIR=xsd_dir,
+    UBL_SCHEMA_VALIDATION=True,
+    COMPANY_RUC='10456789012',
+    COMPANY_NAME='Comercial Prueba'
+)
+
+with app.app_context():
+    print("--- PRUEBA DE VALIDACIÓN XSD DEL RESUMEN DIARIO ---")
+
+    sales = [
+        SimpleNamespace(
+            correlative=f'B001-{i:08d}',
+            customer=SimpleNamespace(document_type='DNI', document_number='12345678'),
+            subtotal=Decimal('8.47'),
+            tax=Decimal('1.53'),
+            total=Decimal('10.00')
+        )
+        for i in range(1, 4)
+    ]
+
+    validator = UBLSchemaValidator()
+    failures = 0
+
+    if validator.schema('SummaryDocuments') is None:
+        failures += 1
+        print("FAIL: el XSD del resumen no se compiló")
+
+    try:
+        xml = XMLBuilder().build_daily_summary('RC-20261017-1', date(2026, 10, 17), date(2026, 10, 17), sales)
+        print("OK   árbol en memoria válido contra el XSD")
+    except ValueError as e:
+        xml = None
+        failures += 1
+        print(f"FAIL árbol en memoria rechazado: {e}")
+
+    if xml is not None:
+        is_valid, errors = validator.validate(xml)
+        if is_valid:
+            print("OK   XML serializado válido contra el XSD")
+        else:
+            failures += 1
+            print(f"FAIL XML serializado rechazado: {errors}")
+
+    # Sin namespace en la raíz el esquema debe rechazar el documento
+    is_valid, errors = validator.validate('<SummaryDocuments/>')
+    if is_valid:
+        failures += 1
+        print("FAIL: documento fuera del namespace aceptado")
+    else:
+        print(f"OK   documento fuera del namespace rechazado ({errors[0]})")
+
+    if failures == 0:
+        print("\n✅ PRUEBA EXITOSA: El resumen diario cumple el XSD.")
+    else:
+        print(f"\n❌ PRUEBA FALLIDA: {failures} errores.")